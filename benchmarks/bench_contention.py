@@ -0,0 +1,66 @@
+"""
+Enqueue cost under thread contention
+
+Scales threads from 1 to 64, each appending to the ShardedBuffer that
+backs batch delivery, and reports wall-clock time per enqueue across all
+threads; flat numbers mean enqueues do not serialise on a lock. A shared
+queue.Queue.put (one lock for all threads) is measured as the baseline,
+so both columns time only the enqueue itself, not building the event in
+client.track().
+
+Usage (from the repository root, or with surfgeo installed):
+    PYTHONPATH=. python benchmarks/bench_contention.py [--events 20000]
+"""
+
+import argparse
+import queue
+import threading
+import time
+
+from surfgeo.buffer import ShardedBuffer
+from surfgeo.event import Event
+
+
+EVENT = Event.from_payload(
+    {'path': '/page', 'method': 'GET', 'status_code': 200, 'user_agent': 'GPTBot/1.0'}
+)
+THREAD_COUNTS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def run_threads(count: int, events: int, enqueue) -> float:
+    """Wall-clock nanoseconds per enqueue, all threads together"""
+    barrier = threading.Barrier(count + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(events):
+            enqueue(EVENT)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter_ns()
+    for thread in threads:
+        thread.join()
+    return (time.perf_counter_ns() - started) / (count * events)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=20000, help='events per thread')
+    args = parser.parse_args()
+
+    print(f'{"threads":>7} {"sharded ns/op":>14} {"queue.Queue ns/op":>18}')
+    for count in THREAD_COUNTS:
+        buffer = ShardedBuffer(args.events)
+        sharded = run_threads(count, args.events, buffer.append)
+
+        shared = queue.Queue()
+        baseline = run_threads(count, args.events, shared.put)
+
+        print(f'{count:>7} {sharded:>14.0f} {baseline:>18.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Memory held by buffered events
+
+Buffers N tracked requests the way batch delivery does and reports the
+bytes allocated per event, for the old per-request payload dicts
+(build_payload) and the slotted Event records middleware now create
+(build_event). Paths and user agents are drawn from a small set, as in
+real traffic, so interning applies.
+
+Usage (from the repository root, or with surfgeo installed):
+    PYTHONPATH=. python benchmarks/bench_event_memory.py [--events 50000]
+"""
+
+import argparse
+import tracemalloc
+
+from surfgeo.payload import build_event, build_payload
+
+
+PATHS = [f'/blog/post-{i}' for i in range(50)]
+USER_AGENTS = ['GPTBot/1.0', 'ClaudeBot/1.0', 'PerplexityBot/1.0', 'Mozilla/5.0']
+
+
+def measure(events: int, build) -> float:
+    """Bytes allocated per retained event"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    retained = [
+        build(PATHS[i % len(PATHS)], USER_AGENTS[i % len(USER_AGENTS)])
+        for i in range(events)
+    ]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del retained
+    return (after - before) / events
+
+
+def as_dict(path: str, user_agent: str):
+    return build_payload(
+        {
+            'path': path,
+            'method': 'GET',
+            'headers': {'User-Agent': user_agent},
+            'status_code': 200,
+            'response_bytes': 512,
+            'duration_ms': 1.25,
+        }
+    )
+
+
+def as_event(path: str, user_agent: str):
+    return build_event(path, 'GET', {'User-Agent': user_agent}, 200, 512, 1.25)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=50000, help='events to buffer')
+    args = parser.parse_args()
+
+    dict_bytes = measure(args.events, as_dict)
+    event_bytes = measure(args.events, as_event)
+    print(f'{"record":>8} {"bytes/event":>12}')
+    print(f'{"dict":>8} {dict_bytes:>12.0f}')
+    print(f'{"Event":>8} {event_bytes:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Cold-start cost of importing surfgeo and creating each transport
+
+Every measurement runs in a fresh interpreter. Reports wall time and
+peak traced allocation for `import surfgeo` plus transport creation.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 10]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+PROBE = '''
+import json, sys, time, tracemalloc
+tracemalloc.start()
+started = time.perf_counter()
+import surfgeo
+from surfgeo.transport import create_transport
+name = sys.argv[1]
+if name != 'none':
+    create_transport(name, 'https://api.surfgeo.com/api/track')
+elapsed = time.perf_counter() - started
+_, peak = tracemalloc.get_traced_memory()
+print(json.dumps({'seconds': elapsed, 'peak_bytes': peak,
+                  'requests': 'requests' in sys.modules,
+                  'httpx': 'httpx' in sys.modules}))
+'''
+
+
+def measure(name: str, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', PROBE, name], text=True)
+        samples.append(json.loads(output))
+    return {
+        'ms': statistics.median(s['seconds'] for s in samples) * 1000,
+        'peak_kib': statistics.median(s['peak_bytes'] for s in samples) / 1024,
+        'requests': samples[0]['requests'],
+        'httpx': samples[0]['httpx'],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f'{"transport":<12} {"median ms":>10} {"peak KiB":>10}  imports')
+    for name in ('none', 'memory', 'http.client', 'requests', 'httpx'):
+        result = measure(name, args.runs)
+        imported = [lib for lib in ('requests', 'httpx') if result[lib]] or ['-']
+        print(
+            f'{name:<12} {result["ms"]:>10.1f} {result["peak_kib"]:>10.0f}  '
+            f'{", ".join(imported)}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -53,6 +53,11 @@ setup(
             "fastapi>=0.95.0",
         ],
     },
+    entry_points={
+        "console_scripts": [
+            "surfgeo=surfgeo.cli:main",
+        ],
+    },
     keywords="surfgeo ai bot tracking analytics llm chatgpt perplexity claude middleware django flask fastapi",
 )
 
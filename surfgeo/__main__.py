@@ -0,0 +1,4 @@
+import sys
+from surfgeo.cli import main
+
+sys.exit(main())
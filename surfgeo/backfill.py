@@ -0,0 +1,317 @@
+"""
+Access-log backfill
+
+Turns nginx/gunicorn access logs in the combined format into tracking
+events with their original timestamps, so a new site starts with its
+historical (AI-bot) traffic:
+
+    203.0.113.9 - - [10/Oct/2024:13:55:36 +0000] "GET /docs?page=2 HTTP/1.1"
+        200 5120 "-" "GPTBot/1.2"
+
+(one line per request; wrapped here)
+
+Logs are streamed in chunks of complete lines parsed on a process
+pool: plain files are split by byte offset and read by the workers
+themselves, gzip files and stdin are read by the parent and shipped to
+workers chunk by chunk. Only a bounded window of chunks is in flight,
+so memory stays flat whatever the log size. Events go out through
+surfgeo.cli.Replayer: gzip-compressed batches over keep-alive
+connections, at a bounded rate. The sink only queues batches for the
+sender threads, so sending overlaps with the workers parsing ahead.
+
+Usage:
+    surfgeo backfill /var/log/nginx/access.log* --script-key sk_... \
+        --bots-only --processes 8
+
+    from surfgeo.backfill import BackfillOptions, backfill
+"""
+
+import calendar
+import multiprocessing
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.pool import AsyncResult
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from surfgeo.payload import build_payload
+from surfgeo.spool import open_lines
+from surfgeo.types import TrackingPayload
+from surfgeo.transport import dumps
+from surfgeo.verify import classify_user_agent, compile_bot_verifier
+
+
+CHUNK_BYTES = 16 * 1024 * 1024
+
+# host ident user [time] "request" status bytes "referer" "user-agent"
+COMBINED = re.compile(
+    rb'^(\S+) \S+ \S+ \[([^\]]+)\] "((?:[^"\\]|\\.)*)" (\d{3}) (\d+|-)'
+    rb'(?: "((?:[^"\\]|\\.)*)" "((?:[^"\\]|\\.)*)")?'
+)
+
+MONTHS = {
+    name: index
+    for index, name in enumerate(
+        (
+            'Jan',
+            'Feb',
+            'Mar',
+            'Apr',
+            'May',
+            'Jun',
+            'Jul',
+            'Aug',
+            'Sep',
+            'Oct',
+            'Nov',
+            'Dec',
+        ),
+        1,
+    )
+}
+
+
+@dataclass
+class BackfillOptions:
+    """What to keep and how events are labelled"""
+    script_key: str
+    bots_only: bool = False
+    bot_ranges: Optional[Any] = None
+    chunk_bytes: int = CHUNK_BYTES
+
+
+def parse_time(value: str) -> int:
+    """'10/Oct/2024:13:55:36 +0200' -> Unix timestamp"""
+    day, month, year = value[0:2], value[3:6], value[7:11]
+    seconds = calendar.timegm(
+        (
+            int(year),
+            MONTHS[month],
+            int(day),
+            int(value[12:14]),
+            int(value[15:17]),
+            int(value[18:20]),
+        )
+    )
+    offset = value[21:26]
+    if offset:
+        minutes = int(offset[1:3]) * 60 + int(offset[3:5])
+        seconds -= minutes * 60 if offset[0] == '+' else -minutes * 60
+    return seconds
+
+
+def _text(value: Optional[bytes]) -> Optional[str]:
+    if not value or value == b'-':
+        return None
+    return value.decode('utf-8', 'replace')
+
+
+class LineParser:
+    """
+    Parses log lines into payloads
+
+    The timestamp of the previous line is reused while it repeats (logs
+    are written in order), and the bot classifier and verifier memoize
+    per user agent and IP.
+    """
+
+    def __init__(self, options: BackfillOptions):
+        self.options = options
+        self.verifier = compile_bot_verifier(options.bot_ranges)
+        self.counts = {'lines': 0, 'malformed': 0, 'filtered': 0, 'events': 0}
+        self._time_text: Optional[bytes] = None
+        self._time = 0
+
+    def parse(self, line: bytes) -> Optional[TrackingPayload]:
+        """Payload for one log line, or None (malformed or filtered)"""
+        counts = self.counts
+        counts['lines'] += 1
+        match = COMBINED.match(line)
+        request = match.group(3).split(b' ') if match else []
+        if match is None or len(request) < 2:
+            counts['malformed'] += 1
+            return None
+
+        user_agent = _text(match.group(7)) or ''
+        family = classify_user_agent(user_agent)
+        if family is None and self.options.bots_only:
+            counts['filtered'] += 1
+            return None
+
+        time_text = match.group(2)
+        if time_text != self._time_text:
+            try:
+                self._time = parse_time(time_text.decode('ascii'))
+            except (KeyError, ValueError, UnicodeDecodeError):
+                counts['malformed'] += 1
+                return None
+            self._time_text = time_text
+
+        size = match.group(5)
+        headers: Dict[str, Union[str, list]] = {'User-Agent': user_agent}
+        referrer = _text(match.group(6))
+        if referrer is not None:
+            headers['Referer'] = referrer
+        payload = build_payload({
+            'path': request[1].decode('utf-8', 'replace'),
+            'method': request[0].decode('ascii', 'replace'),
+            'headers': headers,
+            'status_code': int(match.group(4)),
+            'response_bytes': int(size) if size != b'-' else None,
+        })
+        payload['timestamp'] = self._time
+        payload['script_key'] = self.options.script_key
+        payload['source'] = 'server'
+
+        if family is not None and self.verifier is not None:
+            verdict = self.verifier.verify(
+                family, match.group(1).decode('ascii', 'replace')
+            )
+            if verdict is not None:
+                payload['bot_family'] = family
+                payload['bot_verification'] = 'verified' if verdict else 'spoofed'
+
+        counts['events'] += 1
+        return payload
+
+    def parse_lines(self, lines: Iterable[bytes]) -> List[bytes]:
+        """Encoded NDJSON event lines for a chunk"""
+        encoded = []
+        for line in lines:
+            line = line.rstrip(b'\r\n')
+            if not line:
+                continue
+            payload = self.parse(line)
+            if payload is not None:
+                encoded.append(dumps(payload))
+        return encoded
+
+
+def file_chunks(path: str, chunk_bytes: int) -> List[Tuple[str, int, int]]:
+    """
+    Byte ranges of a plain file, (path, start, end)
+
+    A line belongs to the chunk it starts in; readers skip the partial
+    line at the start of their range and finish the one crossing its end.
+    """
+    size = os.path.getsize(path)
+    return [
+        (path, start, min(start + chunk_bytes, size))
+        for start in range(0, size, chunk_bytes)
+    ]
+
+
+def read_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Lines starting within [start, end) of a plain file"""
+    with open(path, 'rb') as f:
+        if start:
+            f.seek(start - 1)
+            # Finishes the previous chunk's line (or just its newline)
+            f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line
+
+
+def stream_chunks(path: str, chunk_bytes: int) -> Iterator[bytes]:
+    """Whole-line blocks of about chunk_bytes from a gzip file or stdin"""
+    stream = open_lines(path)
+    try:
+        while True:
+            block = stream.read(chunk_bytes)
+            if not block:
+                return
+            # Complete the last line
+            yield block + stream.readline()
+    finally:
+        if path != '-':
+            stream.close()
+
+
+# Per-process parser, set up by _init_worker
+_parser: Optional[LineParser] = None
+
+
+def _init_worker(options: BackfillOptions) -> None:
+    global _parser
+    _parser = LineParser(options)
+
+
+def _parse_task(task: Tuple) -> Tuple[List[bytes], Dict[str, int]]:
+    """Parse one chunk: (path, start, end) or (data,)"""
+    parser = _parser
+    assert parser is not None, '_init_worker has not run'
+    before = dict(parser.counts)
+    if len(task) == 3:
+        lines = parser.parse_lines(read_range(*task))
+    else:
+        lines = parser.parse_lines(task[0].splitlines())
+    return lines, {key: value - before[key] for key, value in parser.counts.items()}
+
+
+def tasks(paths: Iterable[str], chunk_bytes: int) -> Iterator[Tuple]:
+    """Parse tasks for all inputs, in order"""
+    for path in paths:
+        if path == '-' or path.endswith('.gz'):
+            for block in stream_chunks(path, chunk_bytes):
+                yield (block,)
+        else:
+            yield from file_chunks(path, chunk_bytes)
+
+
+def backfill(
+    paths: Iterable[str],
+    options: BackfillOptions,
+    sink: Callable[[List[bytes]], Any],
+    processes: int = 1,
+) -> Dict[str, int]:
+    """
+    Parse logs and hand each chunk's NDJSON event lines to sink, in order
+
+    With processes > 1 chunks are parsed on a spawn-context pool, with
+    at most two chunks per process in flight; the pool keeps parsing
+    while sink runs on the calling thread.
+
+    Returns:
+        Counts of lines, malformed, filtered and events
+    """
+    totals = {'lines': 0, 'malformed': 0, 'filtered': 0, 'events': 0}
+
+    def consume(result: Tuple[List[bytes], Dict[str, int]]) -> None:
+        lines, counts = result
+        for key, value in counts.items():
+            totals[key] += value
+        if lines:
+            sink(lines)
+
+    if processes <= 1:
+        _init_worker(options)
+        for task in tasks(paths, options.chunk_bytes):
+            consume(_parse_task(task))
+        return totals
+
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes, initializer=_init_worker, initargs=(options,)) as pool:
+        pending: Deque[AsyncResult] = deque()
+        for task in tasks(paths, options.chunk_bytes):
+            pending.append(pool.apply_async(_parse_task, (task,)))
+            if len(pending) >= processes * 2:
+                consume(pending.popleft().get())
+        while pending:
+            consume(pending.popleft().get())
+    return totals
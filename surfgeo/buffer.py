@@ -0,0 +1,91 @@
+import threading
+from collections import deque
+from typing import Any, Deque, List
+
+
+class _Shard:
+    """One thread's events; appended by its owner, drained by the harvester"""
+
+    __slots__ = ('events', 'dropped', 'thread')
+
+    def __init__(self, thread: threading.Thread):
+        self.events: Deque[Any] = deque()
+        self.dropped = 0
+        self.thread = thread
+
+
+class ShardedBuffer:
+    """
+    Per-thread event buffers
+
+    Each thread appends to its own deque, so the enqueue path takes no
+    shared lock: deque.append/popleft are atomic, and only the owner
+    thread and the harvester ever touch a shard. The registry lock is
+    taken once per thread, when its shard is created, and by harvest().
+
+    Args:
+        max_events: Per-shard cap; events beyond it are dropped
+    """
+
+    def __init__(self, max_events: int):
+        self.max_events = max_events
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._lock = threading.Lock()
+        self._retired_dropped = 0
+
+    def append(self, event: Any) -> bool:
+        """
+        Add an event from the calling thread
+
+        Returns:
+            False if the shard was full and the event was dropped
+        """
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._register()
+        events = shard.events
+        if len(events) >= self.max_events:
+            shard.dropped += 1
+            return False
+        events.append(event)
+        return True
+
+    def harvest(self) -> list:
+        """Remove and return all buffered events, pruning dead threads' shards"""
+        harvested = []
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            events = shard.events
+            popleft = events.popleft
+            for _ in range(len(events)):
+                harvested.append(popleft())
+            if not shard.thread.is_alive() and not events:
+                with self._lock:
+                    self._shards.remove(shard)
+                    self._retired_dropped += shard.dropped
+        return harvested
+
+    def __len__(self) -> int:
+        """Approximate number of buffered events"""
+        with self._lock:
+            return sum(len(shard.events) for shard in self._shards)
+
+    @property
+    def dropped(self) -> int:
+        """Events dropped because a shard was full"""
+        with self._lock:
+            return self._retired_dropped + sum(shard.dropped for shard in self._shards)
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._shards)
+
+    def _register(self) -> _Shard:
+        shard = _Shard(threading.current_thread())
+        with self._lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
@@ -0,0 +1,668 @@
+"""
+surfgeo command line tool
+
+Works on spool directories (see surfgeo.spool) and NDJSON files, plain
+or gzip-compressed ('-' reads stdin).
+
+Usage:
+    surfgeo stats /var/spool/surfgeo
+    surfgeo export /var/spool/surfgeo -o backlog.ndjson.gz
+    surfgeo replay /var/spool/surfgeo --connections 8 --rate 5000 --delete
+    surfgeo loadgen --rate 20000 --duration 10 --processes 4
+    surfgeo backfill /var/log/nginx/access.log* --script-key sk_... --bots-only
+
+Replay never decodes events: spooled lines are already JSON, so batch
+bodies are built by joining lines and gzip-compressed on the sender
+threads (zlib releases the GIL), keeping a large backlog I/O-bound.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import (
+    Any, BinaryIO, Callable, Deque, Dict, Iterable, List, Optional, Sequence, cast
+)
+from surfgeo import __version__
+from surfgeo.client import DEFAULT_ENDPOINT
+from surfgeo.spool import expand_paths, iter_lines
+from surfgeo.transport import HTTPClientTransport
+
+
+SCRIPT_KEY_FIELD = b'"script_key":"'
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CONNECTIONS = 4
+WRITE_BUFFER = 1024 * 1024
+
+
+def script_key_of(line: bytes) -> Optional[bytes]:
+    """
+    Script key of an NDJSON event line without decoding it
+
+    Spooled lines are compact JSON, so a byte search finds the field;
+    other layouts fall back to json.loads.
+    """
+    start = line.find(SCRIPT_KEY_FIELD)
+    if start != -1:
+        start += len(SCRIPT_KEY_FIELD)
+        end = line.find(b'"', start)
+        if end != -1:
+            return line[start:end]
+    try:
+        script_key = json.loads(line).get('script_key')
+    except (ValueError, AttributeError):
+        return None
+    return script_key.encode('utf-8') if isinstance(script_key, str) else None
+
+
+def is_event_line(line: bytes) -> bool:
+    """Cheap shape check: skips truncated lines left by a crash"""
+    return line[:1] == b'{' and line[-1:] == b'}'
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the replay producer
+
+    Args:
+        rate: Events per second (None or 0 = unlimited)
+    """
+
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+
+    def acquire(self, count: int) -> None:
+        """Block until count events may be sent"""
+        if not self.rate:
+            return
+        # Burst capacity of one second, or one batch if larger
+        capacity = max(self.rate, count)
+        while True:
+            now = time.monotonic()
+            self._tokens = min(
+                capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= count:
+                self._tokens -= count
+                return
+            time.sleep((count - self._tokens) / self.rate)
+
+
+class Replayer:
+    """
+    Re-send NDJSON events in compressed batches over parallel connections
+
+    Each sender thread owns one keep-alive http.client connection. At
+    most two batches per connection are in flight, so memory stays
+    constant however large the backlog is. Batches hold a single
+    script key.
+    """
+
+    def __init__(self, endpoint: str, connections: int = DEFAULT_CONNECTIONS,
+                 batch_size: int = DEFAULT_BATCH_SIZE, rate: Optional[float] = None,
+                 timeout: float = 10.0, retries: int = 2, compress_level: int = 1,
+                 failed: Optional[BinaryIO] = None):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.retries = retries
+        self.compress_level = compress_level
+        self.failed_file = failed
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.bytes_sent = 0
+        self._limiter = RateLimiter(rate)
+        self._local = threading.local()
+        self._transports: List[HTTPClientTransport] = []
+        self._executor = ThreadPoolExecutor(
+            max_workers=connections, thread_name_prefix='surfgeo-replay'
+        )
+        self._in_flight = threading.BoundedSemaphore(connections * 2)
+        self._lock = threading.Lock()
+        self._pending: Dict[Optional[bytes], List[bytes]] = {}
+        self._futures: Deque[Future] = deque()
+        self._delivered = True
+
+    def replay_file(self, path: str) -> bool:
+        """
+        Replay one file
+
+        Returns:
+            True if every batch from the file was delivered
+        """
+        return self.replay_lines(iter_lines(path))
+
+    def replay_lines(self, lines: Iterable[bytes]) -> bool:
+        """
+        Replay NDJSON event lines and wait for them to be sent
+
+        Returns:
+            True if every batch was delivered
+        """
+        self.submit_lines(lines)
+        return self.wait()
+
+    def submit_lines(self, lines: Iterable[bytes]) -> None:
+        """
+        Queue NDJSON event lines without waiting for delivery
+
+        Full batches go to the senders right away (blocking only while
+        the in-flight limit or rate is reached); partial batches carry
+        over to the next call and are sent by wait().
+        """
+        pending = self._pending
+        futures = self._futures
+        for line in lines:
+            if not is_event_line(line):
+                self.skipped += 1
+                continue
+            key = script_key_of(line)
+            batch = pending.get(key)
+            if batch is None:
+                batch = pending[key] = []
+            batch.append(line)
+            if len(batch) >= self.batch_size:
+                futures.append(self._submit(batch))
+                del pending[key]
+                # Drop finished batches so a long input keeps memory flat
+                while futures and futures[0].done():
+                    self._delivered = futures.popleft().result() and self._delivered
+
+    def wait(self) -> bool:
+        """
+        Send partial batches and wait for everything submitted
+
+        Returns:
+            True if every batch since the last wait() was delivered
+        """
+        futures = self._futures
+        for batch in self._pending.values():
+            futures.append(self._submit(batch))
+        self._pending = {}
+        delivered = all([future.result() for future in futures]) and self._delivered
+        futures.clear()
+        self._delivered = True
+        return delivered
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for transport in self._transports:
+            transport.close()
+
+    def _submit(self, lines: List[bytes]) -> Future:
+        self._limiter.acquire(len(lines))
+        self._in_flight.acquire()
+        future = self._executor.submit(self._send, lines)
+        future.add_done_callback(lambda _: self._in_flight.release())
+        return future
+
+    def _transport(self) -> HTTPClientTransport:
+        transport = getattr(self._local, 'transport', None)
+        if transport is None:
+            transport = HTTPClientTransport(
+                self.endpoint, pool_size=1, check_status=True
+            )
+            self._local.transport = transport
+            with self._lock:
+                self._transports.append(transport)
+        return transport
+
+    def _send(self, lines: List[bytes]) -> bool:
+        """Send one batch with retries; runs on a sender thread"""
+        body = gzip.compress(
+            b'{"events":[' + b','.join(lines) + b']}', self.compress_level
+        )
+        transport = self._transport()
+        headers = {'Content-Encoding': 'gzip'}
+
+        for attempt in range(self.retries + 1):
+            try:
+                transport.post(transport.batch_endpoint, body, self.timeout, headers)
+            except Exception as e:
+                if attempt < self.retries:
+                    time.sleep(0.5 * 2 ** attempt)
+                    continue
+                print(
+                    f'[surfgeo] Batch of {len(lines)} events failed: {e}',
+                    file=sys.stderr,
+                )
+                with self._lock:
+                    self.failed += len(lines)
+                    if self.failed_file is not None:
+                        self.failed_file.write(b'\n'.join(lines) + b'\n')
+                return False
+            with self._lock:
+                self.sent += len(lines)
+                self.bytes_sent += len(body)
+            return True
+        return False
+
+
+def format_timestamp(timestamp: Optional[int]) -> str:
+    if timestamp is None:
+        return '-'
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        '%Y-%m-%d %H:%M:%S UTC'
+    )
+
+
+def stats(paths: Sequence[str]) -> Dict:
+    """Summarize events in spool segments or NDJSON files (streamed)"""
+    summary: Dict[str, Any] = {'files': len(paths), 'bytes': 0, 'events': 0,
+                               'malformed': 0, 'first_seen': None, 'last_seen': None}
+    keys: Counter = Counter()
+    statuses: Counter = Counter()
+
+    for path in paths:
+        if path != '-':
+            summary['bytes'] += os.path.getsize(path)
+        for line in iter_lines(path):
+            try:
+                event = json.loads(line)
+                timestamp = event.get('first_seen') or event.get('timestamp')
+                last = event.get('last_seen') or timestamp
+            except (ValueError, AttributeError):
+                summary['malformed'] += 1
+                continue
+            count = event.get('count') or 1
+            summary['events'] += count
+            keys[event.get('script_key')] += count
+            statuses[event.get('status_code')] += count
+            if isinstance(timestamp, int):
+                if summary['first_seen'] is None or timestamp < summary['first_seen']:
+                    summary['first_seen'] = timestamp
+            if isinstance(last, int):
+                if summary['last_seen'] is None or last > summary['last_seen']:
+                    summary['last_seen'] = last
+
+    summary['script_keys'] = dict(keys.most_common())
+    summary['status_codes'] = {
+        str(status): count for status, count in statuses.most_common()
+    }
+    return summary
+
+
+def open_output(path: str) -> BinaryIO:
+    """Open an output file ('-' for stdout), compressing .gz files"""
+    if path == '-':
+        return sys.stdout.buffer
+    if path.endswith('.gz'):
+        return cast(BinaryIO, gzip.open(path, 'wb', compresslevel=6))
+    return open(path, 'wb', buffering=WRITE_BUFFER)
+
+
+def export(
+    paths: Sequence[str], output: BinaryIO, script_key: Optional[str] = None
+) -> int:
+    """
+    Stream events to NDJSON in constant memory
+
+    Returns:
+        Number of lines written
+    """
+    wanted = script_key.encode('utf-8') if script_key else None
+    written = 0
+    for path in paths:
+        for line in iter_lines(path):
+            if not is_event_line(line):
+                continue
+            if wanted is not None and script_key_of(line) != wanted:
+                continue
+            output.write(line + b'\n')
+            written += 1
+    return written
+
+
+def replay(
+    paths: Sequence[str], replayer: Replayer, delete: Iterable[str] = ()
+) -> None:
+    """Replay files in order; files listed in delete are removed once fully sent"""
+    delete = set(delete)
+    try:
+        for path in paths:
+            if replayer.replay_file(path) and path in delete:
+                os.remove(path)
+    finally:
+        replayer.close()
+
+
+def _cmd_stats(args: argparse.Namespace) -> int:
+    summary = stats(expand_paths(args.paths, include_active=True))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    print(f'files        {summary["files"]}')
+    print(f'bytes        {summary["bytes"]}')
+    print(f'events       {summary["events"]}')
+    print(f'malformed    {summary["malformed"]}')
+    print(f'first seen   {format_timestamp(summary["first_seen"])}')
+    print(f'last seen    {format_timestamp(summary["last_seen"])}')
+    print('script keys')
+    for key, count in summary['script_keys'].items():
+        print(f'  {key}  {count}')
+    print('status codes')
+    for status, count in summary['status_codes'].items():
+        print(f'  {status}  {count}')
+    return 0
+
+
+def _cmd_export(args: argparse.Namespace) -> int:
+    output = open_output(args.output)
+    try:
+        written = export(
+            expand_paths(args.paths, args.include_active), output, args.script_key
+        )
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        else:
+            output.flush()
+    print(f'[surfgeo] Exported {written} events', file=sys.stderr)
+    return 0
+
+
+def _cmd_replay(args: argparse.Namespace) -> int:
+    paths = expand_paths(args.paths, args.include_active)
+    # Only sealed segments found in spool directories are ever deleted
+    deletable = set()
+    if args.delete:
+        for path in args.paths:
+            if os.path.isdir(path):
+                deletable.update(expand_paths([path]))
+
+    failed = open(args.failed, 'ab') if args.failed else None
+    replayer = Replayer(
+        args.endpoint,
+        connections=args.connections,
+        batch_size=args.batch_size,
+        rate=args.rate,
+        timeout=args.timeout,
+        retries=args.retries,
+        failed=failed
+    )
+    started = time.monotonic()
+    try:
+        replay(paths, replayer, deletable)
+    finally:
+        if failed is not None:
+            failed.close()
+    elapsed = max(time.monotonic() - started, 1e-9)
+
+    print(
+        f'[surfgeo] Replayed {replayer.sent} events in {elapsed:.1f}s '
+        f'({replayer.sent / elapsed:.0f} events/s, '
+        f'{replayer.bytes_sent / elapsed / 1e6:.1f} MB/s compressed); '
+        f'{replayer.failed} failed, {replayer.skipped} skipped',
+        file=sys.stderr,
+    )
+    return 1 if replayer.failed else 0
+
+
+def _cmd_loadgen(args: argparse.Namespace) -> int:
+    from surfgeo.loadgen import LoadConfig, format_report, run
+
+    report = run(LoadConfig(
+        rate=args.rate,
+        duration=args.duration,
+        processes=args.processes,
+        target=args.target,
+        seed=args.seed,
+        pages=args.pages,
+        endpoint=args.endpoint,
+        delivery=args.delivery,
+        transport=args.transport,
+        flush_interval=args.flush_interval,
+        coalesce_window=args.coalesce_window
+    ))
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+def _cmd_backfill(args: argparse.Namespace) -> int:
+    from surfgeo.backfill import BackfillOptions, backfill
+
+    options = BackfillOptions(
+        script_key=args.script_key,
+        bots_only=args.bots_only,
+        bot_ranges=args.bot_ranges,
+        chunk_bytes=int(args.chunk_size * 1024 * 1024)
+    )
+    started = time.monotonic()
+
+    if args.output:
+        output = open_output(args.output)
+        try:
+            counts = backfill(
+                args.paths,
+                options,
+                lambda lines: output.write(b'\n'.join(lines) + b'\n'),
+                args.processes,
+            )
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+            else:
+                output.flush()
+        failed = 0
+    else:
+        failed_file = open(args.failed, 'ab') if args.failed else None
+        replayer = Replayer(
+            args.endpoint,
+            connections=args.connections,
+            batch_size=args.batch_size,
+            rate=args.rate,
+            timeout=args.timeout,
+            retries=args.retries,
+            failed=failed_file
+        )
+        try:
+            # Batches are sent while the pool parses the next chunks
+            counts = backfill(
+                args.paths, options, replayer.submit_lines, args.processes
+            )
+            replayer.wait()
+        finally:
+            replayer.close()
+            if failed_file is not None:
+                failed_file.close()
+        failed = replayer.failed
+    elapsed = max(time.monotonic() - started, 1e-9)
+
+    print(
+        f'[surfgeo] Backfilled {counts["events"]} events from {counts["lines"]} '
+        f'lines in {elapsed:.1f}s ({counts["lines"] / elapsed:.0f} lines/s); '
+        f'{counts["filtered"]} filtered, {counts["malformed"]} malformed, '
+        f'{failed} failed',
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='surfgeo', description='surfgeo spool, replay, load and backfill tools'
+    )
+    parser.add_argument(
+        '--version', action='version', version=f'%(prog)s {__version__}'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parser_stats = commands.add_parser('stats', help='summarize spooled events')
+    parser_stats.add_argument(
+        'paths', nargs='+', help='spool directories or NDJSON files'
+    )
+    parser_stats.add_argument(
+        '--json', action='store_true', help='print the summary as JSON'
+    )
+    parser_stats.set_defaults(handler=_cmd_stats)
+
+    parser_export = commands.add_parser('export', help='stream events to NDJSON')
+    parser_export.add_argument(
+        'paths', nargs='+', help='spool directories or NDJSON files'
+    )
+    parser_export.add_argument(
+        '-o',
+        '--output',
+        default='-',
+        help='output file (.gz compresses, default stdout)',
+    )
+    parser_export.add_argument(
+        '--script-key', help='only export events for this script key'
+    )
+    parser_export.add_argument(
+        '--include-active',
+        action='store_true',
+        help='also read .active segments (e.g. left by a crashed process)',
+    )
+    parser_export.set_defaults(handler=_cmd_export)
+
+    parser_replay = commands.add_parser(
+        'replay', help='re-send events in compressed batches'
+    )
+    parser_replay.add_argument(
+        'paths', nargs='+', help='spool directories or NDJSON files'
+    )
+    parser_replay.add_argument(
+        '--endpoint', default=DEFAULT_ENDPOINT, help='tracking endpoint'
+    )
+    parser_replay.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS,
+                               help='parallel connections')
+    parser_replay.add_argument(
+        '--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='events per batch'
+    )
+    parser_replay.add_argument('--rate', type=float, help='maximum events per second')
+    parser_replay.add_argument(
+        '--timeout', type=float, default=10.0, help='per-request timeout (seconds)'
+    )
+    parser_replay.add_argument(
+        '--retries', type=int, default=2, help='retries per failed batch'
+    )
+    parser_replay.add_argument(
+        '--failed', help='append events that could not be sent to this NDJSON file'
+    )
+    parser_replay.add_argument(
+        '--delete',
+        action='store_true',
+        help='delete spool segments once all their events are sent',
+    )
+    parser_replay.add_argument('--include-active', action='store_true',
+                               help='also read .active segments (never deleted)')
+    parser_replay.set_defaults(handler=_cmd_replay)
+
+    parser_loadgen = commands.add_parser(
+        'loadgen', help='drive synthetic AI-bot traffic through the SDK'
+    )
+    parser_loadgen.add_argument(
+        '--rate', type=float, default=10000, help='requests per second (all processes)'
+    )
+    parser_loadgen.add_argument('--duration', type=float, default=10, help='seconds')
+    parser_loadgen.add_argument(
+        '--processes', type=int, default=1, help='worker processes'
+    )
+    parser_loadgen.add_argument(
+        '--target',
+        choices=('client', 'wsgi', 'asgi'),
+        default='wsgi',
+        help='entry point driven per request',
+    )
+    parser_loadgen.add_argument(
+        '--seed', type=int, default=1, help='traffic seed (worker i uses seed + i)'
+    )
+    parser_loadgen.add_argument(
+        '--pages', type=int, default=2000, help='distinct page paths'
+    )
+    parser_loadgen.add_argument(
+        '--endpoint', help='send to this endpoint instead of a local fake collector'
+    )
+    parser_loadgen.add_argument(
+        '--delivery', choices=('thread', 'batch'), default='batch', help='delivery mode'
+    )
+    parser_loadgen.add_argument(
+        '--transport', default='http.client', help='transport name'
+    )
+    parser_loadgen.add_argument(
+        '--flush-interval',
+        type=float,
+        default=1.0,
+        help='batch flush interval (seconds)',
+    )
+    parser_loadgen.add_argument(
+        '--coalesce-window', type=float, help='coalescing window (seconds)'
+    )
+    parser_loadgen.add_argument(
+        '--json', action='store_true', help='print the report as JSON'
+    )
+    parser_loadgen.set_defaults(handler=_cmd_loadgen)
+
+    parser_backfill = commands.add_parser(
+        'backfill', help='import historical traffic from access logs'
+    )
+    parser_backfill.add_argument(
+        'paths', nargs='+', help='combined-format access logs (.gz or - for stdin)'
+    )
+    parser_backfill.add_argument(
+        '--script-key', required=True, help='script key for the imported events'
+    )
+    parser_backfill.add_argument(
+        '--bots-only', action='store_true', help='only import known bot user agents'
+    )
+    parser_backfill.add_argument(
+        '--bot-ranges', help='JSON file of bot IP ranges; tags events verified/spoofed'
+    )
+    parser_backfill.add_argument(
+        '--processes', type=int, default=os.cpu_count() or 1, help='parser processes'
+    )
+    parser_backfill.add_argument(
+        '--chunk-size', type=float, default=16, help='chunk size per parse task (MB)'
+    )
+    parser_backfill.add_argument(
+        '-o', '--output', help='write NDJSON here (.gz compresses) instead of sending'
+    )
+    parser_backfill.add_argument(
+        '--endpoint', default=DEFAULT_ENDPOINT, help='tracking endpoint'
+    )
+    parser_backfill.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS,
+                                 help='parallel connections')
+    parser_backfill.add_argument(
+        '--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='events per batch'
+    )
+    parser_backfill.add_argument('--rate', type=float, help='maximum events per second')
+    parser_backfill.add_argument(
+        '--timeout', type=float, default=10.0, help='per-request timeout (seconds)'
+    )
+    parser_backfill.add_argument(
+        '--retries', type=int, default=2, help='retries per failed batch'
+    )
+    parser_backfill.add_argument(
+        '--failed', help='append events that could not be sent to this NDJSON file'
+    )
+    parser_backfill.set_defaults(handler=_cmd_backfill)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    handler: Callable[[argparse.Namespace], int] = args.handler
+    try:
+        return handler(args)
+    except BrokenPipeError:
+        # Output piped into e.g. `head`
+        return 0
+    except (FileNotFoundError, IsADirectoryError, PermissionError) as e:
+        print(f'surfgeo: {e}', file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,35 @@
 import threading
 import asyncio
-from typing import Dict, Optional
-import requests
-import httpx
-from surfgeo.types import surfgeoConfig, TrackingPayload
+import os
+import time
+import weakref
+from dataclasses import replace
+from typing import Dict, List, Optional, Union
+from surfgeo.buffer import ShardedBuffer
+from surfgeo.coalesce import Coalescer
+from surfgeo.green import GreenDelivery, cooperative_runtime
+from surfgeo.latency import AdaptiveTimeout
+from surfgeo.matcher import compile_path_filter
+from surfgeo.sites import compile_site_map
+from surfgeo.spool import Spool
+from surfgeo.transport import TRANSPORTS, Transport, create_transport
+from surfgeo.event import Event
+from surfgeo.headers import compile_header_allowlist
+from surfgeo.verify import classify_user_agent, compile_bot_verifier
+from surfgeo.types import surfgeoConfig
 
 # Default production endpoint
 DEFAULT_ENDPOINT = 'https://api.surfgeo.com/api/track'
 DEFAULT_TIMEOUT = 0.05  # 50ms
 MAX_TIMEOUT = 0.1  # 100ms
 MIN_TIMEOUT = 0.01  # 10ms
+MAX_ADAPTIVE_TIMEOUT = 1.0  # upper bound for timeout_max
+PREWARM_TIMEOUT = 5.0  # connect + TLS budget for background prewarming
+
+# Delivery modes: one sender thread per event, per-thread buffers
+# harvested into batches by a background thread, or a greenlet pool
+# draining a gevent/eventlet queue (surfgeo.green)
+DELIVERY_MODES = ('thread', 'batch', 'green')
 
 
 class surfgeoClient:
@@ -29,143 +49,621 @@ class surfgeoClient:
         self._validate_config(config)
 
         # Set defaults
-        self.config = surfgeoConfig(
-            script_key=config.script_key,
+        self.config = replace(
+            config,
             endpoint=config.endpoint or DEFAULT_ENDPOINT,
-            timeout=max(MIN_TIMEOUT, min(config.timeout, MAX_TIMEOUT)),
-            debug=config.debug,
-            enabled=config.enabled
+            timeout=max(MIN_TIMEOUT, min(config.timeout, MAX_TIMEOUT))
         )
 
         self.endpoint = self.config.endpoint
 
+        # Compiled include/exclude rules (None = track every path)
+        self._path_filter = compile_path_filter(
+            self.config.include, self.config.exclude
+        )
+
+        # Compiled capture_headers allowlist, read by middleware (None =
+        # no header capture)
+        self.header_allowlist = compile_header_allowlist(
+            self.config.capture_headers, self.config.max_header_bytes
+        )
+
+        # Compiled host -> script_key map (None = single site)
+        self._sites = compile_site_map(self.config.sites)
+
+        # Bot IP range index, read by middleware for the client IP (None =
+        # no bot verification)
+        self.bot_verifier = compile_bot_verifier(
+            self.config.bot_ranges, self.config.trusted_proxies
+        )
+
+        # Transports are created on first send so unused HTTP libraries
+        # are never imported
+        self._transport: Optional[Transport] = None
+        self._async_transport: Optional[Transport] = None
+        self._transport_lock = threading.Lock()
+
+        # Events held for flush() while buffering (None = send right away)
+        self._buffer: Optional[List[Event]] = None
+
+        # Batch delivery: lock-free per-thread buffers, harvested and
+        # sent in batches by a background flusher thread
+        self._shards: Optional[ShardedBuffer] = None
+        if self.config.delivery == 'batch':
+            self._shards = ShardedBuffer(self.config.max_queue_size)
+
+        # Optional merge stage for duplicate events; closed windows are
+        # sent in batches by the flusher thread
+        self._coalescer: Optional[Coalescer] = None
+        if self.config.coalesce_window:
+            self._coalescer = Coalescer(
+                self.config.coalesce_window, self.config.coalesce_max_keys
+            )
+        self._flusher: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        # Cooperative delivery when gevent/eventlet has patched threading;
+        # 'green' without a patched runtime falls back to threads
+        self._green: Optional[GreenDelivery] = None
+        runtime = None
+        if self.config.delivery in ('thread', 'green'):
+            runtime = cooperative_runtime()
+            fallback = runtime is None and self.config.delivery == 'green'
+            if fallback and self.config.debug:
+                print("[surfgeo] No gevent/eventlet patching, using thread delivery")
+        if runtime is not None:
+            self._green = GreenDelivery(
+                runtime, self._send_green, self.config.green_pool_size,
+                self.config.max_queue_size, self.config.max_batch_size
+            )
+            if self.config.debug:
+                print(f"[surfgeo] Using {runtime} delivery")
+
+        # Undeliverable events go to disk when spool_dir is set (opened
+        # on first use)
+        self._spool: Optional[Spool] = None
+
+        # Latency-driven per-send timeout (None = fixed config.timeout)
+        self._adaptive: Optional[AdaptiveTimeout] = None
+        if self.config.adaptive_timeout:
+            self._adaptive = AdaptiveTimeout(
+                self.config.timeout,
+                self.config.timeout_min or MIN_TIMEOUT,
+                self.config.timeout_max or MAX_TIMEOUT
+            )
+
+        # Resolve the endpoint and open connections before the first
+        # event, again in each forked worker (their pools start empty)
+        if self.config.prewarm_connections:
+            self.prewarm()
+            if hasattr(os, 'register_at_fork'):
+                client = weakref.ref(self)
+                os.register_at_fork(after_in_child=lambda: _prewarm_after_fork(client))
+
     def validate(self) -> bool:
         """Validate configuration"""
         return self._validate_config(self.config)
 
-    def track(self, payload: Dict) -> None:
+    def excludes(self, path: str) -> bool:
+        """
+        Check whether a request path should be skipped
+
+        Middleware call this before doing any other work, so excluded
+        requests (health checks, static assets) cost a single lookup.
+        """
+        path_filter = self._path_filter
+        return path_filter is not None and path_filter.excluded(path)
+
+    def track(self, payload: Union[Dict, Event]) -> None:
         """
         Fire-and-forget tracking (non-blocking)
 
         Steps:
         1. Check if enabled
-        2. Add script_key and source to payload
-        3. Start background thread for POST
+        2. Wrap payload as an Event and add script_key (skip unknown
+           hosts in multi-site mode)
+        3. Enqueue (batch delivery, coalescing, buffering, green
+           delivery) or start background thread for POST
         4. Return immediately (never blocks)
         """
         if not self.config.enabled:
             return
 
-        full_payload: TrackingPayload = {
-            **payload,
-            'script_key': self.config.script_key,
-            'source': 'server'
-        }
+        event = self._to_event(payload)
+        if event is None:
+            return
+
+        # Batch delivery, coalescing, buffered mode or green delivery
+        if self._enqueue(event):
+            return
 
         # Start daemon thread (dies with main thread)
         thread = threading.Thread(
             target=self._post,
-            args=(full_payload,),
+            args=(event,),
             daemon=True
         )
         thread.start()
         # Return immediately - never wait for thread
 
-    async def track_async(self, payload: Dict) -> None:
+    async def track_async(self, payload: Union[Dict, Event]) -> None:
         """
         Async fire-and-forget tracking
 
         Steps:
         1. Check if enabled
-        2. Add script_key and source
-        3. Create task for POST
+        2. Wrap payload as an Event and add script_key (skip unknown
+           hosts in multi-site mode)
+        3. Enqueue (batch delivery, coalescing, buffering) or create
+           task for POST
         4. Return immediately (don't await)
         """
         if not self.config.enabled:
             return
 
-        full_payload: TrackingPayload = {
-            **payload,
-            'script_key': self.config.script_key,
-            'source': 'server'
-        }
+        event = self._to_event(payload)
+        if event is None:
+            return
+
+        # Batch delivery, coalescing or buffered mode
+        if self._enqueue(event):
+            return
 
         # Create task but don't await
-        asyncio.create_task(self._post_async(full_payload))
+        asyncio.create_task(self._post_async(event))
+
+    def site_key(self, host: Optional[str]) -> Optional[str]:
+        """
+        Script key for a request Host
+
+        Uses the sites map when configured, falling back to
+        config.script_key. None means the request is not tracked.
+        """
+        sites = self._sites
+        if sites is not None:
+            script_key = sites.resolve(host)
+            if script_key is not None:
+                return script_key
+        return self.config.script_key or None
+
+    @property
+    def send_timeout(self) -> float:
+        """Timeout for single sends: adaptive estimate or config.timeout"""
+        adaptive = self._adaptive
+        return adaptive.current if adaptive is not None else self.config.timeout
+
+    def stats(self) -> Dict:
+        """
+        Delivery statistics
+
+        Always includes the current per-send `timeout`; with
+        adaptive_timeout, also the latency EWMA and p99 (seconds),
+        sample count and number of timeouts. Batch and green delivery
+        add `queued` (approximate) and `dropped` events.
+        """
+        if self._adaptive is not None:
+            stats = self._adaptive.stats()
+        else:
+            stats = {'timeout': self.config.timeout}
+        if self._shards is not None:
+            stats['queued'] = len(self._shards)
+            stats['dropped'] = self._shards.dropped
+        elif self._green is not None:
+            stats['queued'] = len(self._green)
+            stats['dropped'] = self._green.dropped
+        return stats
+
+    @property
+    def transport(self) -> Transport:
+        """
+        Transport used for blocking sends
+
+        Defaults to requests unless config.transport names another one,
+        or to http.client with prewarm_connections or green delivery.
+        """
+        if self._transport is None:
+            with self._transport_lock:
+                if self._transport is None:
+                    if self.config.prewarm_connections or self._green is not None:
+                        default = 'http.client'
+                    else:
+                        default = 'requests'
+                    self._transport = create_transport(
+                        self.config.transport or default, self.endpoint
+                    )
+        return self._transport
+
+    @property
+    def async_transport(self) -> Transport:
+        """
+        Transport used from async code
+
+        Defaults to httpx unless config.transport names another one, in
+        which case both paths share the same transport. Prewarming only
+        applies to the sync transport: http.client has no native async
+        path, and running its sends in the loop's executor would cost a
+        thread hop per event.
+        """
+        if self._async_transport is None:
+            if self.config.transport is None:
+                self._async_transport = create_transport('httpx', self.endpoint)
+            else:
+                self._async_transport = self.transport
+        return self._async_transport
+
+    def prewarm(self, wait: bool = False) -> Optional[threading.Thread]:
+        """
+        Resolve the endpoint and open config.prewarm_connections pooled
+        connections
+
+        Runs in a background thread unless wait is set; failures are
+        silent. Only the http.client transport keeps prewarmed
+        connections (and the DNS cache); other transports ignore it.
+        """
+        if wait:
+            self._run_prewarm()
+            return None
+        thread = threading.Thread(
+            target=self._run_prewarm, name='surfgeo-prewarm', daemon=True
+        )
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        """
+        Stop background work and close pooled transport connections
+
+        Events still buffered or held by the coalescer are sent first.
+        """
+        self._stopping.set()
+        flusher = self._flusher
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join(self.config.batch_timeout)
+        if self._green is not None:
+            self._green.close(self.config.batch_timeout)
+        # Stop buffering first, or _deliver would only hold the events
+        events = self._buffer or []
+        self._buffer = None
+        events.extend(self._collect(everything=True))
+        self._deliver(events)
+
+        for transport in {
+            id(t): t for t in (self._transport, self._async_transport) if t
+        }.values():
+            transport.close()
+
+        if self._spool is not None:
+            self._spool.close()
+
+    def start_buffering(self) -> None:
+        """
+        Hold tracked events in memory until flush()
+
+        Used where background sends cannot outlive the caller, such as
+        serverless invocations (see surfgeo.serverless).
+        """
+        if self._buffer is None:
+            self._buffer = []
+
+    def stop_buffering(self, timeout: Optional[float] = None) -> int:
+        """Flush held events and go back to sending right away"""
+        sent = self.flush(timeout)
+        self._buffer = None
+        return sent
+
+    def flush(self, timeout: Optional[float] = None) -> int:
+        """
+        Send all pending events now, in batches of max_batch_size
+
+        Blocks for at most timeout seconds (default: batch_timeout);
+        events that do not fit in that deadline are dropped.
+
+        Returns:
+            Number of events delivered
+        """
+        events = self._buffer or []
+        if self._buffer is not None:
+            self._buffer = []
+        events.extend(self._collect(everything=True))
+        if not events:
+            return 0
+
+        return self._send_batches(
+            events, self.config.batch_timeout if timeout is None else timeout
+        )
+
+    def _send_batches(self, events: List[Event], timeout: float) -> int:
+        """
+        Send events in batches within one overall deadline
+
+        Batches are partitioned by script_key, so each batch request
+        belongs to a single site. Events that could not be sent are
+        spooled (or dropped without spool_dir), except a batch that timed
+        out, which the endpoint may already have received.
+        """
+        deadline = time.monotonic() + timeout
+        batch_size = self.config.max_batch_size
+        batches = [
+            site_events[start:start + batch_size]
+            for site_events in self._partition(events)
+            for start in range(0, len(site_events), batch_size)
+        ]
+        sent = 0
+        unsent: List[Event] = []
+
+        for index, batch in enumerate(batches):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                unsent.extend(event for rest in batches[index:] for event in rest)
+                break
+            try:
+                self.transport.send_batch(
+                    [event.to_payload() for event in batch], remaining
+                )
+                sent += len(batch)
+            except TimeoutError:
+                if self.config.debug:
+                    print("[surfgeo] Batch timeout")
+                # The timed-out batch may have arrived; only later ones are spooled
+                unsent.extend(event for rest in batches[index + 1:] for event in rest)
+                break
+            except Exception as e:
+                if self.config.debug:
+                    print(f"[surfgeo] Batch failed: {e}")
+                unsent.extend(batch)
+
+        if unsent:
+            self._spill(unsent)
+        return sent
+
+    def _spill(self, events: List[Event]) -> None:
+        """Write undelivered events to the spool, or drop them"""
+        if self.config.spool_dir is None:
+            if self.config.debug:
+                print(f"[surfgeo] Dropped {len(events)} events")
+            return
+
+        try:
+            if self._spool is None:
+                with self._transport_lock:
+                    if self._spool is None:
+                        self._spool = Spool(
+                            self.config.spool_dir, self.config.spool_max_bytes
+                        )
+            written = self._spool.write([event.to_payload() for event in events])
+            if self.config.debug:
+                print(f"[surfgeo] Spooled {written} of {len(events)} events")
+        except Exception as e:
+            if self.config.debug:
+                print(f"[surfgeo] Spool failed: {e}")
+
+    def _partition(self, events: List[Event]) -> List[List[Event]]:
+        """Group events by script_key, keeping first-seen order"""
+        if self._sites is None:
+            return [events]
+        groups: Dict[Optional[str], List[Event]] = {}
+        for event in events:
+            group = groups.get(event.script_key)
+            if group is None:
+                group = groups[event.script_key] = []
+            group.append(event)
+        return list(groups.values())
+
+    def _deliver(self, events: List[Event]) -> None:
+        """Hand released events to the buffer, or send them (blocking)"""
+        if not events:
+            return
+        buffer = self._buffer
+        if buffer is not None:
+            buffer.extend(events)
+        else:
+            self._send_batches(events, self.config.batch_timeout)
+
+    def _to_event(self, payload: Union[Dict, Event]) -> Optional[Event]:
+        """
+        Use the compact event from middleware, or wrap a caller's dict
+
+        Returns:
+            None if no script key applies (unknown host, no fallback key)
+        """
+        event = payload if isinstance(payload, Event) else Event.from_payload(payload)
+        if self.bot_verifier is not None and event.raw is None:
+            self._verify_bot(event)
+
+        if self._sites is None:
+            event.script_key = self.config.script_key
+            return event
+
+        # Multi-site: route by Host unless the caller set a key
+        if event.script_key is None:
+            event.script_key = self.site_key(event.host)
+            if event.script_key is None:
+                return None
+        event.host = None
+        return event
+
+    def _verify_bot(self, event: Event) -> None:
+        """Tag a claimed crawler as verified or spoofed (both lookups memoized)"""
+        verifier = self.bot_verifier
+        family = classify_user_agent(event.user_agent)
+        if family is not None and verifier is not None:
+            verdict = verifier.verify(family, event.client_ip)
+            if verdict is not None:
+                event.bot_family = family
+                event.bot_verified = verdict
+        event.client_ip = None
+
+    def _enqueue(self, event: Event) -> bool:
+        """
+        Hand an event to a pipeline stage instead of sending it now
+
+        Returns:
+            False if the event should be sent right away
+        """
+        shards = self._shards
+        if shards is not None:
+            shards.append(event)
+            if self._flusher is None:
+                self._start_flusher()
+            return True
+
+        # Coalescing: merge duplicates, sent when their window closes
+        coalescer = self._coalescer
+        if coalescer is not None:
+            self._coalesce(coalescer, event)
+            return True
+
+        # Buffered mode: hold until flush()
+        buffer = self._buffer
+        if buffer is not None:
+            buffer.append(event)
+            return True
+
+        # Green delivery: queued for the worker greenlets
+        green = self._green
+        if green is not None:
+            green.put(event)
+            return True
 
-    def _post(self, payload: Dict) -> None:
+        return False
+
+    def _collect(self, everything: bool = False) -> List[Event]:
+        """
+        Gather events that are ready to send
+
+        Harvests the per-thread buffers, then passes events through the
+        coalescer (on the flusher thread, so request threads never
+        contend on it) and releases its closed windows.
+        """
+        events = self._shards.harvest() if self._shards is not None else []
+
+        coalescer = self._coalescer
+        if coalescer is not None:
+            if events:
+                released = []
+                for event in events:
+                    released.extend(coalescer.add(event))
+                events = released
+            events.extend(coalescer.drain(everything=everything))
+        return events
+
+    def _coalesce(self, coalescer: Coalescer, event: Event) -> None:
+        """Add an event to the coalescer, starting the flusher on first use"""
+        released = coalescer.add(event)
+        if self._flusher is None and self._buffer is None:
+            self._start_flusher()
+        if released:
+            # Over max keys: send the oldest window off the request thread
+            threading.Thread(
+                target=self._deliver, args=(released,), daemon=True
+            ).start()
+
+    def _start_flusher(self) -> None:
+        with self._transport_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher,
+                    name='surfgeo-flusher',
+                    daemon=True
+                )
+                self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        """Send harvested events and closed coalescing windows until close()"""
+        coalescer = self._coalescer
+        if self._shards is not None or coalescer is None:
+            interval = self.config.flush_interval
+        else:
+            interval = coalescer.window
+        while not self._stopping.wait(interval):
+            self._deliver(self._collect())
+
+    def _send_green(self, events: List[Event]) -> None:
+        """Worker greenlet send: one event alone, more as a batch"""
+        if len(events) == 1:
+            self._post(events[0])
+        else:
+            self._send_batches(events, self.config.batch_timeout)
+
+    def _run_prewarm(self) -> None:
+        try:
+            opened = self.transport.prewarm(
+                self.config.prewarm_connections, PREWARM_TIMEOUT, self.config.dns_ttl
+            )
+            if self.config.debug:
+                print(f"[surfgeo] Prewarmed {opened} connections")
+        except Exception as e:
+            if self.config.debug:
+                print(f"[surfgeo] Prewarm failed: {e}")
+
+    def _post(self, event: Event) -> None:
         """
         Synchronous HTTP POST with timeout
 
         Uses:
-        - requests library
-        - Timeout enforcement
+        - configured transport (requests by default)
+        - Timeout enforcement (fixed or adaptive)
         - Silent failure on error
         """
+        adaptive = self._adaptive
+        started = time.perf_counter()
         try:
-            response = requests.post(
-                self.endpoint,
-                json=payload,
-                timeout=self.config.timeout,
-                headers={
-                    'Content-Type': 'application/json',
-                    'User-Agent': 'surfgeo-Python-SDK/1.0.0'
-                }
-            )
-            # Don't check status - backend always returns 200
-
-        except requests.Timeout:
+            self.transport.send(event.to_payload(), self.send_timeout)
+            if adaptive is not None:
+                adaptive.observe(time.perf_counter() - started)
+        except TimeoutError:
+            if adaptive is not None:
+                adaptive.observe_timeout()
             if self.config.debug:
-                print(f"[surfgeo] Request timeout")
+                print("[surfgeo] Request timeout")
+            # Not spooled: the endpoint may have received it, and replaying
+            # it would count the request twice
         except Exception as e:
             if self.config.debug:
                 print(f"[surfgeo] Tracking failed: {e}")
+            self._spill([event])
         # Never raise - silent failure
 
-    async def _post_async(self, payload: Dict) -> None:
+    async def _post_async(self, event: Event) -> None:
         """
         Asynchronous HTTP POST with timeout
 
         Uses:
-        - httpx library (async HTTP client)
+        - configured transport (httpx by default)
         - Asyncio timeout
         - Silent failure
         """
+        adaptive = self._adaptive
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.endpoint,
-                    json=payload,
-                    timeout=self.config.timeout,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'surfgeo-Python-SDK/1.0.0'
-                    }
-                )
-        except httpx.TimeoutException:
+            await self.async_transport.send_async(event.to_payload(), self.send_timeout)
+            if adaptive is not None:
+                adaptive.observe(time.perf_counter() - started)
+        except TimeoutError:
+            if adaptive is not None:
+                adaptive.observe_timeout()
             if self.config.debug:
-                print(f"[surfgeo] Async request timeout")
+                print("[surfgeo] Async request timeout")
         except Exception as e:
             if self.config.debug:
                 print(f"[surfgeo] Async tracking failed: {e}")
+            self._spill([event])
 
     def _validate_config(self, config: surfgeoConfig) -> bool:
         """Validate configuration"""
-        # Validate script_key
-        if not config.script_key:
-            raise ValueError('surfgeo: script_key is required')
-
-        if not isinstance(config.script_key, str):
-            raise ValueError('surfgeo: script_key must be a string')
+        # Validate script_key (optional with a sites map, as fallback)
+        if config.sites is None or config.script_key:
+            self._validate_script_key(config.script_key, 'script_key')
 
-        if not config.script_key.startswith('sk_'):
-            raise ValueError('surfgeo: script_key must start with "sk_"')
-
-        if len(config.script_key) < 20 or len(config.script_key) > 50:
-            raise ValueError('surfgeo: script_key must be between 20 and 50 characters')
-
-        if not config.script_key[3:].replace('_', '').isalnum():
-            raise ValueError('surfgeo: script_key must be alphanumeric (underscores allowed) after "sk_" prefix')
+        # Validate sites if provided
+        if config.sites is not None:
+            if not isinstance(config.sites, dict) or not config.sites:
+                raise ValueError(
+                    'surfgeo: sites must be a non-empty dict of host to script_key'
+                )
+            for host, script_key in config.sites.items():
+                self._validate_script_key(script_key, f'sites["{host}"]')
+            compile_site_map(config.sites)
 
         # Validate endpoint if provided
         if config.endpoint is not None:
@@ -180,5 +678,163 @@ class surfgeoClient:
             if not isinstance(config.timeout, (int, float)) or config.timeout < MIN_TIMEOUT or config.timeout > MAX_TIMEOUT:
                 raise ValueError(f'surfgeo: timeout must be between {MIN_TIMEOUT} and {MAX_TIMEOUT} seconds')
 
+        # Validate transport if provided (resolving a name imports nothing)
+        if (
+            config.transport is not None
+            and not isinstance(config.transport, Transport)
+            and config.transport not in TRANSPORTS
+        ):
+            raise ValueError(
+                f'surfgeo: transport must be one of {", ".join(TRANSPORTS)} '
+                'or a Transport instance'
+            )
+
+        # Validate adaptive timeout bounds if provided
+        timeout_min = (
+            config.timeout_min if config.timeout_min is not None else MIN_TIMEOUT
+        )
+        timeout_max = (
+            config.timeout_max if config.timeout_max is not None else MAX_TIMEOUT
+        )
+        if (
+            not all(
+                isinstance(bound, (int, float)) for bound in (timeout_min, timeout_max)
+            )
+            or not MIN_TIMEOUT <= timeout_min <= timeout_max <= MAX_ADAPTIVE_TIMEOUT
+        ):
+            raise ValueError(
+                f'surfgeo: timeout_min/timeout_max must satisfy '
+                f'{MIN_TIMEOUT} <= timeout_min <= timeout_max '
+                f'<= {MAX_ADAPTIVE_TIMEOUT} seconds'
+            )
+
+        if config.delivery not in DELIVERY_MODES:
+            raise ValueError(
+                f'surfgeo: delivery must be one of {", ".join(DELIVERY_MODES)}'
+            )
+
+        if not isinstance(config.green_pool_size, int) or config.green_pool_size < 1:
+            raise ValueError('surfgeo: green_pool_size must be a positive integer')
+
+        if (
+            not isinstance(config.flush_interval, (int, float))
+            or config.flush_interval <= 0
+        ):
+            raise ValueError(
+                'surfgeo: flush_interval must be a positive number of seconds'
+            )
+
+        if not isinstance(config.max_queue_size, int) or config.max_queue_size < 1:
+            raise ValueError('surfgeo: max_queue_size must be a positive integer')
+
+        # Validate batching options
+        if (
+            not isinstance(config.batch_timeout, (int, float))
+            or config.batch_timeout <= 0
+        ):
+            raise ValueError(
+                'surfgeo: batch_timeout must be a positive number of seconds'
+            )
+
+        if not isinstance(config.max_batch_size, int) or config.max_batch_size < 1:
+            raise ValueError('surfgeo: max_batch_size must be a positive integer')
+
+        if config.coalesce_window is not None and (
+            not isinstance(config.coalesce_window, (int, float))
+            or config.coalesce_window <= 0
+        ):
+            raise ValueError(
+                'surfgeo: coalesce_window must be a positive number of seconds'
+            )
+
+        if config.spool_dir is not None and (
+            not isinstance(config.spool_dir, str) or not config.spool_dir
+        ):
+            raise ValueError('surfgeo: spool_dir must be a directory path')
+
+        if not isinstance(config.spool_max_bytes, int) or config.spool_max_bytes < 1:
+            raise ValueError('surfgeo: spool_max_bytes must be a positive integer')
+
+        # Validate header capture if provided
+        if config.capture_headers is not None:
+            if isinstance(config.capture_headers, str) or not all(
+                isinstance(name, str) and name for name in config.capture_headers
+            ):
+                raise ValueError(
+                    'surfgeo: capture_headers must be a list of header names'
+                )
+            compile_header_allowlist(config.capture_headers)
+
+        if not isinstance(config.max_header_bytes, int) or config.max_header_bytes < 1:
+            raise ValueError('surfgeo: max_header_bytes must be a positive integer')
+
+        # Validate bot verification if provided (reads the ranges file)
+        if config.trusted_proxies is not None and (
+            isinstance(config.trusted_proxies, str)
+            or not all(
+                isinstance(cidr, str) and cidr for cidr in config.trusted_proxies
+            )
+        ):
+            raise ValueError('surfgeo: trusted_proxies must be a list of CIDRs')
+
+        if config.bot_ranges is not None and not isinstance(
+            config.bot_ranges, (str, dict)
+        ):
+            raise ValueError(
+                'surfgeo: bot_ranges must be a JSON file path '
+                'or a dict of bot family to CIDRs'
+            )
+
+        if (
+            not isinstance(config.prewarm_connections, int)
+            or config.prewarm_connections < 0
+        ):
+            raise ValueError(
+                'surfgeo: prewarm_connections must be a non-negative integer'
+            )
+
+        if not isinstance(config.dns_ttl, (int, float)) or config.dns_ttl <= 0:
+            raise ValueError('surfgeo: dns_ttl must be a positive number of seconds')
+
+        # Validate path rules if provided
+        for name in ('include', 'exclude'):
+            rules = getattr(config, name)
+            if rules is not None and (
+                isinstance(rules, str)
+                or not all(isinstance(rule, str) and rule for rule in rules)
+            ):
+                raise ValueError(
+                    f'surfgeo: {name} must be a list of non-empty path rules'
+                )
+
         return True
 
+    def _validate_script_key(self, script_key: str, name: str) -> None:
+        """Validate one script key; name is used in error messages"""
+        if not script_key:
+            raise ValueError(f'surfgeo: {name} is required')
+
+        if not isinstance(script_key, str):
+            raise ValueError(f'surfgeo: {name} must be a string')
+
+        if not script_key.startswith('sk_'):
+            raise ValueError(f'surfgeo: {name} must start with "sk_"')
+
+        if len(script_key) < 20 or len(script_key) > 50:
+            raise ValueError(f'surfgeo: {name} must be between 20 and 50 characters')
+
+        if not script_key[3:].replace('_', '').isalnum():
+            raise ValueError(
+                f'surfgeo: {name} must be alphanumeric (underscores allowed) '
+                'after "sk_" prefix'
+            )
+
+
+def _prewarm_after_fork(reference: 'weakref.ref[surfgeoClient]') -> None:
+    """Fork hook: drop the parent's connections and prewarm again"""
+    client = reference()
+    if client is None:
+        return
+    if client._transport is not None:
+        client._transport.drop_connections()
+    client.prewarm()
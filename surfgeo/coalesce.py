@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from surfgeo.event import Event
+
+
+# Default cap on distinct events held across all open buckets
+DEFAULT_MAX_KEYS = 10000
+
+# Caller payload fields that differ between otherwise identical requests
+VOLATILE_FIELDS = frozenset(('timestamp', 'request_id'))
+
+
+def _raw_key(raw: Dict) -> Tuple:
+    """Every other field of a caller's payload dict, in a hashable form"""
+    return tuple(
+        sorted(
+            (name, repr(value))
+            for name, value in raw.items()
+            if name not in VOLATILE_FIELDS
+        )
+    )
+
+
+class Coalescer:
+    """
+    Merge duplicate events seen within a short window
+
+    Events with the same (script_key, path, method, status_code,
+    user_agent, bot verification) that land in the same time bucket are merged into one
+    event whose payload carries `count`, `first_seen` and `last_seen`.
+    Events wrapping a caller's dict only merge if all its other fields
+    match too, since that dict is sent as is.
+    Buckets are plain dicts keyed by int(now / window), so expiry drops
+    whole buckets at once. At most max_keys events are held; beyond
+    that the oldest bucket is released early.
+    """
+
+    def __init__(self, window: float, max_keys: int = DEFAULT_MAX_KEYS):
+        self.window = window
+        self.max_keys = max_keys
+        self._buckets: 'OrderedDict[int, Dict[Tuple, Event]]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, event: Event, now: Optional[float] = None) -> List[Event]:
+        """
+        Add an event
+
+        Returns:
+            Events released early to stay under max_keys (usually empty)
+        """
+        if now is None:
+            now = time.monotonic()
+        key = (
+            event.script_key,
+            event.path,
+            event.method,
+            event.status_code,
+            event.user_agent,
+            event.bot_verified,
+            _raw_key(event.raw) if event.raw is not None else None,
+        )
+        bucket_id = int(now / self.window)
+
+        with self._lock:
+            bucket = self._buckets.get(bucket_id)
+            if bucket is None:
+                bucket = self._buckets[bucket_id] = {}
+
+            merged = bucket.get(key)
+            if merged is not None:
+                merged.merge(event)
+                return []
+
+            bucket[key] = event
+            self._size += 1
+            if self._size <= self.max_keys:
+                return []
+            _, oldest = self._buckets.popitem(last=False)
+            self._size -= len(oldest)
+            return list(oldest.values())
+
+    def drain(
+        self, now: Optional[float] = None, everything: bool = False
+    ) -> List[Event]:
+        """
+        Remove and return events from closed buckets
+
+        Args:
+            now: Current monotonic time (default: time.monotonic())
+            everything: Also release the still-open bucket
+        """
+        if now is None:
+            now = time.monotonic()
+        current = int(now / self.window)
+        released: List[Event] = []
+
+        with self._lock:
+            while self._buckets:
+                bucket_id = next(iter(self._buckets))
+                if bucket_id >= current and not everything:
+                    break
+                bucket = self._buckets.pop(bucket_id)
+                self._size -= len(bucket)
+                released.extend(bucket.values())
+        return released
@@ -0,0 +1,140 @@
+import time
+import uuid
+from typing import Dict, Optional, cast
+from surfgeo.types import TrackingPayload
+
+
+# Bounded table of shared method/path/user-agent strings
+MAX_INTERNED = 4096
+_interned: Dict[str, str] = {}
+
+
+def intern(value: str) -> str:
+    """
+    Return a shared copy of a frequently repeated string
+
+    Unlike sys.intern the table is bounded: it is cleared once it holds
+    MAX_INTERNED entries, so high-cardinality paths cannot grow it.
+    """
+    cached = _interned.get(value)
+    if cached is not None:
+        return cached
+    if len(_interned) >= MAX_INTERNED:
+        _interned.clear()
+    _interned[value] = value
+    return value
+
+
+class Event:
+    """
+    Compact internal event record
+
+    Used from middleware through the client pipeline (buffers,
+    coalescer) to the transport edge, where to_payload() produces the
+    TrackingPayload dict. The request_id is only generated then.
+
+    Events created from a caller's dict (client.track(dict)) keep that
+    dict in `raw` and serialize it unchanged. `host` is only used to
+    pick the script key (multi-site) and `client_ip` to verify bot
+    claims (bot_ranges); neither is sent.
+    """
+
+    __slots__ = (
+        'timestamp', 'path', 'method', 'status_code', 'user_agent', 'referrer',
+        'response_bytes', 'duration_ms', 'script_key', 'count', 'first_seen',
+        'last_seen', 'raw', 'host', 'headers', 'client_ip', 'bot_family',
+        'bot_verified',
+    )
+
+    def __init__(
+        self,
+        timestamp: int,
+        path: str,
+        method: str,
+        status_code: Optional[int],
+        user_agent: str,
+        referrer: Optional[str] = None,
+        response_bytes: Optional[int] = None,
+        duration_ms: Optional[float] = None,
+        script_key: Optional[str] = None,
+        host: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        client_ip: Optional[str] = None,
+    ):
+        self.timestamp = timestamp
+        self.path = path
+        self.method = method
+        self.status_code = status_code
+        self.user_agent = user_agent
+        self.referrer = referrer
+        self.response_bytes = response_bytes
+        self.duration_ms = duration_ms
+        self.script_key = script_key
+        self.host = host
+        self.headers = headers
+        self.client_ip = client_ip
+        self.bot_family: Optional[str] = None
+        self.bot_verified: Optional[bool] = None
+        self.count = 1
+        self.first_seen: Optional[int] = None
+        self.last_seen: Optional[int] = None
+        self.raw: Optional[Dict] = None
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> 'Event':
+        """Wrap a caller-supplied payload dict"""
+        timestamp = payload.get('timestamp')
+        event = cls(
+            int(time.time()) if timestamp is None else timestamp,
+            payload.get('path') or '',
+            payload.get('method') or '',
+            payload.get('status_code'),
+            payload.get('user_agent') or '',
+            script_key=payload.get('script_key')
+        )
+        event.raw = payload
+        return event
+
+    def merge(self, other: 'Event') -> None:
+        """Fold a duplicate event into this one (coalescing)"""
+        if self.count == 1:
+            self.first_seen = self.timestamp
+        self.count += 1
+        self.last_seen = other.timestamp
+
+    def request_fields(self) -> TrackingPayload:
+        """Request fields only, as returned by build_payload()"""
+        fields: TrackingPayload = {
+            'timestamp': self.timestamp,
+            'path': self.path,
+            'method': self.method,
+            'status_code': self.status_code,
+            'user_agent': self.user_agent,
+            'referrer': self.referrer,
+            'request_id': str(uuid.uuid4())
+        }
+        if self.response_bytes is not None:
+            fields['response_bytes'] = self.response_bytes
+        if self.duration_ms is not None:
+            fields['duration_ms'] = self.duration_ms
+        if self.headers is not None:
+            fields['headers'] = self.headers
+        if self.bot_verified is not None:
+            fields['bot_family'] = self.bot_family
+            fields['bot_verification'] = 'verified' if self.bot_verified else 'spoofed'
+        return fields
+
+    def to_payload(self) -> TrackingPayload:
+        """Serialize to the full TrackingPayload sent to the API"""
+        if self.raw is not None:
+            payload = cast(TrackingPayload, dict(self.raw))
+        else:
+            payload = self.request_fields()
+        payload['script_key'] = self.script_key
+        payload['source'] = 'server'
+
+        if self.count > 1:
+            payload['count'] = self.count
+            payload['first_seen'] = self.first_seen
+            payload['last_seen'] = self.last_seen
+        return payload
@@ -0,0 +1,124 @@
+"""
+Cooperative (gevent/eventlet) delivery
+
+Under a monkey-patched runtime such as gunicorn's gevent or eventlet
+workers, a thread per event becomes a greenlet per event, and
+thread-local batch buffers become one buffer per request greenlet.
+Green delivery instead puts events on a bounded gevent/eventlet queue
+drained by a fixed pool of worker greenlets, each sending what has
+accumulated as one batch over the pooled keep-alive http.client
+transport (cooperative once sockets are patched).
+
+The client switches to it when it detects a patched runtime, with
+delivery 'thread' (the default) or 'green'. Greenlets only run where
+the hub does, so without monkey-patching 'green' falls back to thread
+delivery; otherwise events queued from ordinary threads would never be
+sent.
+"""
+
+import sys
+from typing import Any, Callable, List, Optional
+
+
+RUNTIMES = ('gevent', 'eventlet')
+
+
+def cooperative_runtime() -> Optional[str]:
+    """Name of the runtime that has monkey-patched threading, if any"""
+    # Checked through sys.modules so neither library is ever imported here
+    monkey = sys.modules.get('gevent.monkey')
+    if monkey is not None and monkey.is_module_patched('threading'):
+        return 'gevent'
+    patcher = sys.modules.get('eventlet.patcher')
+    if patcher is not None and patcher.is_monkey_patched('thread'):
+        return 'eventlet'
+    return None
+
+
+class GreenDelivery:
+    """
+    Bounded queue drained by a fixed pool of worker greenlets
+
+    Args:
+        runtime: 'gevent' or 'eventlet'
+        send: Called from a worker with a list of events
+        workers: Number of worker greenlets
+        max_events: Queue bound; events beyond it are dropped
+        max_batch: Most events a worker takes per send
+    """
+
+    def __init__(self, runtime: str, send: Callable[[List[Any]], None], workers: int,
+                 max_events: int, max_batch: int):
+        if runtime == 'gevent':
+            import gevent
+            from gevent.queue import Queue, Full
+            self._spawn = gevent.spawn
+            self._joinall = lambda greenlets, timeout: gevent.joinall(
+                greenlets, timeout=timeout
+            )
+        else:
+            import eventlet
+            from eventlet.queue import Queue, Full
+
+            def joinall(greenlets: List[Any], timeout: Optional[float]) -> None:
+                with eventlet.Timeout(timeout, False):
+                    for greenlet in greenlets:
+                        greenlet.wait()
+
+            self._spawn = eventlet.spawn
+            self._joinall = joinall
+
+        self.runtime = runtime
+        self.dropped = 0
+        self._send = send
+        self._queue = Queue(max_events)
+        self._full = Full
+        self._workers = workers
+        self._max_batch = max_batch
+        self._greenlets: List[Any] = []
+
+    def __len__(self) -> int:
+        size: int = self._queue.qsize()
+        return size
+
+    def put(self, event: Any) -> bool:
+        """
+        Queue an event without blocking
+
+        Returns:
+            False if the queue was full and the event was dropped
+        """
+        if not self._greenlets:
+            # Spawned on first use, i.e. in the worker process after fork
+            self._greenlets = [self._spawn(self._run) for _ in range(self._workers)]
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except self._full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float) -> None:
+        """Let workers send what is queued, then stop them"""
+        if not self._greenlets:
+            return
+        for _ in self._greenlets:
+            self._queue.put(None)
+        self._joinall(self._greenlets, timeout)
+        self._greenlets = []
+
+    def _run(self) -> None:
+        queue = self._queue
+        while True:
+            event = queue.get()
+            if event is None:
+                return
+            events = [event]
+            # Take whatever else is already waiting, up to one batch
+            while len(events) < self._max_batch and not queue.empty():
+                event = queue.get_nowait()
+                if event is None:
+                    self._send(events)
+                    return
+                events.append(event)
+            self._send(events)
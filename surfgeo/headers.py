@@ -0,0 +1,203 @@
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+DEFAULT_MAX_HEADER_BYTES = 256
+
+# Standard request headers; allowlist rules ending in '*' expand to the
+# ones sharing the prefix, so capture never has to scan every header
+KNOWN_HEADERS = (
+    'accept',
+    'accept-encoding',
+    'accept-language',
+    'cache-control',
+    'connection',
+    'content-length',
+    'content-type',
+    'dnt',
+    'forwarded',
+    'from',
+    'if-modified-since',
+    'if-none-match',
+    'origin',
+    'pragma',
+    'priority',
+    'purpose',
+    'save-data',
+    'sec-ch-ua',
+    'sec-ch-ua-arch',
+    'sec-ch-ua-bitness',
+    'sec-ch-ua-full-version-list',
+    'sec-ch-ua-mobile',
+    'sec-ch-ua-model',
+    'sec-ch-ua-platform',
+    'sec-ch-ua-platform-version',
+    'sec-fetch-dest',
+    'sec-fetch-mode',
+    'sec-fetch-site',
+    'sec-fetch-user',
+    'sec-purpose',
+    'te',
+    'upgrade-insecure-requests',
+    'via',
+    'x-forwarded-for',
+    'x-forwarded-host',
+    'x-forwarded-proto',
+    'x-real-ip',
+    'x-requested-with',
+)
+
+# WSGI/CGI keys without the HTTP_ prefix
+CGI_KEYS = {'content-type': 'CONTENT_TYPE', 'content-length': 'CONTENT_LENGTH'}
+
+# Headers build_event reads, as (environ key, header name)
+REQUEST_ENVIRON_KEYS = (
+    ('HTTP_USER_AGENT', 'User-Agent'),
+    ('HTTP_REFERER', 'Referer'),
+    ('HTTP_REFERRER', 'Referrer'),
+    ('HTTP_HOST', 'Host'),
+)
+
+# Same headers as raw ASGI names
+REQUEST_ASGI_NAMES = frozenset({b'user-agent', b'referer', b'referrer', b'host'})
+
+
+def truncate(value: str, max_bytes: int) -> str:
+    """Cut value to at most max_bytes of UTF-8, on a character boundary"""
+    if value.isascii():
+        return value[:max_bytes]
+    return value.encode('utf-8')[:max_bytes].decode('utf-8', 'ignore')
+
+
+def environ_key(name: str) -> str:
+    """WSGI environ / Django META key for a header name"""
+    name = name.lower()
+    return CGI_KEYS.get(name) or 'HTTP_' + name.upper().replace('-', '_')
+
+
+def environ_headers(environ: Mapping) -> Dict[str, str]:
+    """Headers build_event needs, looked up directly in a WSGI environ or Django META"""
+    headers = {}
+    for key, name in REQUEST_ENVIRON_KEYS:
+        value = environ.get(key)
+        if value is not None:
+            headers[name] = value
+    return headers
+
+
+def asgi_headers(raw_headers: Iterable[Tuple[bytes, bytes]]) -> Dict[str, str]:
+    """Headers build_event needs, decoded from ASGI scope headers"""
+    headers = {}
+    for name, value in raw_headers:
+        if name in REQUEST_ASGI_NAMES:
+            headers[name.decode('latin1')] = value.decode('latin1')
+    return headers
+
+
+class HeaderAllowlist:
+    """
+    Compiled header allowlist
+
+    Names are normalized once into each framework's native form:
+    HTTP_* keys for WSGI environs and Django META, lowercase bytes for
+    ASGI scopes, and lowercase/Title-Case names for header mappings.
+    Captured headers use lowercase names; each value is cut to
+    max_bytes of UTF-8, as sent in the payload.
+
+    Rules are header names ('Accept-Language') or prefixes of known
+    headers ('Sec-Fetch-*').
+    """
+
+    __slots__ = ('names', 'max_bytes', '_environ_keys', '_asgi_names', '_mapping_keys')
+
+    def __init__(self, rules: Iterable[str], max_bytes: int = DEFAULT_MAX_HEADER_BYTES):
+        names: List[str] = []
+        for rule in rules:
+            if not isinstance(rule, str) or not rule.strip('*'):
+                raise ValueError(
+                    'surfgeo: capture_headers must be non-empty header names'
+                )
+            rule = rule.strip().lower().replace('_', '-')
+            if rule.endswith('*'):
+                expanded = [
+                    name for name in KNOWN_HEADERS if name.startswith(rule[:-1])
+                ]
+                if not expanded:
+                    raise ValueError(
+                        f'surfgeo: capture_headers rule "{rule}" '
+                        'matches no known header'
+                    )
+            else:
+                expanded = [rule]
+            for name in expanded:
+                if name not in names:
+                    names.append(name)
+
+        self.names = tuple(names)
+        self.max_bytes = max_bytes
+        self._environ_keys = tuple((environ_key(name), name) for name in names)
+        self._asgi_names = {name.encode('latin1'): name for name in names}
+        self._mapping_keys = tuple((name, name.title()) for name in names)
+
+    def from_environ(self, environ: Mapping) -> Optional[Dict[str, str]]:
+        """Capture from a WSGI environ or Django request.META"""
+        captured = None
+        max_bytes = self.max_bytes
+        for key, name in self._environ_keys:
+            value = environ.get(key)
+            if value is not None:
+                if captured is None:
+                    captured = {}
+                captured[name] = truncate(value, max_bytes)
+        return captured
+
+    def from_asgi(
+        self, raw_headers: Iterable[Tuple[bytes, bytes]]
+    ) -> Optional[Dict[str, str]]:
+        """Capture from ASGI scope headers (repeated headers are joined)"""
+        captured: Optional[Dict[str, str]] = None
+        wanted = self._asgi_names
+        max_bytes = self.max_bytes
+        for raw_name, raw_value in raw_headers:
+            name = wanted.get(raw_name)
+            if name is None:
+                continue
+            if captured is None:
+                captured = {}
+            # latin1 never shortens, so slicing the bytes first is safe
+            value = raw_value[:max_bytes].decode('latin1')
+            if name in captured:
+                value = captured[name] + ', ' + value
+            captured[name] = truncate(value, max_bytes)
+        return captured
+
+    def from_mapping(self, headers: Mapping) -> Optional[Dict[str, str]]:
+        """
+        Capture from a header mapping
+
+        Case-insensitive views (Flask, Starlette, Django) match on the
+        first lookup; plain dicts (e.g. API Gateway events) are tried
+        lowercase and Title-Case.
+        """
+        captured = None
+        max_bytes = self.max_bytes
+        for name, title in self._mapping_keys:
+            value = headers.get(name)
+            if value is None:
+                value = headers.get(title)
+                if value is None:
+                    continue
+            if isinstance(value, list):
+                value = ', '.join(value)
+            if captured is None:
+                captured = {}
+            captured[name] = truncate(value, max_bytes)
+        return captured
+
+
+def compile_header_allowlist(
+    rules: Optional[Iterable[str]], max_bytes: int = DEFAULT_MAX_HEADER_BYTES
+) -> Optional[HeaderAllowlist]:
+    """Compile capture_headers (None if not configured)"""
+    if not rules:
+        return None
+    return HeaderAllowlist(rules, max_bytes)
@@ -0,0 +1,110 @@
+import math
+import threading
+from typing import Dict, List
+
+
+class LatencySketch:
+    """
+    Streaming quantile sketch for latencies
+
+    Log-bucketed histogram with ~5% relative accuracy between 0.1ms and
+    hours. Counts are halved once `decay_at` samples accumulate, so the
+    sketch follows recent behaviour instead of all history.
+    """
+
+    GAMMA = 1.1
+    MIN_VALUE = 0.0001  # 0.1ms
+    BUCKETS = 200
+
+    def __init__(self, decay_at: int = 2000):
+        self._counts: List[float] = [0.0] * self.BUCKETS
+        self._total = 0.0
+        self._decay_at = decay_at
+        self._log_gamma = math.log(self.GAMMA)
+
+    def add(self, seconds: float) -> None:
+        if seconds <= self.MIN_VALUE:
+            index = 0
+        else:
+            index = min(
+                int(math.ceil(math.log(seconds / self.MIN_VALUE) / self._log_gamma)),
+                self.BUCKETS - 1,
+            )
+        self._counts[index] += 1
+        self._total += 1
+        if self._total >= self._decay_at:
+            self._counts = [count / 2 for count in self._counts]
+            self._total /= 2
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (0 if empty)"""
+        if self._total <= 0:
+            return 0.0
+        rank = q * self._total
+        seen = 0.0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return self.MIN_VALUE * self.GAMMA ** index
+        return self.MIN_VALUE * self.GAMMA ** (self.BUCKETS - 1)
+
+
+class AdaptiveTimeout:
+    """
+    Per-send timeout derived from observed endpoint latency
+
+    Tracks an EWMA and a p99 sketch of successful sends. After a short
+    warm-up, the timeout is max(p99, EWMA) plus 25% headroom, clamped
+    to [minimum, maximum]; the EWMA reacts to sudden shifts before the
+    sketch does. Timeouts are recorded at the current timeout
+    value, so if more than 1% of sends time out the p99 reaches the
+    timeout and the headroom raises it on the next update.
+    """
+
+    ALPHA = 0.2
+    HEADROOM = 1.25
+    WARMUP = 20
+    UPDATE_EVERY = 10
+
+    def __init__(self, initial: float, minimum: float, maximum: float):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.current = min(max(initial, minimum), maximum)
+        self.ewma = 0.0
+        self.samples = 0
+        self.timeouts = 0
+        self._sketch = LatencySketch()
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record the latency of a successful send"""
+        with self._lock:
+            self._record(seconds)
+
+    def observe_timeout(self) -> None:
+        """Record a send that hit the current timeout"""
+        with self._lock:
+            self.timeouts += 1
+            self._record(self.current)
+
+    def _record(self, seconds: float) -> None:
+        self.ewma = (
+            seconds
+            if self.samples == 0
+            else self.ewma + self.ALPHA * (seconds - self.ewma)
+        )
+        self._sketch.add(seconds)
+        self.samples += 1
+        if self.samples >= self.WARMUP and self.samples % self.UPDATE_EVERY == 0:
+            target = max(self._sketch.quantile(0.99), self.ewma) * self.HEADROOM
+            self.current = min(max(target, self.minimum), self.maximum)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'timeout': self.current,
+                'latency_ewma': self.ewma,
+                'latency_p99': self._sketch.quantile(0.99),
+                'samples': self.samples,
+                'timeouts': self.timeouts,
+            }
@@ -0,0 +1,496 @@
+"""
+Synthetic traffic generator for capacity planning
+
+Builds a seeded stream of requests (AI crawler and human user agents,
+Zipf-distributed paths, realistic status codes and referrers) and
+drives it through the SDK at a target rate, split across processes.
+Each request goes through a real middleware (WSGI or ASGI, wrapping a
+stub app) or straight to surfgeoClient.track, and events are delivered
+to a local FakeCollector unless an endpoint is given.
+
+Reported per run:
+- SDK CPU time: request-path time inside the middleware/client plus
+  all CPU used by background delivery threads
+- queue depth: buffered events (batch delivery) or sender threads
+  in flight (thread delivery), sampled every 100ms
+- drop rate: requests that never reached the collector
+- delivered throughput at the collector
+
+Usage:
+    surfgeo loadgen --rate 20000 --duration 10 --processes 4 \
+        --target wsgi --delivery batch
+
+    from surfgeo.loadgen import LoadConfig, run
+    report = run(LoadConfig(rate=5000, duration=5))
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.payload import build_event
+from surfgeo.types import RequestMetadata
+
+
+# (user agent, weight): AI crawlers and assistants, then browsers
+USER_AGENTS: List[Tuple[str, float]] = [
+    (
+        'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko); compatible; '
+        'GPTBot/1.2; +https://openai.com/gptbot',
+        8,
+    ),
+    (
+        'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko); compatible; '
+        'ChatGPT-User/1.0; +https://openai.com/bot',
+        4,
+    ),
+    (
+        'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko); compatible; '
+        'OAI-SearchBot/1.0; +https://openai.com/searchbot',
+        3,
+    ),
+    (
+        'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; '
+        'ClaudeBot/1.0; +claudebot@anthropic.com)',
+        6,
+    ),
+    (
+        'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; '
+        'Claude-User/1.0; +Claude-User@anthropic.com)',
+        2,
+    ),
+    (
+        'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; '
+        'PerplexityBot/1.0; +https://perplexity.ai/perplexitybot)',
+        4,
+    ),
+    (
+        'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; '
+        'Perplexity-User/1.0; +https://perplexity.ai/perplexity-user)',
+        2,
+    ),
+    ('Mozilla/5.0 (compatible; Bytespider; spider-feedback@bytedance.com)', 3),
+    ('CCBot/2.0 (https://commoncrawl.org/faq/)', 2),
+    (
+        'Mozilla/5.0 (compatible; Amazonbot/0.1; '
+        '+https://developer.amazon.com/support/amazonbot)',
+        2,
+    ),
+    ('Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)', 6),
+    (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+        '(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+        30,
+    ),
+    (
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 '
+        '(KHTML, like Gecko) Version/17.4 Safari/605.1.15',
+        12,
+    ),
+    (
+        'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 '
+        '(KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1',
+        10,
+    ),
+    ('Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0', 4),
+]
+
+STATUS_CODES: List[Tuple[int, float]] = [
+    (200, 86),
+    (304, 5),
+    (301, 3),
+    (404, 4),
+    (500, 1),
+    (503, 1),
+]
+
+METHODS: List[Tuple[str, float]] = [('GET', 95), ('HEAD', 3), ('POST', 2)]
+
+REFERRERS: List[Tuple[Optional[str], float]] = [
+    (None, 70),
+    ('https://www.google.com/', 15),
+    ('https://chatgpt.com/', 6),
+    ('https://www.perplexity.ai/', 4),
+    ('https://claude.ai/', 2),
+    ('https://www.bing.com/', 3),
+]
+
+STATIC_SUFFIXES = ('.css', '.js', '.png', '.svg', '.woff2')
+TARGETS = ('client', 'wsgi', 'asgi')
+SAMPLE_INTERVAL = 0.1
+CHUNK = 1024
+
+
+@dataclass
+class LoadConfig:
+    """Load test options"""
+    rate: float = 10000.0  # requests per second, all processes together
+    duration: float = 10.0
+    processes: int = 1
+    target: str = 'wsgi'  # 'client', 'wsgi' or 'asgi'
+    seed: int = 1
+    pages: int = 2000
+    zipf_s: float = 1.1
+    static_share: float = 0.15
+    endpoint: Optional[str] = None  # default: local FakeCollector
+    delivery: str = 'batch'
+    transport: str = 'http.client'
+    flush_interval: float = 1.0
+    max_queue_size: int = 100000
+    coalesce_window: Optional[float] = None
+    script_key: str = 'sk_loadgen_key_1234567890'
+
+
+class TrafficModel:
+    """
+    Seedable request distribution
+
+    Paths follow a Zipf law over `pages` pages (a few hot pages, a
+    long tail); a share of requests hit static assets. Draws are made
+    in chunks with random.choices and cumulative weights, so
+    generation stays cheap next to the code under test.
+    """
+
+    def __init__(
+        self,
+        seed: int = 1,
+        pages: int = 2000,
+        zipf_s: float = 1.1,
+        static_share: float = 0.15,
+    ):
+        self.rng = random.Random(seed)
+        self.paths = [f'/blog/post-{rank}' for rank in range(1, pages + 1)]
+        self.path_weights = list(
+            itertools.accumulate(1 / rank**zipf_s for rank in range(1, pages + 1))
+        )
+        self.static_paths = [
+            f'/static/asset-{i}{suffix}'
+            for i in range(50)
+            for suffix in STATIC_SUFFIXES
+        ]
+        self.static_share = static_share
+
+    def _choices(self, table: List[Tuple], k: int) -> List:
+        values, weights = zip(*table)
+        return self.rng.choices(values, weights=weights, k=k)
+
+    def metadata(self) -> Iterator[RequestMetadata]:
+        """Endless stream of RequestMetadata"""
+        rng = self.rng
+        while True:
+            paths = rng.choices(self.paths, cum_weights=self.path_weights, k=CHUNK)
+            user_agents = self._choices(USER_AGENTS, CHUNK)
+            statuses = self._choices(STATUS_CODES, CHUNK)
+            methods = self._choices(METHODS, CHUNK)
+            referrers = self._choices(REFERRERS, CHUNK)
+            for i in range(CHUNK):
+                path = paths[i]
+                if rng.random() < self.static_share:
+                    path = rng.choice(self.static_paths)
+                headers = {'User-Agent': user_agents[i], 'Host': 'www.example.com'}
+                if referrers[i] is not None:
+                    headers['Referer'] = referrers[i]
+                yield {
+                    'path': path,
+                    'method': methods[i],
+                    'headers': headers,
+                    'status_code': statuses[i],
+                }
+
+
+def to_environ(metadata: RequestMetadata) -> dict:
+    """WSGI environ for a request"""
+    environ: Dict[str, Any] = {
+        'REQUEST_METHOD': metadata['method'],
+        'PATH_INFO': metadata['path'],
+        'SERVER_NAME': 'www.example.com',
+        'SERVER_PORT': '443',
+        'wsgi.url_scheme': 'https',
+        'surfgeo.loadgen.status': metadata['status_code'],
+    }
+    for name, value in metadata['headers'].items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+def to_scope(metadata: RequestMetadata) -> dict:
+    """ASGI HTTP scope for a request"""
+    return {
+        'type': 'http',
+        'method': metadata['method'],
+        'path': metadata['path'],
+        'headers': [
+            (name.lower().encode('latin1'), str(value).encode('latin1'))
+            for name, value in metadata['headers'].items()
+        ],
+        'surfgeo.loadgen.status': metadata['status_code'],
+    }
+
+
+BODY = b'x' * 2048
+
+
+def stub_wsgi_app(environ: dict, start_response: Callable) -> List[bytes]:
+    status = environ['surfgeo.loadgen.status']
+    start_response(
+        f'{status} OK',
+        [('Content-Type', 'text/html'), ('Content-Length', str(len(BODY)))],
+    )
+    return [BODY]
+
+
+async def stub_asgi_app(scope: dict, receive: Callable, send: Callable) -> None:
+    await send(
+        {
+            'type': 'http.response.start',
+            'status': scope['surfgeo.loadgen.status'],
+            'headers': [(b'content-type', b'text/html')],
+        }
+    )
+    await send({'type': 'http.response.body', 'body': BODY})
+
+
+class _Pacer:
+    """Spaces requests at a fixed rate; reports how far behind it fell"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self.started = time.perf_counter()
+        self.next = self.started
+
+    def delay(self) -> float:
+        """Seconds to wait before the next request (0 when behind)"""
+        self.next += self.interval
+        return self.next - time.perf_counter()
+
+
+def _queue_depth(client: surfgeoClient) -> int:
+    queued = client.stats().get('queued')
+    if queued is not None:
+        return int(queued)
+    # Thread delivery: sender threads in flight
+    return max(threading.active_count() - 1, 0)
+
+
+def run_worker(config: LoadConfig, index: int) -> Dict:
+    """
+    Drive one process's share of the load
+
+    Returns:
+        Per-process counters (merged by run())
+    """
+    client = surfgeoClient(surfgeoConfig(
+        script_key=config.script_key,
+        endpoint=config.endpoint,
+        transport=config.transport,
+        delivery=config.delivery,
+        flush_interval=config.flush_interval,
+        max_queue_size=config.max_queue_size,
+        coalesce_window=config.coalesce_window,
+        capture_metrics=True,
+    ))
+    requests = TrafficModel(
+        config.seed + index, config.pages, config.zipf_s, config.static_share
+    ).metadata()
+    rate = config.rate / config.processes
+    count = int(rate * config.duration)
+
+    process_started = time.process_time()
+    main_started = time.thread_time()
+    if config.target == 'asgi':
+        result = asyncio.run(_drive_asgi(client, requests, rate, count))
+    else:
+        result = _drive_sync(client, config.target, requests, rate, count)
+    client.close()
+
+    # Background CPU = process CPU not spent on this (the driving) thread
+    background_cpu = (time.process_time() - process_started) - (
+        time.thread_time() - main_started
+    )
+    result['sdk_cpu_seconds'] = result.pop('request_cpu') + max(background_cpu, 0.0)
+    result['dropped'] = client.stats().get('dropped', 0)
+    return result
+
+
+def _drive_sync(client: surfgeoClient, target: str, requests: Iterator[RequestMetadata],
+                rate: float, count: int) -> Dict:
+    if target == 'wsgi':
+        from surfgeo.middleware.wsgi import surfgeoWSGIMiddleware
+
+        middleware = surfgeoWSGIMiddleware(stub_wsgi_app, client=client)
+
+        def start_response(status: str, headers: List, exc_info: Any = None) -> None:
+            return None
+
+        def handle(metadata: RequestMetadata) -> float:
+            environ = to_environ(metadata)
+            started = time.thread_time()
+            body = middleware(environ, start_response)
+            for _ in body:
+                pass
+            body.close()
+            return time.thread_time() - started
+    else:
+        def handle(metadata: RequestMetadata) -> float:
+            started = time.thread_time()
+            client.track(
+                build_event(
+                    metadata['path'],
+                    metadata['method'],
+                    metadata['headers'],
+                    metadata['status_code'],
+                    len(BODY),
+                    0.25,
+                )
+            )
+            return time.thread_time() - started
+
+    pacer = _Pacer(rate)
+    request_cpu = 0.0
+    depths: List[int] = []
+    next_sample = time.perf_counter() + SAMPLE_INTERVAL
+
+    for _ in range(count):
+        delay = pacer.delay()
+        if delay > 0.001:
+            time.sleep(delay)
+        request_cpu += handle(next(requests))
+        if time.perf_counter() >= next_sample:
+            depths.append(_queue_depth(client))
+            next_sample += SAMPLE_INTERVAL
+
+    return _result(count, time.perf_counter() - pacer.started, request_cpu, depths)
+
+
+async def _drive_asgi(client: surfgeoClient, requests: Iterator[RequestMetadata],
+                      rate: float, count: int) -> Dict:
+    from surfgeo.middleware.asgi import surfgeoASGIMiddleware
+
+    middleware = surfgeoASGIMiddleware(stub_asgi_app, client=client)
+
+    async def receive() -> Dict:
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message: Dict) -> None:
+        pass
+
+    pacer = _Pacer(rate)
+    request_cpu = 0.0
+    depths: List[int] = []
+    next_sample = time.perf_counter() + SAMPLE_INTERVAL
+
+    for _ in range(count):
+        delay = pacer.delay()
+        if delay > 0.001:
+            await asyncio.sleep(delay)
+        scope = to_scope(next(requests))
+        started = time.thread_time()
+        await middleware(scope, receive, send)
+        request_cpu += time.thread_time() - started
+        if time.perf_counter() >= next_sample:
+            depths.append(_queue_depth(client))
+            next_sample += SAMPLE_INTERVAL
+
+    # Let fire-and-forget send tasks finish before the loop closes
+    pending = [
+        task for task in asyncio.all_tasks() if task is not asyncio.current_task()
+    ]
+    if pending:
+        await asyncio.wait(pending, timeout=5)
+
+    return _result(count, time.perf_counter() - pacer.started, request_cpu, depths)
+
+
+def _result(count: int, elapsed: float, request_cpu: float, depths: List[int]) -> Dict:
+    return {
+        'requests': count,
+        'elapsed': elapsed,
+        'request_cpu': request_cpu,
+        'queue_depth_max': max(depths, default=0),
+        'queue_depth_sum': sum(depths),
+        'queue_samples': len(depths),
+    }
+
+
+def run(config: LoadConfig) -> Dict:
+    """
+    Run a load test and return the report
+
+    Starts a FakeCollector (counting only) unless config.endpoint is
+    set; with an external endpoint, delivery figures are not reported.
+    """
+    if config.target not in TARGETS:
+        raise ValueError(f'surfgeo: target must be one of {", ".join(TARGETS)}')
+
+    collector = None
+    if config.endpoint is None:
+        from surfgeo.testing import FakeCollector
+
+        collector = FakeCollector(keep_events=False).start()
+        config = replace(config, endpoint=collector.endpoint)
+
+    started = time.perf_counter()
+    try:
+        # Workers always run in their own processes, so the collector's
+        # CPU never counts as SDK CPU; spawn avoids inheriting its threads
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(config.processes) as pool:
+            results = pool.starmap(
+                run_worker, [(config, index) for index in range(config.processes)]
+            )
+        elapsed = time.perf_counter() - started
+    finally:
+        if collector is not None:
+            collector.stop()
+
+    requests = sum(result['requests'] for result in results)
+    generate_elapsed = max(result['elapsed'] for result in results)
+    sdk_cpu = sum(result['sdk_cpu_seconds'] for result in results)
+    samples = sum(result['queue_samples'] for result in results)
+    report = {
+        'config': asdict(config),
+        'requests': requests,
+        'achieved_rps': requests / generate_elapsed if generate_elapsed else 0.0,
+        'sdk_cpu_seconds': sdk_cpu,
+        'sdk_cpu_us_per_request': sdk_cpu / requests * 1e6 if requests else 0.0,
+        'queue_depth_max': max(result['queue_depth_max'] for result in results),
+        'queue_depth_mean': (
+            sum(result['queue_depth_sum'] for result in results) / samples
+            if samples
+            else 0.0
+        ),
+        'client_dropped': sum(result['dropped'] for result in results),
+    }
+    if collector is not None:
+        report['delivered_events'] = collector.received
+        report['delivered_requests'] = collector.represented
+        report['delivered_rps'] = collector.represented / elapsed if elapsed else 0.0
+        report['drop_rate'] = 1 - collector.represented / requests if requests else 0.0
+    return report
+
+
+def format_report(report: Dict) -> str:
+    config = report['config']
+    lines = [
+        f'target {config["target"]}, delivery {config["delivery"]}, '
+        f'{config["processes"]} process(es), seed {config["seed"]}',
+        f'requests           {report["requests"]} '
+        f'({report["achieved_rps"]:.0f}/s achieved, {config["rate"]:.0f}/s target)',
+        f'sdk cpu            {report["sdk_cpu_seconds"]:.2f}s '
+        f'({report["sdk_cpu_us_per_request"]:.1f} us/request)',
+        f'queue depth        max {report["queue_depth_max"]}, '
+        f'mean {report["queue_depth_mean"]:.0f}',
+        f'client dropped     {report["client_dropped"]}',
+    ]
+    if 'delivered_requests' in report:
+        lines.append(
+            f'delivered          {report["delivered_requests"]} requests '
+            f'in {report["delivered_events"]} events ({report["delivered_rps"]:.0f}/s)'
+        )
+        lines.append(f'drop rate          {report["drop_rate"]:.2%}')
+    return '\n'.join(lines)
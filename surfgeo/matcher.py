@@ -0,0 +1,136 @@
+import re
+from fnmatch import translate
+from typing import Iterable, Optional
+from surfgeo.payload import normalize_path
+
+
+GLOB_CHARS = ('*', '?', '[')
+
+
+class PathMatcher:
+    """
+    Compiled set of path rules
+
+    Rule forms:
+    - '/healthz'   exact match
+    - '/static/*'  prefix match (single trailing '*')
+    - '*.css'      suffix match (single leading '*')
+    - '/api/*/raw' glob (anything else with '*', '?' or '[')
+
+    Paths are matched in their normalized form (see normalize_path), so
+    exact rules are normalized the same way and '/static/*' also matches
+    '/static' itself.
+
+    Rules are compiled once: exact rules into a frozenset, prefixes
+    and suffixes into tuples for str.startswith/endswith, and all
+    globs into a single alternation regex.
+    """
+
+    __slots__ = ('_exact', '_prefixes', '_suffixes', '_pattern')
+
+    def __init__(self, rules: Iterable[str]):
+        exact = set()
+        prefixes = []
+        suffixes = []
+        globs = []
+
+        for rule in rules:
+            if not isinstance(rule, str) or not rule:
+                raise ValueError('surfgeo: path rules must be non-empty strings')
+
+            body = rule.strip('*')
+            if not any(char in body for char in GLOB_CHARS):
+                if rule == '*':
+                    prefixes.append('')
+                    continue
+                if (
+                    rule.endswith('*')
+                    and not rule.startswith('*')
+                    and rule.count('*') == 1
+                ):
+                    prefixes.append(body)
+                    if len(body) > 1 and body.endswith('/'):
+                        exact.add(body[:-1])
+                    continue
+                if (
+                    rule.startswith('*')
+                    and not rule.endswith('*')
+                    and rule.count('*') == 1
+                ):
+                    suffixes.append(body)
+                    continue
+                if '*' not in rule:
+                    exact.add(normalize_path(rule))
+                    continue
+            globs.append(rule)
+
+        self._exact = frozenset(exact)
+        self._prefixes = tuple(prefixes)
+        self._suffixes = tuple(suffixes)
+        self._pattern = (
+            re.compile('|'.join(translate(g) for g in globs)).match if globs else None
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self._exact or self._prefixes or self._suffixes or self._pattern)
+
+    def matches(self, path: str) -> bool:
+        """Return True if path matches any rule"""
+        if path in self._exact:
+            return True
+        if self._prefixes and path.startswith(self._prefixes):
+            return True
+        if self._suffixes and path.endswith(self._suffixes):
+            return True
+        if self._pattern is not None and self._pattern(path) is not None:
+            return True
+        return False
+
+
+class PathFilter:
+    """
+    Include/exclude filter applied before any tracking work
+
+    A path is excluded if it matches an exclude rule, or if include
+    rules are configured and it matches none of them.
+    """
+
+    __slots__ = ('_include', '_exclude')
+
+    def __init__(self, include: Optional[Iterable[str]] = None,
+                 exclude: Optional[Iterable[str]] = None):
+        include_matcher = PathMatcher(include or ())
+        exclude_matcher = PathMatcher(exclude or ())
+        self._include = include_matcher.matches if include_matcher else None
+        self._exclude = exclude_matcher.matches if exclude_matcher else None
+
+    def excluded(self, path: str) -> bool:
+        """
+        Return True if the request for path should not be tracked
+
+        path is the request path without query string (PATH_INFO,
+        scope['path'], request.path). Only the trailing slash is
+        stripped here, which is all normalize_path() changes for such
+        paths, so rules see the path the event will carry.
+        """
+        if len(path) > 1 and path[-1] == '/':
+            path = path[:-1]
+        if self._exclude is not None and self._exclude(path):
+            return True
+        if self._include is not None and not self._include(path):
+            return True
+        return False
+
+
+def compile_path_filter(
+    include: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None
+) -> Optional[PathFilter]:
+    """
+    Compile include/exclude rules
+
+    Returns:
+        PathFilter, or None if no rules are configured
+    """
+    if not include and not exclude:
+        return None
+    return PathFilter(include=include, exclude=exclude)
@@ -1,6 +1,9 @@
-from surfgeo.client import surfgeoClient, surfgeoConfig
-from surfgeo.payload import build_payload
-from typing import Callable
+import time
+from surfgeo.client import surfgeoConfig
+from surfgeo.registry import shared_client
+from surfgeo.headers import asgi_headers
+from surfgeo.payload import build_event
+from typing import Callable, Optional
 
 
 class surfgeoASGIMiddleware:
@@ -20,21 +23,22 @@ class surfgeoASGIMiddleware:
 
         Args:
             app: ASGI application callable
+            client: Existing surfgeoClient to use instead of **config (optional)
             **config: Configuration options
         """
         self.app = app
 
+        # Share an existing client if given (e.g. surfgeo.serverless)
+        client = config.pop('client', None)
+        if client is not None:
+            self.client = client
+            return
+
         # Create config
-        surf_config = surfgeoConfig(
-            script_key=config.get('script_key', ''),
-            endpoint=config.get('endpoint'),
-            timeout=config.get('timeout', 0.05),
-            debug=config.get('debug', False),
-            enabled=config.get('enabled', True)
-        )
+        surf_config = surfgeoConfig.from_dict(config)
 
-        # Initialize client
-        self.client = surfgeoClient(surf_config)
+        # Shared client for this config (one per process, see surfgeo.registry)
+        self.client = shared_client(surf_config, owner=self)
 
     async def __call__(self, scope: dict, receive: Callable, send: Callable):
         """
@@ -45,47 +49,61 @@ class surfgeoASGIMiddleware:
             receive: Receive callable
             send: Send callable
         """
-        # Only process HTTP requests
-        if scope['type'] != 'http':
+        # Only process HTTP requests, skipping excluded paths
+        path = scope.get('path', '/')
+        if scope['type'] != 'http' or self.client.excludes(path):
             await self.app(scope, receive, send)
             return
 
-        # Capture status code
+        # Capture status code and body size
         status_code = [200]
+        body_bytes = [0]
 
         async def custom_send(message):
             # Capture status from response.start message
             if message['type'] == 'http.response.start':
                 status_code[0] = message['status']
+            elif message['type'] == 'http.response.body':
+                body_bytes[0] += len(message.get('body', b''))
             await send(message)
 
         # Call wrapped app
+        started_ns = time.perf_counter_ns()
         await self.app(scope, receive, custom_send)
-
-        # Extract metadata
-        metadata = {
-            'path': scope.get('path', '/'),
-            'method': scope.get('method', 'GET'),
-            'headers': self._extract_headers_from_scope(scope),
-            'status_code': status_code[0]
-        }
-
-        # Build payload
-        payload = build_payload(metadata)
+        elapsed_ns = time.perf_counter_ns() - started_ns
+
+        # Build event
+        response_bytes: Optional[int]
+        duration_ms: Optional[float]
+        if self.client.config.capture_metrics:
+            response_bytes, duration_ms = body_bytes[0], elapsed_ns / 1e6
+        else:
+            response_bytes = duration_ms = None
+        allowlist = self.client.header_allowlist
+        verifier = self.client.bot_verifier
+        event = build_event(
+            path,
+            scope.get('method', 'GET'),
+            self._extract_headers_from_scope(scope),
+            status_code[0],
+            response_bytes,
+            duration_ms,
+            (
+                allowlist.from_asgi(scope.get('headers', ()))
+                if allowlist is not None
+                else None
+            ),
+            verifier.client_ip_from_scope(scope) if verifier is not None else None,
+        )
 
         # Track async
-        await self.client.track_async(payload)
+        await self.client.track_async(event)
 
     def _extract_headers_from_scope(self, scope: dict) -> dict:
         """
-        Extract headers from ASGI scope
+        Extract the headers tracking needs from ASGI scope
 
-        ASGI stores headers as list of tuples (bytes)
+        ASGI stores headers as list of tuples (bytes); only the few
+        that are needed are decoded
         """
-        headers = {}
-        for header_name, header_value in scope.get('headers', []):
-            name = header_name.decode('latin1')
-            value = header_value.decode('latin1')
-            headers[name] = value
-        return headers
-
+        return asgi_headers(scope.get('headers', ()))
@@ -1,7 +1,24 @@
-from typing import Callable
+import time
+from typing import Any, Callable
 from django.http import HttpRequest, HttpResponse
-from surfgeo.client import surfgeoClient, surfgeoConfig
-from surfgeo.payload import build_payload
+from surfgeo.client import surfgeoConfig
+from surfgeo.registry import shared_client
+from surfgeo.event import Event
+from surfgeo.headers import environ_headers
+from surfgeo.payload import build_event
+
+try:
+    from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+except ImportError:  # asgiref < 3.6.0 (Django < 4.2)
+    import asyncio
+
+    iscoroutinefunction = asyncio.iscoroutinefunction  # type: ignore[assignment]
+
+    def markcoroutinefunction(func: Any) -> Any:
+        # Private marker asyncio used before Python 3.12
+        marker = asyncio.coroutines._is_coroutine  # type: ignore[attr-defined]
+        func._is_coroutine = marker
+        return func
 
 
 class surfgeoMiddleware:
@@ -20,6 +37,9 @@ class surfgeoMiddleware:
         }
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response: Callable):
         """
         Initialize middleware once when Django starts
@@ -27,8 +47,9 @@ class surfgeoMiddleware:
         Steps:
         1. Store get_response callable
         2. Load config from Django settings
-        3. Initialize surfgeoClient
+        3. Get the shared surfgeoClient for this config
         4. Validate config
+        5. Detect async chain (ASGI) and mark self as a coroutine function
         """
         self.get_response = get_response
 
@@ -37,16 +58,15 @@ class surfgeoMiddleware:
         config_dict = getattr(settings, 'surfgeo_CONFIG', {})
 
         # Create config object
-        self.config = surfgeoConfig(
-            script_key=config_dict.get('script_key', ''),
-            endpoint=config_dict.get('endpoint'),
-            timeout=config_dict.get('timeout', 0.05),
-            debug=config_dict.get('debug', False),
-            enabled=config_dict.get('enabled', True)
-        )
+        self.config = surfgeoConfig.from_dict(config_dict)
+
+        # Shared client for this config (one per process, see surfgeo.registry)
+        self.client = shared_client(self.config, owner=self)
 
-        # Initialize client
-        self.client = surfgeoClient(self.config)
+        # Run natively async when the rest of the chain is async (ASGI)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
         """
@@ -54,38 +74,88 @@ class surfgeoMiddleware:
 
         Flow:
         1. Call next middleware/view (get response)
-        2. Extract metadata after response is ready
+        2. Build event after response is ready
         3. Track in background (non-blocking)
         4. Return response immediately
         """
+        # Under ASGI, hand back a coroutine instead of being adapted
+        if self.async_mode:
+            return self.__acall__(request)
+
+        # Skip excluded paths before any other work
+        if self.client.excludes(request.path):
+            return self.get_response(request)
+
         # Get response first (middleware chain)
+        started_ns = time.perf_counter_ns()
         response = self.get_response(request)
+        elapsed_ns = time.perf_counter_ns() - started_ns
 
-        # Extract metadata after response is ready
-        # Handle both Django 2.2+ (headers) and older (META)
-        headers = {}
-        if hasattr(request, 'headers'):
-            headers = dict(request.headers)
-        else:
-            # Fallback for older Django versions
-            for key, value in request.META.items():
-                if key.startswith('HTTP_'):
-                    header_name = key[5:].replace('_', '-').title()
-                    headers[header_name] = value
-
-        metadata = {
-            'path': request.path,
-            'method': request.method,
-            'headers': headers,
-            'status_code': response.status_code
-        }
-
-        # Build payload
-        payload = build_payload(metadata)
+        # Build event
+        event = self._build_event(request, response, elapsed_ns)
 
         # Track (fire-and-forget, doesn't block)
-        self.client.track(payload)
+        self.client.track(event)
+
+        # Return response immediately
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Process request (async, under ASGI)
+
+        Same flow as __call__, but awaits the async middleware chain and
+        tracks on the event loop, so no sync/async thread hops are added.
+        """
+        # Skip excluded paths before any other work
+        if self.client.excludes(request.path):
+            return await self.get_response(request)
+
+        # Get response first (middleware chain)
+        started_ns = time.perf_counter_ns()
+        response = await self.get_response(request)
+        elapsed_ns = time.perf_counter_ns() - started_ns
+
+        # Build event
+        event = self._build_event(request, response, elapsed_ns)
+
+        # Track async (fire-and-forget task on the running loop)
+        await self.client.track_async(event)
 
         # Return response immediately
         return response
 
+    def _build_event(self, request: HttpRequest, response: HttpResponse,
+                     elapsed_ns: int) -> Event:
+        """Build the tracking event after response is ready"""
+        # Direct META lookups: request.headers would copy every header
+        headers = environ_headers(request.META)
+        allowlist = self.client.header_allowlist
+        verifier = self.client.bot_verifier
+
+        response_bytes = duration_ms = None
+        if self.config.capture_metrics:
+            if response.has_header('Content-Length'):
+                # A malformed header must not turn the response into a 500
+                content_length = response['Content-Length']
+                response_bytes = (
+                    int(content_length) if content_length.isdigit() else None
+                )
+            elif not response.streaming:
+                response_bytes = len(response.content)
+            duration_ms = elapsed_ns / 1e6
+
+        return build_event(
+            request.path,
+            request.method,
+            headers,
+            response.status_code,
+            response_bytes,
+            duration_ms,
+            allowlist.from_environ(request.META) if allowlist is not None else None,
+            (
+                verifier.client_ip_from_environ(request.META)
+                if verifier is not None
+                else None
+            ),
+        )
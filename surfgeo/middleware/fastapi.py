@@ -1,7 +1,10 @@
+import time
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from surfgeo.client import surfgeoClient, surfgeoConfig
-from surfgeo.payload import build_payload
+from starlette.types import Receive, Scope, Send
+from surfgeo.client import surfgeoConfig
+from surfgeo.registry import shared_client
+from surfgeo.payload import build_event
 
 
 class surfgeoMiddleware(BaseHTTPMiddleware):
@@ -27,16 +30,22 @@ class surfgeoMiddleware(BaseHTTPMiddleware):
         super().__init__(app)
 
         # Create config
-        surf_config = surfgeoConfig(
-            script_key=config.get('script_key', ''),
-            endpoint=config.get('endpoint'),
-            timeout=config.get('timeout', 0.05),
-            debug=config.get('debug', False),
-            enabled=config.get('enabled', True)
-        )
+        surf_config = surfgeoConfig.from_dict(config)
+
+        # Shared client for this config (one per process, see surfgeo.registry)
+        self.client = shared_client(surf_config, owner=self)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        ASGI entry point
 
-        # Initialize client
-        self.client = surfgeoClient(surf_config)
+        Excluded paths go straight to the wrapped app, bypassing
+        BaseHTTPMiddleware's request/response wrapping entirely.
+        """
+        if scope['type'] == 'http' and self.client.excludes(scope.get('path', '/')):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
 
     async def dispatch(self, request: Request, call_next):
         """
@@ -50,22 +59,42 @@ class surfgeoMiddleware(BaseHTTPMiddleware):
         5. Return response
         """
         # Call next middleware/handler
+        started_ns = time.perf_counter_ns()
         response = await call_next(request)
+        elapsed_ns = time.perf_counter_ns() - started_ns
 
-        # Extract metadata
-        metadata = {
-            'path': request.url.path,
-            'method': request.method,
-            'headers': dict(request.headers),
-            'status_code': response.status_code
-        }
-
-        # Build payload
-        payload = build_payload(metadata)
+        # Build event
+        response_bytes = duration_ms = None
+        if self.client.config.capture_metrics:
+            # Body is still streaming here; size is known only if declared
+            content_length = response.headers.get('content-length')
+            if content_length is not None and content_length.isdigit():
+                response_bytes = int(content_length)
+            duration_ms = elapsed_ns / 1e6
+        allowlist = self.client.header_allowlist
+        verifier = self.client.bot_verifier
+        event = build_event(
+            request.url.path,
+            request.method,
+            request.headers,
+            response.status_code,
+            response_bytes,
+            duration_ms,
+            # One pass over the raw scope headers
+            (
+                allowlist.from_asgi(request.scope['headers'])
+                if allowlist is not None
+                else None
+            ),
+            (
+                verifier.client_ip_from_scope(request.scope)
+                if verifier is not None
+                else None
+            ),
+        )
 
         # Track async (fire-and-forget)
-        await self.client.track_async(payload)
+        await self.client.track_async(event)
 
         # Return response
         return response
-
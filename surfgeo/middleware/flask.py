@@ -1,6 +1,21 @@
-from flask import Flask, request
+import time
+from dataclasses import fields
+from functools import partial
+from typing import Any, Optional
+from flask import Flask, Response, request
 from surfgeo.client import surfgeoClient, surfgeoConfig
-from surfgeo.payload import build_payload
+from surfgeo.registry import shared_client
+from surfgeo.payload import build_event
+
+
+# WSGI environ key holding the request start time
+STARTED_NS_KEY = 'surfgeo.started_ns'
+
+# surfgeoConfig fields loaded generically from kwargs or surfgeo_<NAME>
+EXTRA_OPTIONS = tuple(
+    field.name for field in fields(surfgeoConfig)
+    if field.name not in ('script_key', 'endpoint', 'timeout', 'debug', 'enabled')
+)
 
 
 class surfgeo:
@@ -24,7 +39,7 @@ class surfgeo:
             app: Flask application (optional)
             **config: Configuration options
         """
-        self.client = None
+        self.client: Optional[surfgeoClient] = None
 
         if app is not None:
             self.init_app(app, **config)
@@ -37,7 +52,8 @@ class surfgeo:
         1. Load config from app.config or kwargs
         2. Create surfgeoConfig
         3. Initialize client
-        4. Register after_request handler
+        4. Register before_request timer and after_request handler
+           (tracks on response close)
         """
         # Load config (priority: kwargs > app.config > defaults)
         script_key = config.get('script_key') or \
@@ -55,29 +71,50 @@ class surfgeo:
         enabled = config.get('enabled', True) and \
                   app.config.get('surfgeo_ENABLED', True)
 
+        # Remaining options follow the same kwargs > app.config rule,
+        # e.g. exclude=[...] or app.config['surfgeo_EXCLUDE']
+        extra = {}
+        for name in EXTRA_OPTIONS:
+            value = config.get(name, app.config.get('surfgeo_' + name.upper()))
+            if value is not None:
+                extra[name] = value
+
         # Create config
         surf_config = surfgeoConfig(
             script_key=script_key or '',
             endpoint=endpoint,
             timeout=timeout,
             debug=debug,
-            enabled=enabled
+            enabled=enabled,
+            **extra
         )
 
-        # Initialize client
-        self.client = surfgeoClient(surf_config)
+        # Shared client for this config (one per process, see surfgeo.registry)
+        self.client = shared_client(surf_config, owner=app)
 
-        # Register after_request handler
+        # Register timer and after_request handler
+        if surf_config.capture_metrics:
+            app.before_request(self._start_timer)
         app.after_request(self._track_request)
 
         # Store in app extensions
         app.extensions['surfgeo'] = self
 
+    def _start_timer(self) -> None:
+        """Record when the request reached Flask"""
+        client = self.client
+        assert client is not None, 'init_app registers this hook'
+        if client.excludes(request.path):
+            return
+        request.environ[STARTED_NS_KEY] = time.perf_counter_ns()
+
     def _track_request(self, response):
         """
-        Track request after response is ready
+        Schedule tracking for when the response is closed
 
-        Called by Flask after each request
+        Called by Flask after each request. Only cheap references are
+        captured here; event building and tracking run from
+        response.call_on_close, after the body has been sent.
 
         Args:
             response: Flask Response object
@@ -85,20 +122,58 @@ class surfgeo:
         Returns:
             response (unmodified)
         """
-        # Extract metadata
-        metadata = {
-            'path': request.path,
-            'method': request.method,
-            'headers': dict(request.headers),
-            'status_code': response.status_code
-        }
-
-        # Build payload
-        payload = build_payload(metadata)
+        # Skip excluded paths before any other work
+        path = request.path
+        if self.client.excludes(path):
+            return response
+
+        # Processing time up to the response being ready
+        started_ns = request.environ.get(STARTED_NS_KEY)
+        elapsed_ns = (
+            time.perf_counter_ns() - started_ns if started_ns is not None else None
+        )
 
-        # Track (non-blocking)
-        self.client.track(payload)
+        # Headers view over the WSGI environ, read only on close
+        response.call_on_close(
+            partial(
+                self._send, path, request.method, request.headers, response, elapsed_ns
+            )
+        )
 
         # Return response unchanged
         return response
 
+    def _send(self, path: str, method: str, headers: Any,
+              response: Response, elapsed_ns: Optional[int]) -> None:
+        """Build and send the event once the response is closed"""
+        client = self.client
+        assert client is not None, 'init_app registers this hook'
+
+        # Build event
+        response_bytes = duration_ms = None
+        if elapsed_ns is not None:
+            response_bytes = response.calculate_content_length()
+            duration_ms = elapsed_ns / 1e6
+        allowlist = client.header_allowlist
+        captured = (
+            allowlist.from_environ(headers.environ) if allowlist is not None else None
+        )
+        verifier = client.bot_verifier
+        client_ip = (
+            verifier.client_ip_from_environ(headers.environ)
+            if verifier is not None
+            else None
+        )
+        event = build_event(
+            path,
+            method,
+            headers,
+            response.status_code,
+            response_bytes,
+            duration_ms,
+            captured,
+            client_ip,
+        )
+
+        # Track (non-blocking)
+        client.track(event)
@@ -1,6 +1,9 @@
-from surfgeo.client import surfgeoClient, surfgeoConfig
-from surfgeo.payload import build_payload
-from typing import Callable, Iterable
+import time
+from surfgeo.client import surfgeoConfig
+from surfgeo.registry import shared_client
+from surfgeo.headers import environ_headers
+from surfgeo.payload import build_event
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
 
 
 class surfgeoWSGIMiddleware:
@@ -23,21 +26,22 @@ class surfgeoWSGIMiddleware:
 
         Args:
             app: WSGI application callable
+            client: Existing surfgeoClient to use instead of **config (optional)
             **config: Configuration options
         """
         self.app = app
 
+        # Share an existing client if given (e.g. surfgeo.serverless)
+        client = config.pop('client', None)
+        if client is not None:
+            self.client = client
+            return
+
         # Create config
-        surf_config = surfgeoConfig(
-            script_key=config.get('script_key', ''),
-            endpoint=config.get('endpoint'),
-            timeout=config.get('timeout', 0.05),
-            debug=config.get('debug', False),
-            enabled=config.get('enabled', True)
-        )
+        surf_config = surfgeoConfig.from_dict(config)
 
-        # Initialize client
-        self.client = surfgeoClient(surf_config)
+        # Shared client for this config (one per process, see surfgeo.registry)
+        self.client = shared_client(surf_config, owner=self)
 
     def __call__(self, environ: dict, start_response: Callable):
         """
@@ -50,52 +54,142 @@ class surfgeoWSGIMiddleware:
         Returns:
             Iterable of response body
         """
-        # Capture status code via wrapper
-        status_code = [200]  # Mutable container
-
-        def custom_start_response(status, response_headers, exc_info=None):
-            # Extract status code
-            status_code[0] = int(status.split()[0])
-            return start_response(status, response_headers, exc_info)
-
-        # Call wrapped app
-        response = self.app(environ, custom_start_response)
-
-        # Extract metadata
-        metadata = {
-            'path': environ.get('PATH_INFO', '/'),
-            'method': environ.get('REQUEST_METHOD', 'GET'),
-            'headers': self._extract_headers_from_environ(environ),
-            'status_code': status_code[0]
-        }
-
-        # Build payload
-        payload = build_payload(metadata)
+        # Skip excluded paths before any other work
+        path = environ.get('PATH_INFO', '/')
+        if self.client.excludes(path):
+            return self.app(environ, start_response)
+
+        # Capture status code, headers and timing via wrapper
+        state = _ResponseState(environ, path, start_response)
+
+        # Call wrapped app; duration_ms is the time it takes to return,
+        # as in the other middleware, not the client's download time
+        response = self.app(environ, state.start_response)
+        state.elapsed_ns = time.perf_counter_ns() - state.started_ns
+
+        # File responses go back unwrapped so the server can still use
+        # sendfile; everything else is tracked once the server closes it
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if isinstance(file_wrapper, type) and isinstance(response, file_wrapper):
+            state.bytes_sent = state.content_length()
+            self._track_response(state)
+            return response
+
+        return _TrackedResponse(response, state, self._track_response)
+
+    def _track_response(self, state: '_ResponseState') -> None:
+        """Build and send the payload once the response is complete"""
+        environ = state.environ
+
+        # Build event
+        response_bytes: Optional[int]
+        duration_ms: Optional[float]
+        if self.client.config.capture_metrics:
+            response_bytes = state.bytes_sent
+            duration_ms = state.elapsed_ns / 1e6
+        else:
+            response_bytes = duration_ms = None
+        allowlist = self.client.header_allowlist
+        verifier = self.client.bot_verifier
+        event = build_event(
+            state.path,
+            environ.get('REQUEST_METHOD', 'GET'),
+            self._extract_headers_from_environ(environ),
+            state.status_code,
+            response_bytes,
+            duration_ms,
+            allowlist.from_environ(environ) if allowlist is not None else None,
+            verifier.client_ip_from_environ(environ) if verifier is not None else None
+        )
 
         # Track (non-blocking)
-        self.client.track(payload)
-
-        # Return response
-        return response
+        self.client.track(event)
 
     def _extract_headers_from_environ(self, environ: dict) -> dict:
         """
-        Extract HTTP headers from WSGI environ
+        Extract the HTTP headers tracking needs from WSGI environ
 
-        WSGI stores headers as HTTP_* keys
+        WSGI stores headers as HTTP_* keys; the few that are needed are
+        looked up directly instead of copying every header
         """
-        headers = {}
-        for key, value in environ.items():
-            if key.startswith('HTTP_'):
-                # Convert HTTP_USER_AGENT to User-Agent
-                header_name = key[5:].replace('_', '-').title()
-                headers[header_name] = value
-
-        # Special cases
-        if 'CONTENT_TYPE' in environ:
-            headers['Content-Type'] = environ['CONTENT_TYPE']
-        if 'CONTENT_LENGTH' in environ:
-            headers['Content-Length'] = environ['CONTENT_LENGTH']
+        return environ_headers(environ)
+
+
+class _ResponseState:
+    """Response details captured while a request is served"""
+
+    __slots__ = ('environ', 'path', 'status_code', 'response_headers',
+                 'bytes_sent', 'started_ns', 'elapsed_ns', '_start_response')
+
+    def __init__(self, environ: dict, path: str, start_response: Callable):
+        self.environ = environ
+        self.path = path
+        self.status_code = 200
+        self.response_headers: List[Tuple[str, str]] = []
+        # File responses report their Content-Length, which may be missing
+        self.bytes_sent: Optional[int] = 0
+        self.started_ns = time.perf_counter_ns()
+        self.elapsed_ns = 0
+        self._start_response = start_response
+
+    def start_response(
+        self,
+        status: str,
+        response_headers: List[Tuple[str, str]],
+        exc_info: Any = None,
+    ) -> Any:
+        # Extract status code
+        self.status_code = int(status.split()[0])
+        self.response_headers = response_headers
+        return self._start_response(status, response_headers, exc_info)
+
+    def content_length(self) -> Optional[int]:
+        """Content-Length response header, if the app set one"""
+        for name, value in self.response_headers:
+            if name.lower() == 'content-length':
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
+
+
+class _TrackedResponse:
+    """
+    Response iterable wrapper
 
-        return headers
+    Counts body bytes as the server iterates and calls on_close once
+    the server closes the response, after the last byte has gone out.
+    """
 
+    __slots__ = ('_iterable', '_state', '_on_close', '_closed')
+
+    def __init__(self, iterable: Iterable, state: _ResponseState, on_close: Callable):
+        self._iterable = iterable
+        self._state = state
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        state = self._state
+        sent = 0
+        for chunk in self._iterable:
+            sent += len(chunk)
+            state.bytes_sent = sent
+            yield chunk
+
+    def __len__(self) -> int:
+        # Lets servers keep their single-chunk Content-Length shortcut;
+        # raises TypeError for generators, which servers expect
+        return len(self._iterable)  # type: ignore[arg-type]
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            close = getattr(self._iterable, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._on_close(self._state)
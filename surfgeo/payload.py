@@ -1,7 +1,7 @@
 import time
-import uuid
-from typing import Dict, Optional, Union
+from typing import Dict, Mapping, Optional
 from urllib.parse import urlparse
+from surfgeo.event import Event, intern
 from surfgeo.types import RequestMetadata, TrackingPayload
 
 
@@ -15,15 +15,48 @@ def build_payload(metadata: RequestMetadata) -> TrackingPayload:
     Returns:
         Contract-compliant payload
     """
-    return {
-        'timestamp': int(time.time()),
-        'path': normalize_path(metadata['path']),
-        'method': metadata['method'].upper(),
-        'status_code': metadata.get('status_code', 200),
-        'user_agent': extract_user_agent(metadata['headers']),
-        'referrer': extract_referrer(metadata['headers']),
-        'request_id': str(uuid.uuid4())
-    }
+    return build_event(
+        metadata['path'],
+        metadata['method'],
+        metadata['headers'],
+        metadata.get('status_code', 200),
+        metadata.get('response_bytes'),
+        metadata.get('duration_ms')
+    ).request_fields()
+
+
+def build_event(
+    path: str,
+    method: str,
+    headers: Mapping,
+    status_code: Optional[int] = 200,
+    response_bytes: Optional[int] = None,
+    duration_ms: Optional[float] = None,
+    captured_headers: Optional[Dict[str, str]] = None,
+    client_ip: Optional[str] = None,
+) -> Event:
+    """
+    Build a compact event from request details
+
+    Middleware use this instead of build_payload(), so no metadata or
+    payload dicts are allocated per request; the client serializes the
+    event when it is sent. captured_headers (from the capture_headers
+    allowlist) become the payload's `headers` field; client_ip is only
+    used to verify bot claims.
+    """
+    return Event(
+        int(time.time()),
+        intern(normalize_path(path)),
+        intern(method.upper()),
+        status_code,
+        intern(extract_user_agent(headers)),
+        extract_referrer(headers),
+        response_bytes,
+        round(duration_ms, 3) if duration_ms is not None else None,
+        host=extract_host(headers),
+        headers=captured_headers,
+        client_ip=client_ip
+    )
 
 
 def normalize_path(path: str) -> str:
@@ -43,7 +76,7 @@ def normalize_path(path: str) -> str:
     return normalized
 
 
-def extract_user_agent(headers: Dict) -> str:
+def extract_user_agent(headers: Mapping) -> str:
     """
     Extract User-Agent from headers
 
@@ -60,7 +93,7 @@ def extract_user_agent(headers: Dict) -> str:
     return 'Unknown'
 
 
-def extract_referrer(headers: Dict) -> Optional[str]:
+def extract_referrer(headers: Mapping) -> Optional[str]:
     """
     Extract Referer header
 
@@ -74,3 +107,17 @@ def extract_referrer(headers: Dict) -> Optional[str]:
             return value
     return None
 
+
+def extract_host(headers: Mapping) -> Optional[str]:
+    """
+    Extract Host header
+
+    Used to route events to a script key in multi-site setups
+    """
+    for key in ['Host', 'host', 'HOST']:
+        if key in headers:
+            value = headers[key]
+            if isinstance(value, list):
+                return value[0] if value else None
+            return value
+    return None
@@ -0,0 +1,150 @@
+import atexit
+import threading
+import weakref
+from dataclasses import fields
+from typing import Any, Dict, Hashable, Optional, Tuple, cast
+from surfgeo.client import DEFAULT_ENDPOINT, surfgeoClient
+from surfgeo.types import surfgeoConfig
+
+
+class _Entry:
+    """A shared client and the number of holders using it"""
+
+    __slots__ = ('client', 'refs')
+
+    def __init__(self, client: surfgeoClient):
+        self.client = client
+        self.refs = 0
+
+
+def config_key(config: surfgeoConfig) -> Tuple:
+    """
+    Hashable key for the effective configuration
+
+    Defaults the client would fill in (endpoint) are applied first, so
+    configs that behave the same share a client. Lists become tuples
+    and dicts sorted item tuples; transport instances compare by
+    identity.
+    """
+    values = []
+    for field in fields(config):
+        value = getattr(config, field.name)
+        if field.name == 'endpoint':
+            value = value or DEFAULT_ENDPOINT
+        values.append(_freeze(value))
+    return tuple(values)
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return cast(Hashable, value)
+
+
+class ClientRegistry:
+    """
+    Process-wide pool of clients keyed on effective configuration
+
+    Each middleware instance acquires its client here, so several apps
+    mounted in one process with the same options share one client (and
+    its transport pool, buffers and flusher thread). Clients are
+    reference-counted: the last release closes the client, sending any
+    pending events. Clients still held at interpreter exit are closed
+    by shutdown(), registered with atexit.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple, _Entry] = {}
+        self._keys: Dict[int, Tuple] = {}
+        self._lock = threading.Lock()
+
+    def acquire(
+        self, config: surfgeoConfig, owner: Optional[Any] = None
+    ) -> surfgeoClient:
+        """
+        Get the shared client for a config, creating it on first use
+
+        Args:
+            config: Configuration options
+            owner: Object holding the client (e.g. a middleware instance);
+                the client is released when the owner is garbage collected
+
+        Raises:
+            ValueError: If configuration is invalid
+        """
+        key = config_key(config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(surfgeoClient(config))
+                self._entries[key] = entry
+                self._keys[id(entry.client)] = key
+            entry.refs += 1
+            client = entry.client
+
+        if owner is not None:
+            # Release off the collecting thread; closing may send events
+            finalizer = weakref.finalize(owner, self._release_in_background, client)
+            finalizer.atexit = False
+        return client
+
+    def release(self, client: surfgeoClient) -> None:
+        """
+        Drop one reference; the last one closes the client
+
+        Clients not obtained from acquire() are ignored.
+        """
+        with self._lock:
+            key = self._keys.get(id(client))
+            if key is None:
+                return
+            entry = self._entries[key]
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            del self._entries[key]
+            del self._keys[id(client)]
+        client.close()
+
+    def shutdown(self) -> None:
+        """Close every shared client, flushing pending events"""
+        with self._lock:
+            clients = [entry.client for entry in self._entries.values()]
+            self._entries.clear()
+            self._keys.clear()
+        for client in clients:
+            client.close()
+
+    def __len__(self) -> int:
+        """Number of distinct shared clients"""
+        return len(self._entries)
+
+    def refs(self, client: surfgeoClient) -> int:
+        """Current holders of a shared client (0 if not registered)"""
+        with self._lock:
+            key = self._keys.get(id(client))
+            return self._entries[key].refs if key is not None else 0
+
+    def _release_in_background(self, client: surfgeoClient) -> None:
+        threading.Thread(
+            target=self.release, args=(client,), name='surfgeo-release', daemon=True
+        ).start()
+
+
+# Default process-wide registry used by the middleware
+registry = ClientRegistry()
+atexit.register(registry.shutdown)
+
+
+def shared_client(config: surfgeoConfig, owner: Optional[Any] = None) -> surfgeoClient:
+    """Get the process-wide shared client for a config (see ClientRegistry)"""
+    return registry.acquire(config, owner)
+
+
+def release_client(client: surfgeoClient) -> None:
+    """Release a client obtained from shared_client()"""
+    registry.release(client)
@@ -0,0 +1,110 @@
+"""
+Endpoint DNS cache
+
+Keeps the endpoint's address resolved in the background so sends
+connect straight to an IP. An expired entry keeps being used while a
+background thread re-resolves it; only a process that has never
+resolved the host falls back to resolving on the send path.
+
+getaddrinfo does not expose record TTLs, so entries live for a fixed
+ttl (the dns_ttl option).
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+from typing import Optional, Tuple
+
+
+DEFAULT_TTL = 60.0
+
+
+class DNSCache:
+    """
+    Cached address for one host and port
+
+    Args:
+        host: Hostname to resolve
+        port: Port (used to pick stream addresses)
+        ttl: Seconds before an entry is refreshed
+    """
+
+    def __init__(self, host: str, port: int, ttl: float = DEFAULT_TTL):
+        self.host = host
+        self.port = port
+        self.ttl = ttl
+        self._address: Optional[str] = None
+        self._expires = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        try:
+            # IP literals never need resolving
+            self._address = str(ipaddress.ip_address(host))
+            self._expires = float('inf')
+        except ValueError:
+            pass
+
+    def address(self) -> Optional[str]:
+        """
+        Cached address, never blocking
+
+        Starts a background refresh when the entry has expired and keeps
+        returning the old address until it completes.
+        """
+        if time.monotonic() >= self._expires:
+            self.refresh_in_background()
+        return self._address
+
+    def refresh(self) -> Optional[str]:
+        """Resolve now; on failure the previous address is kept"""
+        try:
+            infos = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM)
+        except OSError:
+            return self._address
+        if infos:
+            self._address = str(infos[0][4][0])
+            self._expires = time.monotonic() + self.ttl
+        return self._address
+
+    def refresh_in_background(self) -> None:
+        """Start one refresh thread unless one is running"""
+        with self._lock:
+            # Threads do not survive fork, so a child starts its own
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self.refresh, name='surfgeo-dns', daemon=True
+            )
+            self._thread.start()
+
+    def invalidate(self) -> None:
+        """Mark the entry expired (e.g. after a failed connect)"""
+        self._expires = 0.0
+
+    def create_connection(
+        self,
+        address: Tuple[str, int],
+        timeout: Optional[float] = None,
+        source_address: Optional[Tuple[str, int]] = None,
+    ) -> socket.socket:
+        """
+        socket.create_connection using the cached address
+
+        Used as http.client's connection factory; the Host header and
+        TLS server name still use the hostname. Falls back to resolving
+        the hostname if the cached address fails.
+        """
+        cached = self.address()
+        if cached is not None:
+            try:
+                return socket.create_connection(
+                    (cached, address[1]), timeout, source_address
+                )
+            except socket.timeout:
+                # No time left for a second attempt
+                self.invalidate()
+                raise
+            except OSError:
+                self.invalidate()
+        return socket.create_connection(address, timeout, source_address)
@@ -0,0 +1,152 @@
+"""
+Serverless invocation mode
+
+Background sender threads are frozen or killed once a serverless handler
+returns, so events must be delivered before the invocation ends. The
+track_invocations decorator buffers events during the invocation and
+flushes them as one batched request on a pooled keep-alive connection,
+within a deadline taken from the remaining-time budget. The client is
+created once per container, so warm invocations reuse its connections.
+
+Usage:
+    from surfgeo.serverless import track_invocations
+
+    @track_invocations(script_key='sk_your_key')
+    def handler(event, context):
+        return {'statusCode': 200, 'body': 'ok'}
+
+API Gateway (REST and HTTP APIs) and Lambda function URL events are
+tracked automatically. Middleware running inside the handler (e.g. a
+WSGI app behind an adapter) can share the same client:
+
+    tracker = track_invocations(script_key='sk_your_key')
+    app = surfgeoWSGIMiddleware(wsgi_app, client=tracker.client)
+    handler = tracker(adapter(app))
+"""
+
+import asyncio
+import functools
+from typing import Any, Callable, Optional
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.payload import build_event
+
+# Time reserved for the runtime after the flush (seconds)
+DEFAULT_MARGIN = 0.05
+
+
+def _status_code(result: Any) -> int:
+    """Status code of a handler's response (200 unless it sets one)"""
+    if isinstance(result, dict) and isinstance(result.get('statusCode'), int):
+        return int(result['statusCode'])
+    return 200
+
+
+class track_invocations:
+    """
+    Decorator buffering events per invocation and flushing at the end
+
+    Args:
+        client: Existing client to use (optional)
+        margin: Seconds of remaining time left untouched by the flush
+        track_events: Track API Gateway / function URL events automatically
+        **config: Configuration options when no client is given
+    """
+
+    def __init__(
+        self,
+        client: Optional[surfgeoClient] = None,
+        margin: float = DEFAULT_MARGIN,
+        track_events: bool = True,
+        **config: Any,
+    ):
+        if client is None:
+            config.setdefault('transport', 'http.client')
+            client = surfgeoClient(surfgeoConfig.from_dict(config))
+
+        self.client = client
+        self.margin = margin
+        self.track_events = track_events
+
+    def __call__(self, handler: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def async_wrapper(
+                event: Any, context: Any = None, *args: Any, **kwargs: Any
+            ) -> Any:
+                self.client.start_buffering()
+                status_code = 500
+                try:
+                    result = await handler(event, context, *args, **kwargs)
+                    status_code = _status_code(result)
+                    return result
+                finally:
+                    self._track_event(event, status_code)
+                    # The flush blocks; keep it off the event loop
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(None, self.flush, context)
+            return async_wrapper
+
+        @functools.wraps(handler)
+        def wrapper(
+            event: Any, context: Any = None, *args: Any, **kwargs: Any
+        ) -> Any:
+            self.client.start_buffering()
+            # A handler that raises is reported as a 500, as API Gateway does
+            status_code = 500
+            try:
+                result = handler(event, context, *args, **kwargs)
+                status_code = _status_code(result)
+                return result
+            finally:
+                self._track_event(event, status_code)
+                self.flush(context)
+        return wrapper
+
+    def flush(self, context: Any = None) -> int:
+        """
+        Send this invocation's events within the remaining-time budget
+
+        Returns:
+            Number of events delivered
+        """
+        return self.client.flush(self.flush_budget(context))
+
+    def flush_budget(self, context: Any = None) -> float:
+        """Seconds available for the flush: batch_timeout, capped by the deadline"""
+        budget = self.client.config.batch_timeout
+        get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        if get_remaining is not None:
+            budget = min(budget, get_remaining() / 1000 - self.margin)
+        return max(budget, 0.0)
+
+    def _track_event(self, event: Any, status_code: int) -> None:
+        """Track HTTP-triggered invocations from the event shape"""
+        if not self.track_events or not isinstance(event, dict):
+            return
+
+        request_context = event.get('requestContext') or {}
+        if 'rawPath' in event:
+            # HTTP API (payload v2) and function URLs
+            path = event['rawPath']
+            method = (request_context.get('http') or {}).get('method', 'GET')
+            source_ip = (request_context.get('http') or {}).get('sourceIp')
+        elif 'httpMethod' in event:
+            # REST API (payload v1)
+            path = event.get('path') or '/'
+            method = event['httpMethod']
+            source_ip = (request_context.get('identity') or {}).get('sourceIp')
+        else:
+            return
+
+        if self.client.excludes(path):
+            return
+
+        event_headers = event.get('headers') or {}
+        allowlist = self.client.header_allowlist
+        captured = (
+            allowlist.from_mapping(event_headers) if allowlist is not None else None
+        )
+        # API Gateway reports the caller's address itself
+        client_ip = source_ip if self.client.bot_verifier is not None else None
+        self.client.track(build_event(path, method, event_headers, status_code,
+                                      captured_headers=captured, client_ip=client_ip))
@@ -0,0 +1,88 @@
+from typing import Dict, Mapping, Optional
+
+
+class SiteMap:
+    """
+    Compiled host to script key lookup
+
+    Host forms:
+    - 'example.com'     exact match
+    - '*.example.com'   any subdomain of example.com (not example.com itself)
+
+    Exact hosts and wildcard suffixes are held in two dicts, so a
+    lookup costs one probe per label of the request host regardless of
+    how many sites are configured. The most specific wildcard wins.
+    Hosts are matched case-insensitively, without port or trailing dot.
+    """
+
+    __slots__ = ('_exact', '_suffixes')
+
+    def __init__(self, sites: Mapping[str, str]):
+        exact: Dict[str, str] = {}
+        suffixes: Dict[str, str] = {}
+
+        for host, script_key in sites.items():
+            if not isinstance(host, str) or not host.strip('*.'):
+                raise ValueError('surfgeo: sites hosts must be non-empty strings')
+
+            host = normalize_host(host)
+            if host.startswith('*.'):
+                # Stored with the leading dot: '.example.com'
+                suffixes[host[1:]] = script_key
+            elif '*' in host:
+                raise ValueError(
+                    f'surfgeo: sites host "{host}" may only use a leading "*." wildcard'
+                )
+            else:
+                exact[host] = script_key
+
+        self._exact = exact
+        self._suffixes = suffixes
+
+    def __len__(self) -> int:
+        return len(self._exact) + len(self._suffixes)
+
+    def resolve(self, host: Optional[str]) -> Optional[str]:
+        """Return the script key for a Host header value (None if unknown)"""
+        if not host:
+            return None
+        host = normalize_host(host)
+
+        script_key = self._exact.get(host)
+        if script_key is not None or not self._suffixes:
+            return script_key
+
+        # Longest suffix first: 'a.b.example.com' tries '.b.example.com',
+        # then '.example.com', then '.com'
+        index = host.find('.')
+        while index != -1:
+            script_key = self._suffixes.get(host[index:])
+            if script_key is not None:
+                return script_key
+            index = host.find('.', index + 1)
+        return None
+
+
+def normalize_host(host: str) -> str:
+    """
+    Normalize a Host header value
+
+    - Lowercase
+    - Remove port (IPv6 literals keep their brackets)
+    - Remove trailing dot
+    """
+    host = host.strip().lower()
+    if host.startswith('['):
+        end = host.find(']')
+        if end != -1:
+            return host[:end + 1]
+    elif ':' in host:
+        host = host.rsplit(':', 1)[0]
+    return host.rstrip('.')
+
+
+def compile_site_map(sites: Optional[Mapping[str, str]]) -> Optional[SiteMap]:
+    """Compile a sites option (None if not configured)"""
+    if not sites:
+        return None
+    return SiteMap(sites)
@@ -0,0 +1,152 @@
+"""
+Local event spool
+
+When spool_dir is configured, events the client could not deliver
+(failed sends, batches past their deadline) are appended to NDJSON
+segment files instead of being dropped. Sends that timed out are not
+spooled: the endpoint may have received them, and replaying them would
+count those requests twice. The `surfgeo` command
+line tool (surfgeo.cli) inspects, exports and replays them.
+
+Layout:
+    <spool_dir>/events-<time_ns>-<pid>.ndjson.active   segment being written
+    <spool_dir>/events-<time_ns>-<pid>.ndjson          sealed segment
+
+Each process writes its own segment and seals it (renames it without
+the .active suffix) when it reaches segment_bytes or the spool is
+closed. Sealed segments can be replayed and deleted safely; .active
+segments left by a crashed process are only read when asked for.
+"""
+
+import glob
+import io
+import os
+import sys
+import threading
+import time
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+from surfgeo.transport import dumps
+
+
+SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+ACTIVE_SUFFIX = '.active'
+READ_BUFFER = 1024 * 1024
+
+
+class Spool:
+    """
+    Append-only NDJSON spool directory
+
+    Args:
+        directory: Spool directory (created if missing)
+        max_bytes: Total size cap; events beyond it are dropped
+        segment_bytes: Size at which the current segment is sealed
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 segment_bytes: int = SEGMENT_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.dropped = 0
+        self._file: Optional[BinaryIO] = None
+        self._path: Optional[str] = None
+        self._written = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def write(self, payloads: List[Dict]) -> int:
+        """
+        Append payloads as NDJSON lines
+
+        Returns:
+            Number of payloads written (the rest hit max_bytes)
+        """
+        data = b''.join(dumps(payload) + b'\n' for payload in payloads)
+        with self._lock:
+            if self._size is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._size = sum(
+                    os.path.getsize(path)
+                    for path in segment_paths(self.directory, True)
+                )
+            if self._size + len(data) > self.max_bytes:
+                self.dropped += len(payloads)
+                return 0
+
+            file = self._file if self._file is not None else self._open()
+            # One write per call keeps lines whole
+            file.write(data)
+            file.flush()
+            self._written += len(data)
+            self._size += len(data)
+            if self._written >= self.segment_bytes:
+                self._seal()
+        return len(payloads)
+
+    def close(self) -> None:
+        """Seal the current segment"""
+        with self._lock:
+            if self._file is not None:
+                self._seal()
+
+    def _open(self) -> BinaryIO:
+        name = f'events-{time.time_ns()}-{os.getpid()}.ndjson'
+        self._path = path = os.path.join(self.directory, name)
+        self._file = file = open(path + ACTIVE_SUFFIX, 'ab')
+        self._written = 0
+        return file
+
+    def _seal(self) -> None:
+        file, path = self._file, self._path
+        assert file is not None and path is not None
+        file.close()
+        os.replace(path + ACTIVE_SUFFIX, path)
+        self._file = None
+        self._path = None
+
+
+def segment_paths(directory: str, include_active: bool = False) -> List[str]:
+    """Segment files in a spool directory, oldest first"""
+    patterns = ['*.ndjson', '*.ndjson.gz']
+    if include_active:
+        patterns.append('*.ndjson' + ACTIVE_SUFFIX)
+    paths = []
+    for pattern in patterns:
+        paths.extend(glob.glob(os.path.join(directory, pattern)))
+    return sorted(paths, key=os.path.basename)
+
+
+def expand_paths(paths: Iterable[str], include_active: bool = False) -> List[str]:
+    """Resolve spool directories to their segments; files are kept as given"""
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            expanded.extend(segment_paths(path, include_active))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def open_lines(path: str) -> BinaryIO:
+    """Open an NDJSON file ('-' for stdin), decompressing .gz files"""
+    if path == '-':
+        return sys.stdin.buffer
+    if path.endswith('.gz'):
+        import gzip
+        return io.BufferedReader(gzip.open(path, 'rb'), READ_BUFFER)
+    return open(path, 'rb', buffering=READ_BUFFER)
+
+
+def iter_lines(path: str) -> Iterator[bytes]:
+    """Yield non-empty lines of one NDJSON file, without newlines"""
+    stream = open_lines(path)
+    try:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
@@ -0,0 +1,151 @@
+"""
+Testing helpers
+
+FakeCollector is a local stand-in for the surfgeo tracking API. It
+accepts single and batch (/batch) POSTs over keep-alive HTTP/1.1,
+plain or gzip-encoded, and records every event, so integrations can
+be exercised end to end without network access.
+
+Usage:
+    with FakeCollector() as collector:
+        client = surfgeoClient(surfgeoConfig(
+            script_key='sk_...',
+            endpoint=collector.endpoint,
+            transport='http.client'
+        ))
+        ...
+        collector.wait_for(1)
+        assert collector.events[0]['path'] == '/'
+"""
+
+import gzip
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _CollectorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: '_CollectorServer'
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        self.server.collector._record(self.path, body)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _CollectorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    collector: 'FakeCollector'
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients dropping idle keep-alive connections are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeCollector:
+    """
+    Local HTTP server recording tracking payloads
+
+    Args:
+        keep_events: Keep every event in `events`; with False only the
+            counters are updated (long load tests)
+    """
+
+    def __init__(
+        self, host: str = '127.0.0.1', port: int = 0, keep_events: bool = True
+    ):
+        self.events: List[Dict] = []
+        self.keep_events = keep_events
+        # Event records received, and requests they stand for (coalesced
+        # events carry a count)
+        self.received = 0
+        self.represented = 0
+        self.requests = 0
+        self.batches = 0
+        self.connections = 0
+        self._condition = threading.Condition()
+
+        collector = self
+
+        class Handler(_CollectorHandler):
+            def setup(self) -> None:
+                super().setup()
+                with collector._condition:
+                    collector.connections += 1
+                    collector._condition.notify_all()
+
+        self._server = _CollectorServer((host, port), Handler)
+        self._server.collector = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.socket.getsockname()[:2]
+        return f'http://{host}:{port}/api/track'
+
+    def start(self) -> 'FakeCollector':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeCollector':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def wait_for(self, count: int, timeout: float = 2.0) -> bool:
+        """Block until at least count events arrived"""
+        return self._wait(lambda: self.received >= count, timeout)
+
+    def wait_connections(self, count: int, timeout: float = 2.0) -> bool:
+        """Block until at least count connections were accepted"""
+        return self._wait(lambda: self.connections >= count, timeout)
+
+    def _wait(self, predicate: Callable[[], bool], timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not predicate():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def _record(self, path: str, body: bytes) -> None:
+        payload = json.loads(body or b'null')
+        if path.endswith('/batch'):
+            events = payload['events']
+        else:
+            events = [payload]
+        represented = sum(event.get('count') or 1 for event in events)
+
+        with self._condition:
+            self.requests += 1
+            if path.endswith('/batch'):
+                self.batches += 1
+            if self.keep_events:
+                self.events.extend(events)
+            self.received += len(events)
+            self.represented += represented
+            self._condition.notify_all()
@@ -0,0 +1,403 @@
+"""
+Delivery transports
+
+A transport POSTs tracking payloads to the surfgeo endpoint. Heavy
+HTTP libraries are imported only when their transport is created, so
+importing surfgeo never pulls in requests or httpx by itself.
+
+Transports raise on failure (TimeoutError for timeouts); the client
+decides what to do with errors.
+"""
+
+import abc
+import asyncio
+import http.client
+import json
+import socket
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Union
+from urllib.parse import urlsplit, urlunsplit
+from surfgeo.resolver import DNSCache
+
+
+USER_AGENT = 'surfgeo-Python-SDK/1.0.0'
+
+HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': USER_AGENT
+}
+
+
+class HTTPStatusError(Exception):
+    """Error status from the endpoint (only raised where status is checked)"""
+
+    def __init__(self, status: int):
+        super().__init__(f'HTTP {status}')
+        self.status = status
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON encoding used by every transport"""
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def batch_endpoint(endpoint: str) -> str:
+    """Batch URL for an endpoint: https://host/api/track -> .../api/track/batch"""
+    parts = urlsplit(endpoint)
+    return urlunsplit(parts._replace(path=parts.path.rstrip('/') + '/batch'))
+
+
+class Transport(abc.ABC):
+    """
+    Base class for delivery transports
+
+    Subclasses implement post() (and optionally post_async()); single
+    events go to the endpoint, batches to the endpoint's /batch URL as
+    {"events": [...]}.
+    """
+
+    name = 'base'
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.batch_endpoint = batch_endpoint(endpoint)
+
+    @abc.abstractmethod
+    def post(self, url: str, body: bytes, timeout: float,
+             headers: Optional[Dict[str, str]] = None) -> None:
+        """POST an encoded body, raising on failure"""
+
+    async def post_async(self, url: str, body: bytes, timeout: float,
+                         headers: Optional[Dict[str, str]] = None) -> None:
+        """
+        POST an encoded body from async code
+
+        Default runs the blocking post in the loop's executor;
+        transports with a native async client override this.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.post, url, body, timeout, headers)
+
+    def send(self, payload: Dict, timeout: float) -> None:
+        """POST one payload"""
+        self.post(self.endpoint, dumps(payload), timeout)
+
+    async def send_async(self, payload: Dict, timeout: float) -> None:
+        """POST one payload from async code"""
+        await self.post_async(self.endpoint, dumps(payload), timeout)
+
+    def send_batch(self, payloads: List[Dict], timeout: float) -> None:
+        """POST several payloads in one request"""
+        self.post(self.batch_endpoint, dumps({'events': payloads}), timeout)
+
+    def prewarm(
+        self, connections: int, timeout: float, dns_ttl: Optional[float] = None
+    ) -> int:
+        """
+        Resolve the endpoint and open pooled connections ahead of sends
+
+        Transports that cannot do this ignore the call.
+
+        Returns:
+            Number of connections opened
+        """
+        return 0
+
+    def drop_connections(self) -> None:
+        """Forget pooled connections without closing them (after fork)"""
+
+    def close(self) -> None:
+        """Release pooled connections"""
+
+
+class RequestsTransport(Transport):
+    """requests-based transport with a pooled Session"""
+
+    name = 'requests'
+
+    def __init__(self, endpoint: str):
+        super().__init__(endpoint)
+        import requests
+
+        self._requests = requests
+        self._session = requests.Session()
+        self._session.headers.update(HEADERS)
+
+    def post(self, url: str, body: bytes, timeout: float,
+             headers: Optional[Dict[str, str]] = None) -> None:
+        try:
+            self._session.post(url, data=body, timeout=timeout, headers=headers)
+            # Don't check status - backend always returns 200
+        except self._requests.Timeout as e:
+            raise TimeoutError(str(e)) from e
+
+    def close(self) -> None:
+        self._session.close()
+
+
+class HttpxTransport(Transport):
+    """httpx-based transport with native async support"""
+
+    name = 'httpx'
+
+    def __init__(self, endpoint: str):
+        super().__init__(endpoint)
+        import httpx
+
+        self._httpx = httpx
+        # httpx is imported lazily, so its client types stay untyped here
+        self._client: Any = None
+        self._async_client: Any = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def post(self, url: str, body: bytes, timeout: float,
+             headers: Optional[Dict[str, str]] = None) -> None:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._httpx.Client(headers=HEADERS)
+        try:
+            self._client.post(url, content=body, timeout=timeout, headers=headers)
+        except self._httpx.TimeoutException as e:
+            raise TimeoutError(str(e)) from e
+
+    async def post_async(self, url: str, body: bytes, timeout: float,
+                         headers: Optional[Dict[str, str]] = None) -> None:
+        # AsyncClient pools are bound to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            previous = self._async_client
+            self._async_client = self._httpx.AsyncClient(headers=HEADERS)
+            self._async_loop = loop
+            if previous is not None:
+                try:
+                    await previous.aclose()
+                except Exception:
+                    # Its loop is already closed; the sockets go with it
+                    pass
+        try:
+            await self._async_client.post(
+                url, content=body, timeout=timeout, headers=headers
+            )
+        except self._httpx.TimeoutException as e:
+            raise TimeoutError(str(e)) from e
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+
+        client, loop = self._async_client, self._async_loop
+        self._async_client = self._async_loop = None
+        if client is None or loop is None or loop.is_closed():
+            return
+        # The AsyncClient can only be closed on its own loop
+        if not loop.is_running():
+            loop.run_until_complete(client.aclose())
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.create_task(client.aclose())
+        else:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+
+class HTTPClientTransport(Transport):
+    """
+    Zero-dependency transport on http.client
+
+    Keeps a small pool of idle keep-alive connections shared by all
+    sender threads. A request that fails on a reused connection (the
+    server closed it while idle) is retried once on a fresh one.
+
+    With check_status, 4xx/5xx responses raise HTTPStatusError (used by
+    bulk replay, where the caller retries or keeps failed batches).
+
+    prewarm() resolves the endpoint into a DNSCache (refreshed in the
+    background, so later connections skip DNS) and fills the idle pool.
+    """
+
+    name = 'http.client'
+
+    def __init__(self, endpoint: str, pool_size: int = 4, check_status: bool = False):
+        super().__init__(endpoint)
+        self._check_status = check_status
+        parts = urlsplit(endpoint)
+        self._https = parts.scheme == 'https'
+        self._host = parts.hostname or 'localhost'
+        self._port = parts.port
+        self._targets: Dict[str, str] = {}
+        self._idle: Deque[http.client.HTTPConnection] = deque()
+        self._pool_size = pool_size
+        self._dns: Optional[DNSCache] = None
+        self._ssl_context = None
+        if self._https:
+            import ssl
+            self._ssl_context = ssl.create_default_context()
+
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        connection: http.client.HTTPConnection
+        if self._https:
+            connection = http.client.HTTPSConnection(
+                self._host, self._port, timeout=timeout, context=self._ssl_context
+            )
+        else:
+            connection = http.client.HTTPConnection(
+                self._host, self._port, timeout=timeout
+            )
+        if self._dns is not None:
+            # http.client's (undeclared) hook for opening the socket
+            connection._create_connection = (  # type: ignore[attr-defined]
+                self._dns.create_connection
+            )
+        return connection
+
+    def _target(self, url: str) -> str:
+        # Request target (path + query) for a URL on the endpoint's host
+        target = self._targets.get(url)
+        if target is None:
+            parts = urlsplit(url)
+            target = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+            self._targets[url] = target
+        return target
+
+    def _request(self, connection: http.client.HTTPConnection, target: str, body: bytes,
+                 timeout: float, headers: Dict[str, str]) -> None:
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        connection.request('POST', target, body, headers)
+        response = connection.getresponse()
+        response.read()
+        if self._check_status and response.status >= 400:
+            raise HTTPStatusError(response.status)
+
+    def post(self, url: str, body: bytes, timeout: float,
+             headers: Optional[Dict[str, str]] = None) -> None:
+        """POST an encoded body on a pooled connection"""
+        target = self._target(url)
+        headers = {**HEADERS, **headers} if headers else HEADERS
+        try:
+            connection = self._idle.pop()
+            reused = True
+        except IndexError:
+            connection = self._new_connection(timeout)
+            reused = False
+
+        try:
+            try:
+                self._request(connection, target, body, timeout, headers)
+            except (
+                http.client.RemoteDisconnected,
+                ConnectionResetError,
+                BrokenPipeError,
+            ):
+                if not reused:
+                    raise
+                connection.close()
+                connection = self._new_connection(timeout)
+                self._request(connection, target, body, timeout, headers)
+        except socket.timeout as e:
+            connection.close()
+            raise TimeoutError(str(e)) from e
+        except Exception:
+            connection.close()
+            raise
+
+        if len(self._idle) < self._pool_size:
+            self._idle.append(connection)
+        else:
+            connection.close()
+
+    def prewarm(
+        self, connections: int, timeout: float, dns_ttl: Optional[float] = None
+    ) -> int:
+        if dns_ttl and self._dns is None:
+            self._dns = DNSCache(
+                self._host, self._port or (443 if self._https else 80), dns_ttl
+            )
+        if self._dns is not None:
+            self._dns.refresh()
+
+        self._pool_size = max(self._pool_size, connections)
+        opened = 0
+        for _ in range(connections - len(self._idle)):
+            connection = self._new_connection(timeout)
+            connection.connect()
+            self._idle.append(connection)
+            opened += 1
+        return opened
+
+    def drop_connections(self) -> None:
+        self._idle.clear()
+
+    def close(self) -> None:
+        while self._idle:
+            try:
+                self._idle.pop().close()
+            except IndexError:
+                break
+
+
+class MemoryTransport(Transport):
+    """In-memory transport that records payloads (tests, dry runs)"""
+
+    name = 'memory'
+
+    def __init__(self, endpoint: str = ''):
+        super().__init__(endpoint)
+        self.payloads: List[Dict] = []
+        self.batches = 0
+
+    def post(self, url: str, body: bytes, timeout: float,
+             headers: Optional[Dict[str, str]] = None) -> None:
+        decoded = json.loads(body)
+        if url == self.batch_endpoint:
+            self.send_batch(decoded['events'], timeout)
+        else:
+            self.send(decoded, timeout)
+
+    def send(self, payload: Dict, timeout: float) -> None:
+        self.payloads.append(payload)
+
+    async def send_async(self, payload: Dict, timeout: float) -> None:
+        self.payloads.append(payload)
+
+    def send_batch(self, payloads: List[Dict], timeout: float) -> None:
+        self.payloads.extend(payloads)
+        self.batches += 1
+
+
+TRANSPORTS = {
+    'requests': RequestsTransport,
+    'httpx': HttpxTransport,
+    'http.client': HTTPClientTransport,
+    'memory': MemoryTransport,
+}
+
+
+def create_transport(transport: Union[str, Transport], endpoint: str) -> Transport:
+    """
+    Resolve a transport name or instance
+
+    Args:
+        transport: Name from TRANSPORTS or a Transport instance
+        endpoint: Tracking endpoint URL
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if isinstance(transport, Transport):
+        return transport
+    try:
+        transport_class = TRANSPORTS[transport]
+    except (KeyError, TypeError):
+        raise ValueError(
+            f'surfgeo: transport must be one of {", ".join(TRANSPORTS)} '
+            'or a Transport instance'
+        )
+    return transport_class(endpoint)
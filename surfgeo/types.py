@@ -1,5 +1,5 @@
-from typing import TypedDict, Optional, Dict, Union
-from dataclasses import dataclass
+from typing import TypedDict, Optional, Dict, Union, List, Any
+from dataclasses import dataclass, fields
 
 
 class TrackingPayload(TypedDict, total=False):
@@ -14,9 +14,22 @@ class TrackingPayload(TypedDict, total=False):
     request_id: Optional[str]
     script_key: Optional[str]
     source: Optional[str]
+    response_bytes: Optional[int]
+    duration_ms: Optional[float]
+    count: Optional[int]
+    first_seen: Optional[int]
+    last_seen: Optional[int]
+    bot_family: Optional[str]
+    bot_verification: Optional[str]
 
 
-class RequestMetadata(TypedDict):
+class _OptionalRequestMetadata(TypedDict, total=False):
+    """Request metadata only some middleware can provide"""
+    response_bytes: Optional[int]
+    duration_ms: Optional[float]
+
+
+class RequestMetadata(_OptionalRequestMetadata):
     """Request metadata extracted by middleware"""
     path: str
     method: str
@@ -32,4 +45,49 @@ class surfgeoConfig:
     timeout: float = 0.05
     debug: bool = False
     enabled: bool = True
+    include: Optional[List[str]] = None
+    exclude: Optional[List[str]] = None
+    capture_metrics: bool = True
+    transport: Optional[Any] = (
+        None  # name in surfgeo.transport.TRANSPORTS or a Transport
+    )
+    delivery: str = 'thread'
+    flush_interval: float = 1.0
+    max_queue_size: int = (
+        10000  # per thread in 'batch' delivery, so up to threads x this in total
+    )
+    batch_timeout: float = 1.0
+    max_batch_size: int = 500
+    coalesce_window: Optional[float] = None
+    coalesce_max_keys: int = 10000
+    adaptive_timeout: bool = False
+    timeout_min: Optional[float] = None
+    timeout_max: Optional[float] = None
+    sites: Optional[Dict[str, str]] = (
+        None  # host ('example.com' or '*.example.com') -> script_key
+    )
+    spool_dir: Optional[str] = None
+    spool_max_bytes: int = 1024 * 1024 * 1024
+    capture_headers: Optional[List[str]] = (
+        None  # e.g. ['Accept-Language', 'Via', 'Sec-Fetch-*']
+    )
+    max_header_bytes: int = 256
+    bot_ranges: Optional[Any] = None  # JSON file path or dict: bot family -> CIDRs
+    trusted_proxies: Optional[List[str]] = (
+        None  # proxy CIDRs whose X-Forwarded-For is trusted
+    )
+    prewarm_connections: int = 0
+    dns_ttl: float = 60.0
+    green_pool_size: int = 4
+
+    @classmethod
+    def from_dict(cls, options: Dict[str, Any]) -> 'surfgeoConfig':
+        """
+        Build config from middleware keyword options
 
+        Unknown keys are ignored; missing keys use dataclass defaults.
+        """
+        names = {field.name for field in fields(cls)}
+        values = {key: value for key, value in options.items() if key in names}
+        values.setdefault('script_key', '')
+        return cls(**values)
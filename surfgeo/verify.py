@@ -0,0 +1,289 @@
+"""
+Verified-bot detection
+
+User-Agent strings are easy to spoof, so a request claiming to be a
+known crawler is checked against the IP ranges its operator publishes.
+Events get `bot_family` and `bot_verification` ('verified' when the
+client IP is inside the family's ranges, 'spoofed' when it is not).
+Families without loaded ranges are left untagged.
+
+Ranges come from bot_ranges: a JSON file (or dict) mapping family to
+a list of CIDRs, a published ranges document ({"prefixes": [{"ipv4Prefix":
+...}, {"ipv6Prefix": ...}]}, as served for GPTBot, Googlebot or
+bingbot), or the path of such a document relative to the file:
+
+    {
+        "gptbot": "gptbot.json",
+        "claudebot": ["160.79.104.0/23"],
+        "googlebot": {"prefixes": [{"ipv4Prefix": "66.249.64.0/27"}]}
+    }
+"""
+
+import bisect
+import ipaddress
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+# Family -> User-Agent token (matched case-insensitively)
+BOT_FAMILIES = {
+    'gptbot': 'GPTBot',
+    'chatgpt-user': 'ChatGPT-User',
+    'oai-searchbot': 'OAI-SearchBot',
+    'claudebot': 'ClaudeBot',
+    'claude-user': 'Claude-User',
+    'claude-searchbot': 'Claude-SearchBot',
+    'perplexitybot': 'PerplexityBot',
+    'perplexity-user': 'Perplexity-User',
+    'googlebot': 'Googlebot',
+    'bingbot': 'bingbot',
+    'applebot': 'Applebot',
+    'amazonbot': 'Amazonbot',
+    'ccbot': 'CCBot',
+    'bytespider': 'Bytespider',
+    'duckassistbot': 'DuckAssistBot',
+    'meta-externalagent': 'meta-externalagent',
+}
+
+# Bounded memo tables (cleared when full, like surfgeo.event.intern)
+MAX_CACHED = 65536
+
+_FAMILY_PATTERN = re.compile(
+    '|'.join(
+        f'(?P<{name.replace("-", "_")}>{re.escape(token)})'
+        for name, token in BOT_FAMILIES.items()
+    ),
+    re.IGNORECASE,
+)
+_families: Dict[str, Optional[str]] = {}
+
+
+def classify_user_agent(user_agent: Optional[str]) -> Optional[str]:
+    """Bot family claimed by a User-Agent (None for everything else)"""
+    if not user_agent:
+        return None
+    try:
+        return _families[user_agent]
+    except KeyError:
+        pass
+    match = _FAMILY_PATTERN.search(user_agent)
+    family = match.lastgroup if match else None
+    if family is not None:
+        family = family.replace('_', '-')
+    if len(_families) >= MAX_CACHED:
+        _families.clear()
+    _families[user_agent] = family
+    return family
+
+
+class IPRangeIndex:
+    """
+    Sorted, merged address intervals for one set of CIDRs
+
+    IPv4 and IPv6 are kept apart as parallel start/end integer lists;
+    a lookup is one bisect, O(log n).
+    """
+
+    __slots__ = ('_starts', '_ends')
+
+    def __init__(self, cidrs: Iterable[str]):
+        intervals: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        for cidr in cidrs:
+            network = ipaddress.ip_network(cidr.strip(), strict=False)
+            intervals[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+
+        self._starts: Dict[int, List[int]] = {}
+        self._ends: Dict[int, List[int]] = {}
+        for version, ranges in intervals.items():
+            starts: List[int] = []
+            ends: List[int] = []
+            for start, end in sorted(ranges):
+                if ends and start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._starts[version] = starts
+            self._ends[version] = ends
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts in self._starts.values())
+
+    def contains(self, address: Any) -> bool:
+        """Check an ipaddress.IPv4Address/IPv6Address"""
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        value = int(address)
+        starts = self._starts[address.version]
+        index = bisect.bisect_right(starts, value) - 1
+        return index >= 0 and value <= self._ends[address.version][index]
+
+
+def parse_address(value: Optional[str]) -> Optional[Any]:
+    """Parse an IP (ignoring brackets and ports); None if invalid"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith('['):
+        value = value[1:value.find(']')]
+    elif value.count(':') == 1:
+        value = value.split(':', 1)[0]
+    try:
+        return ipaddress.ip_address(value)
+    except ValueError:
+        return None
+
+
+def load_ranges(source: Any) -> Dict[str, List[str]]:
+    """
+    Read bot_ranges into family -> CIDR list
+
+    Raises:
+        ValueError: If the file or an entry cannot be read
+    """
+    base = '.'
+    if isinstance(source, str):
+        base = os.path.dirname(os.path.abspath(source))
+        source = _read_json(source)
+    if not isinstance(source, Mapping):
+        raise ValueError('surfgeo: bot_ranges must map bot families to IP ranges')
+
+    ranges = {}
+    for family, entry in source.items():
+        if isinstance(entry, str):
+            entry = _read_json(os.path.join(base, entry))
+        if isinstance(entry, Mapping):
+            entry = [
+                prefix.get('ipv4Prefix') or prefix.get('ipv6Prefix')
+                for prefix in entry.get('prefixes', [])
+            ]
+        if not isinstance(entry, list) or not all(
+            isinstance(cidr, str) and cidr for cidr in entry
+        ):
+            raise ValueError(f'surfgeo: bot_ranges["{family}"] must be a list of CIDRs')
+        ranges[family.lower()] = entry
+    return ranges
+
+
+def _read_json(path: str) -> Any:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f'surfgeo: cannot read bot ranges from {path}: {e}') from e
+
+
+class BotVerifier:
+    """
+    Verifies claimed bot families against their published IP ranges
+
+    Args:
+        ranges: Family -> CIDRs (see load_ranges)
+        trusted_proxies: CIDRs of proxies whose X-Forwarded-For is used
+    """
+
+    def __init__(
+        self,
+        ranges: Mapping[str, List[str]],
+        trusted_proxies: Optional[Iterable[str]] = None,
+    ):
+        try:
+            self._indexes = {
+                family: IPRangeIndex(cidrs) for family, cidrs in ranges.items()
+            }
+            self._proxies = IPRangeIndex(trusted_proxies) if trusted_proxies else None
+        except ValueError as e:
+            raise ValueError(f'surfgeo: invalid IP range: {e}') from e
+        self._verdicts: Dict[Tuple[str, Optional[str]], Optional[bool]] = {}
+        self._trusted: Dict[str, bool] = {}
+
+    @property
+    def families(self) -> List[str]:
+        return list(self._indexes)
+
+    def verify(self, family: str, client_ip: Optional[str]) -> Optional[bool]:
+        """
+        Check a claimed family against the client IP (memoized)
+
+        Returns:
+            True (verified), False (spoofed), None (no ranges for family
+            or no usable IP)
+        """
+        key = (family, client_ip)
+        try:
+            return self._verdicts[key]
+        except KeyError:
+            pass
+
+        index = self._indexes.get(family)
+        verdict = None
+        if index is not None:
+            address = parse_address(client_ip)
+            if address is not None:
+                verdict = index.contains(address)
+
+        if len(self._verdicts) >= MAX_CACHED:
+            self._verdicts.clear()
+        self._verdicts[key] = verdict
+        return verdict
+
+    def client_ip(
+        self, peer: Optional[str], forwarded_for: Optional[str]
+    ) -> Optional[str]:
+        """
+        Client address: the peer, or the X-Forwarded-For hop just before
+        the trusted proxies when the peer is one of them
+        """
+        if not forwarded_for or not self._is_trusted(peer):
+            return peer
+        hops = [hop.strip() for hop in forwarded_for.split(',')]
+        for hop in reversed(hops):
+            if hop and not self._is_trusted(hop):
+                return hop
+        return hops[0] or peer
+
+    def client_ip_from_environ(self, environ: Mapping) -> Optional[str]:
+        """Client IP from a WSGI environ or Django META"""
+        return self.client_ip(
+            environ.get('REMOTE_ADDR'), environ.get('HTTP_X_FORWARDED_FOR')
+        )
+
+    def client_ip_from_scope(self, scope: Mapping) -> Optional[str]:
+        """Client IP from an ASGI scope"""
+        client = scope.get('client')
+        peer = client[0] if client else None
+        if self._proxies is None or not self._is_trusted(peer):
+            return peer
+        # Peer is a trusted proxy: only now look for the header
+        forwarded_for = [
+            value.decode('latin1') for name, value in scope.get('headers', ())
+            if name == b'x-forwarded-for'
+        ]
+        return self.client_ip(peer, ', '.join(forwarded_for))
+
+    def _is_trusted(self, value: Optional[str]) -> bool:
+        if self._proxies is None or not value:
+            return False
+        try:
+            return self._trusted[value]
+        except KeyError:
+            pass
+        address = parse_address(value)
+        trusted = address is not None and self._proxies.contains(address)
+        if len(self._trusted) >= MAX_CACHED:
+            self._trusted.clear()
+        self._trusted[value] = trusted
+        return trusted
+
+
+def compile_bot_verifier(
+    bot_ranges: Any, trusted_proxies: Optional[Iterable[str]] = None
+) -> Optional[BotVerifier]:
+    """Build the verifier from config (None if bot_ranges is not set)"""
+    if bot_ranges is None:
+        return None
+    return BotVerifier(load_ranges(bot_ranges), trusted_proxies)
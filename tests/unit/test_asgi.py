@@ -0,0 +1,56 @@
+import asyncio
+from unittest.mock import patch, AsyncMock
+from surfgeo.middleware.asgi import surfgeoASGIMiddleware
+
+
+async def app(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 201, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'hello', 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b' world'})
+
+
+def run(middleware, path='/page'):
+    scope = {
+        'type': 'http',
+        'path': path,
+        'method': 'GET',
+        'headers': [(b'user-agent', b'GPTBot')],
+    }
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    with patch.object(
+        middleware.client, 'track_async', new_callable=AsyncMock
+    ) as mock_track:
+        asyncio.run(middleware(scope, None, send))
+    return mock_track, sent
+
+
+class TestASGIMiddleware:
+    def test_records_status_bytes_and_duration(self):
+        """Should count body bytes and time the wrapped app"""
+        mock_track, sent = run(
+            surfgeoASGIMiddleware(app, script_key='sk_test_key_123456789012345')
+        )
+
+        payload = mock_track.call_args[0][0].request_fields()
+        assert len(sent) == 3
+        assert payload['status_code'] == 201
+        assert payload['user_agent'] == 'GPTBot'
+        assert payload['response_bytes'] == 11
+        assert payload['duration_ms'] >= 0
+
+    def test_metrics_can_be_disabled(self):
+        """Should omit measurements when capture_metrics=False"""
+        middleware = surfgeoASGIMiddleware(
+            app,
+            script_key='sk_test_key_123456789012345',
+            capture_metrics=False
+        )
+        mock_track, _ = run(middleware)
+
+        payload = mock_track.call_args[0][0].request_fields()
+        assert 'response_bytes' not in payload
+        assert 'duration_ms' not in payload
@@ -0,0 +1,152 @@
+import gzip
+import json
+from surfgeo.backfill import (
+    BackfillOptions,
+    LineParser,
+    backfill,
+    file_chunks,
+    parse_time,
+    read_range,
+)
+from surfgeo.cli import Replayer, main
+from surfgeo.testing import FakeCollector
+
+
+KEY = 'sk_test_key_123456789012345'
+GPTBOT = 'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko); compatible; GPTBot/1.2'
+CHROME = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/124.0.0.0 Safari/537.36'
+
+
+def log_line(i, user_agent=GPTBOT, ip='20.15.240.70'):
+    return (
+        f'{ip} - - [10/Oct/2024:13:55:{i % 60:02d} +0200] '
+        f'"GET /docs/{i}?page=2 HTTP/1.1" '
+        f'200 {i} "https://example.com/" "{user_agent}"\n'
+    )
+
+
+def write_log(path, count):
+    lines = [log_line(i, GPTBOT if i % 2 else CHROME) for i in range(count)]
+    path.write_text(''.join(lines))
+    return lines
+
+
+class TestLineParser:
+    def test_parse_combined_line(self):
+        """Should keep the original timestamp and request details"""
+        parser = LineParser(BackfillOptions(script_key=KEY))
+        payload = parser.parse(log_line(7).rstrip('\n').encode())
+
+        assert payload['timestamp'] == parse_time('10/Oct/2024:11:55:07 +0000')
+        assert payload['path'] == '/docs/7'
+        assert payload['method'] == 'GET'
+        assert payload['status_code'] == 200
+        assert payload['response_bytes'] == 7
+        assert payload['referrer'] == 'https://example.com/'
+        assert payload['user_agent'] == GPTBOT
+        assert payload['script_key'] == KEY
+
+    def test_filters_and_malformed(self):
+        """Should skip browsers with bots_only and count unparseable lines"""
+        parser = LineParser(BackfillOptions(script_key=KEY, bots_only=True))
+        parsed = parser.parse_lines(
+            [log_line(1, CHROME).encode(), b'garbage\n', log_line(2).encode(), b'\n']
+        )
+
+        assert len(parsed) == 1
+        assert parser.counts == {'lines': 3, 'malformed': 1, 'filtered': 1, 'events': 1}
+
+    def test_verifies_bot_ips(self):
+        """Should tag claimed crawlers from the logged client IP"""
+        parser = LineParser(
+            BackfillOptions(script_key=KEY, bot_ranges={'gptbot': ['20.15.240.64/28']})
+        )
+
+        assert parser.parse(log_line(1).encode())['bot_verification'] == 'verified'
+        assert (
+            parser.parse(log_line(1, ip='198.51.100.4').encode())['bot_verification']
+            == 'spoofed'
+        )
+
+
+class TestChunks:
+    def test_ranges_cover_every_line_once(self, tmp_path):
+        """Should split at byte offsets without losing or repeating lines"""
+        path = tmp_path / 'access.log'
+        lines = write_log(path, 200)
+
+        read = [
+            line.decode()
+            for chunk in file_chunks(str(path), 1000)
+            for line in read_range(*chunk)
+        ]
+        assert read == lines
+
+    def test_process_pool_matches_single_process(self, tmp_path):
+        """Should produce the same events, in order, across processes and gzip input"""
+        plain = tmp_path / 'access.log'
+        write_log(plain, 300)
+        compressed = tmp_path / 'access.log.1.gz'
+        with gzip.open(compressed, 'wb') as f:
+            f.write(plain.read_bytes())
+        options = BackfillOptions(script_key=KEY, bots_only=True, chunk_bytes=4096)
+        paths = [str(plain), str(compressed)]
+
+        single, pooled = [], []
+        counts = backfill(paths, options, single.extend)
+        backfill(paths, options, pooled.extend, processes=2)
+
+        assert counts == {'lines': 600, 'malformed': 0, 'filtered': 300, 'events': 300}
+
+        def keys(lines):
+            return [
+                (event['path'], event['timestamp']) for event in map(json.loads, lines)
+            ]
+
+        assert keys(single) == keys(pooled)
+
+
+class TestBackfillCommand:
+    def test_sends_compressed_batches(self, tmp_path, capsys):
+        """Should deliver parsed events through the replay sender"""
+        path = tmp_path / 'access.log'
+        write_log(path, 100)
+
+        with FakeCollector() as collector:
+            code = main(
+                [
+                    'backfill',
+                    str(path),
+                    '--script-key',
+                    KEY,
+                    '--bots-only',
+                    '--processes',
+                    '1',
+                    '--endpoint',
+                    collector.endpoint,
+                    '--batch-size',
+                    '20',
+                ]
+            )
+
+        assert code == 0
+        assert collector.received == 50
+        assert collector.batches == 3
+        assert all(event['script_key'] == KEY for event in collector.events)
+        assert 'Backfilled 50 events from 100 lines' in capsys.readouterr().err
+
+    def test_batches_span_submitted_chunks(self):
+        """Should carry partial batches over until wait()"""
+        lines = [
+            json.dumps({'path': f'/{i}', 'script_key': KEY}).encode() for i in range(30)
+        ]
+
+        with FakeCollector() as collector:
+            replayer = Replayer(collector.endpoint, connections=1, batch_size=20)
+            replayer.submit_lines(lines[:15])
+            replayer.submit_lines(lines[15:])
+            assert replayer.wait()
+            replayer.close()
+
+        assert collector.received == 30
+        assert collector.batches == 2
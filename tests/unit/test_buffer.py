@@ -0,0 +1,78 @@
+import threading
+from surfgeo.buffer import ShardedBuffer
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.transport import MemoryTransport
+
+
+class TestShardedBuffer:
+    def test_harvest_collects_all_threads(self):
+        """Should gather events appended from many threads"""
+        buffer = ShardedBuffer(max_events=1000)
+
+        def worker(n):
+            for i in range(100):
+                buffer.append((n, i))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        harvested = buffer.harvest()
+        assert len(harvested) == 800
+        assert len(set(harvested)) == 800
+        # Finished threads' shards are pruned once empty
+        assert buffer.shard_count == 0
+
+    def test_full_shard_drops(self):
+        """Should drop and count events beyond the per-shard cap"""
+        buffer = ShardedBuffer(max_events=2)
+        assert buffer.append(1)
+        assert buffer.append(2)
+        assert not buffer.append(3)
+
+        assert buffer.dropped == 1
+        assert buffer.harvest() == [1, 2]
+
+
+class TestBatchDelivery:
+    def test_events_are_sent_in_batches(self):
+        """Should deliver harvested events as batches without per-event threads"""
+        transport = MemoryTransport()
+        client = surfgeoClient(surfgeoConfig(
+            script_key='sk_test_key_123456789012345',
+            transport=transport,
+            delivery='batch',
+            flush_interval=60
+        ))
+
+        started = threading.active_count()
+        for i in range(10):
+            client.track({'path': f'/{i}', 'method': 'GET'})
+        # Only the flusher thread is added
+        assert threading.active_count() <= started + 1
+        assert client.stats()['queued'] == 10
+
+        client.close()
+
+        assert transport.batches == 1
+        assert len(transport.payloads) == 10
+
+    def test_batch_delivery_with_coalescing(self):
+        """Should coalesce harvested events on the flusher thread"""
+        transport = MemoryTransport()
+        client = surfgeoClient(surfgeoConfig(
+            script_key='sk_test_key_123456789012345',
+            transport=transport,
+            delivery='batch',
+            coalesce_window=60
+        ))
+
+        for _ in range(4):
+            client.track({'path': '/same', 'method': 'GET', 'user_agent': 'GPTBot'})
+        client.flush()
+        client.close()
+
+        assert len(transport.payloads) == 1
+        assert transport.payloads[0]['count'] == 4
@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+from surfgeo.cli import main, script_key_of
+from surfgeo.spool import Spool, segment_paths
+from surfgeo.testing import FakeCollector
+
+
+SHOP = 'sk_shop_key_123456789012345'
+BLOG = 'sk_blog_key_123456789012345'
+
+
+def spool_events(directory, count=10):
+    spool = Spool(str(directory))
+    spool.write(
+        [
+            {
+                'path': f'/{i}',
+                'script_key': SHOP if i % 2 else BLOG,
+                'timestamp': 1700000000 + i,
+                'status_code': 200,
+            }
+            for i in range(count)
+        ]
+    )
+    spool.close()
+
+
+class TestCLI:
+    def test_script_key_without_decoding(self):
+        """Should find the key in compact lines and fall back to JSON"""
+        assert script_key_of(b'{"path":"/","script_key":"sk_a"}') == b'sk_a'
+        assert script_key_of(b'{"path": "/", "script_key": "sk_b"}') == b'sk_b'
+        assert script_key_of(b'{"path":"/"}') is None
+
+    def test_stats(self, tmp_path, capsys):
+        """Should summarize events per script key"""
+        spool_events(tmp_path)
+
+        assert main(['stats', str(tmp_path), '--json']) == 0
+        summary = json.loads(capsys.readouterr().out)
+        assert summary['events'] == 10
+        assert summary['script_keys'] == {SHOP: 5, BLOG: 5}
+        assert summary['first_seen'] == 1700000000
+
+    def test_export_gzip_with_filter(self, tmp_path):
+        """Should stream matching events to compressed NDJSON"""
+        spool_events(tmp_path / 'spool')
+        output = tmp_path / 'out.ndjson.gz'
+
+        assert (
+            main(
+                [
+                    'export',
+                    str(tmp_path / 'spool'),
+                    '-o',
+                    str(output),
+                    '--script-key',
+                    SHOP,
+                ]
+            )
+            == 0
+        )
+        with gzip.open(output, 'rb') as f:
+            events = [json.loads(line) for line in f]
+        assert [event['path'] for event in events] == ['/1', '/3', '/5', '/7', '/9']
+
+    def test_replay_partitions_and_deletes(self, tmp_path):
+        """Should send compressed single-key batches and remove sent segments"""
+        spool_events(tmp_path, count=9)
+
+        with FakeCollector() as collector:
+            code = main(['replay', str(tmp_path), '--endpoint', collector.endpoint,
+                         '--batch-size', '2', '--connections', '2'])
+            assert code == 0
+            assert collector.wait_for(9)
+
+        assert sorted(event['path'] for event in collector.events) == sorted(
+            f'/{i}' for i in range(9)
+        )
+        assert collector.batches == 5  # 4 + 5 events per key, 2 per batch
+        # Without --delete segments stay
+        assert len(segment_paths(str(tmp_path))) == 1
+
+        with FakeCollector() as collector:
+            assert (
+                main(
+                    [
+                        'replay',
+                        str(tmp_path),
+                        '--endpoint',
+                        collector.endpoint,
+                        '--delete',
+                    ]
+                )
+                == 0
+            )
+        assert segment_paths(str(tmp_path)) == []
+
+    def test_replay_keeps_failed_events(self, tmp_path):
+        """Should write batches that could not be sent to --failed"""
+        spool_events(tmp_path / 'spool', count=3)
+        failed = tmp_path / 'failed.ndjson'
+
+        code = main(
+            [
+                'replay',
+                str(tmp_path / 'spool'),
+                '--endpoint',
+                'http://127.0.0.1:9/api/track',
+                '--retries',
+                '0',
+                '--timeout',
+                '0.5',
+                '--failed',
+                str(failed),
+                '--delete',
+            ]
+        )
+
+        assert code == 1
+        assert len(failed.read_bytes().splitlines()) == 3
+        assert len(os.listdir(tmp_path / 'spool')) == 1
@@ -25,7 +25,7 @@ class TestsurfgeoClient:
             config = surfgeoConfig(script_key='invalid_key')
             surfgeoClient(config)
 
-    @patch('surfgeo.client.requests.post')
+    @patch('surfgeo.transport.RequestsTransport.send')
     def test_track_adds_script_key_and_source(self, mock_post):
         """Should add script_key and source='server' to payload"""
         config = surfgeoConfig(script_key='sk_test_key_123456789012345')
@@ -39,7 +39,7 @@ class TestsurfgeoClient:
         
         assert mock_post.called
         call_args = mock_post.call_args
-        sent_payload = call_args[1]['json']
+        sent_payload = call_args[0][0]
         assert sent_payload['script_key'] == 'sk_test_key_123456789012345'
         assert sent_payload['source'] == 'server'
 
@@ -63,12 +63,12 @@ class TestsurfgeoClient:
         )
         client = surfgeoClient(config)
         
-        with patch('surfgeo.client.requests.post') as mock_post:
+        with patch('surfgeo.transport.RequestsTransport.send') as mock_post:
             client.track({'path': '/test', 'method': 'GET', 'user_agent': 'test'})
             time.sleep(0.1)
             assert not mock_post.called
 
-    @patch('surfgeo.client.requests.post')
+    @patch('surfgeo.transport.RequestsTransport.send')
     def test_track_handles_network_error_silently(self, mock_post):
         """Should not raise on network error"""
         mock_post.side_effect = Exception('Network error')
@@ -86,8 +86,9 @@ class TestsurfgeoClient:
         config = surfgeoConfig(script_key='sk_test_key_123456789012345')
         client = surfgeoClient(config)
         
-        with patch('surfgeo.client.httpx.AsyncClient') as mock_client:
+        with patch('surfgeo.transport.HttpxTransport.send_async') as mock_send:
             await client.track_async({'path': '/test', 'method': 'GET', 'user_agent': 'test'})
             # Give task time to start
             await asyncio.sleep(0.1)
+            assert mock_send.called
 
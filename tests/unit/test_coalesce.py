@@ -0,0 +1,110 @@
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.coalesce import Coalescer
+from surfgeo.event import Event
+from surfgeo.transport import MemoryTransport
+
+
+def event(path='/page', timestamp=100, user_agent='GPTBot'):
+    return Event(timestamp, path, 'GET', 200, user_agent)
+
+
+class TestCoalescer:
+    def test_merges_duplicates_in_window(self):
+        """Should merge same-key events with count and first/last timestamps"""
+        coalescer = Coalescer(window=5)
+        coalescer.add(event(timestamp=100), now=10.0)
+        coalescer.add(event(timestamp=101), now=11.0)
+        coalescer.add(event(timestamp=103), now=13.0)
+        coalescer.add(event(user_agent='ClaudeBot'), now=13.0)
+
+        released = coalescer.drain(now=15.0)
+
+        assert len(released) == 2
+        merged = released[0]
+        assert merged.count == 3
+        assert merged.first_seen == 100
+        assert merged.last_seen == 103
+        assert 'count' not in released[1].to_payload()
+
+    def test_raw_payloads_keep_timestamps_and_extra_fields(self):
+        """Should date wrapped dicts and only merge them if every field matches"""
+        coalescer = Coalescer(window=5)
+        fields = {
+            'path': '/page',
+            'method': 'GET',
+            'status_code': 200,
+            'user_agent': 'GPTBot',
+        }
+        coalescer.add(Event.from_payload(dict(fields, timestamp=100)), now=10.0)
+        coalescer.add(Event.from_payload(dict(fields)), now=11.0)
+        coalescer.add(
+            Event.from_payload(dict(fields, referrer='https://a.example/')), now=11.0
+        )
+
+        released = coalescer.drain(now=15.0)
+
+        assert len(released) == 2
+        payload = released[0].to_payload()
+        assert payload['count'] == 2
+        assert payload['first_seen'] == 100
+        assert payload['last_seen'] >= 100
+        assert released[1].to_payload()['referrer'] == 'https://a.example/'
+
+    def test_open_bucket_is_kept_until_closed(self):
+        """Should only release closed windows unless draining everything"""
+        coalescer = Coalescer(window=5)
+        coalescer.add(event(), now=11.0)
+
+        assert coalescer.drain(now=12.0) == []
+        assert len(coalescer.drain(now=12.0, everything=True)) == 1
+        assert len(coalescer) == 0
+
+    def test_releases_oldest_bucket_over_max_keys(self):
+        """Should stay bounded by releasing the oldest window early"""
+        coalescer = Coalescer(window=5, max_keys=2)
+        assert coalescer.add(event('/a'), now=1.0) == []
+        assert coalescer.add(event('/b'), now=6.0) == []
+
+        released = coalescer.add(event('/c'), now=7.0)
+
+        assert [e.path for e in released] == ['/a']
+        assert len(coalescer) == 2
+
+
+class TestClientCoalescing:
+    def test_flush_sends_merged_events(self):
+        """Should send one event per key with totals"""
+        transport = MemoryTransport()
+        client = surfgeoClient(surfgeoConfig(
+            script_key='sk_test_key_123456789012345',
+            transport=transport,
+            coalesce_window=60
+        ))
+
+        for _ in range(5):
+            client.track(event())
+        client.track(event('/other'))
+        client.flush()
+        client.close()
+
+        assert transport.batches == 1
+        assert [(e['path'], e.get('count', 1)) for e in transport.payloads] == [
+            ('/page', 5),
+            ('/other', 1),
+        ]
+
+    def test_close_sends_buffered_events(self):
+        """Should send events held by start_buffering() on close"""
+        transport = MemoryTransport()
+        client = surfgeoClient(surfgeoConfig(
+            script_key='sk_test_key_123456789012345',
+            transport=transport,
+            coalesce_window=60
+        ))
+
+        client.start_buffering()
+        client.track(event())
+        client.track(event('/other'))
+        client.close()
+
+        assert sorted(e['path'] for e in transport.payloads) == ['/other', '/page']
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+
+django = pytest.importorskip('django')
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure()
+settings.surfgeo_CONFIG = {'script_key': 'sk_test_key_123456789012345'}
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+from surfgeo.middleware.django import surfgeoMiddleware, iscoroutinefunction
+
+
+class TestDjangoMiddleware:
+    def test_sync_chain_tracks_with_thread(self):
+        """Should use sync tracking when get_response is sync"""
+        middleware = surfgeoMiddleware(
+            lambda request: HttpResponse(b'created', status=201)
+        )
+        assert not middleware.async_mode
+
+        with patch.object(middleware.client, 'track') as mock_track:
+            response = middleware(RequestFactory().get('/page'))
+
+        assert response.status_code == 201
+        payload = mock_track.call_args[0][0].request_fields()
+        assert payload['status_code'] == 201
+        assert payload['response_bytes'] == 7
+        assert payload['duration_ms'] >= 0
+
+    def test_malformed_content_length_ignored(self):
+        """Should return the response and skip response_bytes on a bad Content-Length"""
+        def get_response(request):
+            response = HttpResponse(b'ok')
+            response['Content-Length'] = 'abc'
+            return response
+
+        middleware = surfgeoMiddleware(get_response)
+        with patch.object(middleware.client, 'track') as mock_track:
+            response = middleware(RequestFactory().get('/page'))
+
+        assert response.status_code == 200
+        assert 'response_bytes' not in mock_track.call_args[0][0].request_fields()
+
+    def test_async_chain_runs_natively(self):
+        """Should mark itself async and track on the event loop"""
+        async def get_response(request):
+            return HttpResponse(status=202)
+
+        middleware = surfgeoMiddleware(get_response)
+        assert middleware.async_mode
+        assert iscoroutinefunction(middleware)
+
+        with patch.object(middleware.client, 'track') as mock_track, patch.object(
+            middleware.client, 'track_async', new_callable=AsyncMock
+        ) as mock_async:
+            response = asyncio.run(middleware(RequestFactory().get('/page')))
+
+        assert response.status_code == 202
+        assert not mock_track.called
+        assert mock_async.call_args[0][0].path == '/page'
@@ -0,0 +1,60 @@
+import pytest
+from unittest.mock import patch
+
+flask = pytest.importorskip('flask')
+
+from surfgeo.middleware.flask import STARTED_NS_KEY, surfgeo
+
+
+def make_app():
+    app = flask.Flask(__name__)
+
+    @app.route('/stream')
+    def stream():
+        return flask.Response((chunk for chunk in [b'a', b'b']), status=206)
+
+    return app
+
+
+class TestFlaskExtension:
+    def test_tracks_when_response_closes(self):
+        """Should defer tracking until the response is closed"""
+        app = make_app()
+        extension = surfgeo(app, script_key='sk_test_key_123456789012345')
+
+        with patch.object(extension.client, 'track') as mock_track:
+            response = app.test_client().get('/stream', buffered=False)
+            assert not mock_track.called
+
+            assert b''.join(response.response) == b'ab'
+            response.close()
+
+        payload = mock_track.call_args[0][0].request_fields()
+        assert payload['path'] == '/stream'
+        assert payload['status_code'] == 206
+        assert payload['duration_ms'] >= 0
+
+    def test_excluded_path_is_not_tracked(self):
+        """Should skip excluded paths"""
+        app = make_app()
+        extension = surfgeo(
+            app, script_key='sk_test_key_123456789012345', exclude=['/stream']
+        )
+
+        with patch.object(extension.client, 'track') as mock_track:
+            app.test_client().get('/stream').close()
+
+        assert not mock_track.called
+
+    def test_excluded_path_skips_timer(self):
+        """Should not start the timer for excluded paths"""
+        app = make_app()
+        surfgeo(app, script_key='sk_test_key_123456789012345', exclude=['/stream'])
+
+        environs = []
+        app.after_request(
+            lambda response: environs.append(dict(flask.request.environ)) or response
+        )
+        app.test_client().get('/stream/').close()
+
+        assert environs and STARTED_NS_KEY not in environs[0]
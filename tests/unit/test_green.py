@@ -0,0 +1,77 @@
+import importlib.util
+import subprocess
+import sys
+import textwrap
+import threading
+import pytest
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.green import cooperative_runtime
+from surfgeo.testing import FakeCollector
+
+
+KEY = 'sk_test_key_123456789012345'
+HAS_GEVENT = importlib.util.find_spec('gevent') is not None
+
+
+class TestGreenDelivery:
+    def test_threads_without_patching(self):
+        """Should keep thread delivery when nothing is monkey-patched"""
+        client = surfgeoClient(surfgeoConfig(script_key=KEY))
+
+        assert cooperative_runtime() is None
+        assert client._green is None
+
+    def test_green_falls_back_to_threads(self):
+        """Should deliver events tracked from unpatched threads with delivery='green'"""
+        if HAS_GEVENT:
+            # Importing gevent must not count as an active runtime
+            import gevent  # noqa: F401
+
+        with FakeCollector() as collector:
+            client = surfgeoClient(surfgeoConfig(
+                script_key=KEY, delivery='green', endpoint=collector.endpoint,
+                transport='http.client', timeout=0.1
+            ))
+            threads = [
+                threading.Thread(
+                    target=client.track, args=({'path': f'/{i}', 'method': 'GET'},)
+                )
+                for i in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert client._green is None
+            assert collector.wait_for(5)
+            client.close()
+
+    def test_rejects_empty_pool(self):
+        """Should validate green_pool_size"""
+        with pytest.raises(ValueError, match='green_pool_size'):
+            surfgeoClient(surfgeoConfig(script_key=KEY, green_pool_size=0))
+
+    @pytest.mark.skipif(not HAS_GEVENT, reason='gevent not installed')
+    def test_patched_gevent_pool_batches(self):
+        """Should use green delivery after monkey.patch_all() and send batches"""
+        code = textwrap.dedent('''
+            from gevent import monkey; monkey.patch_all()
+            import sys
+            from surfgeo.client import surfgeoClient, surfgeoConfig
+            from surfgeo.transport import MemoryTransport
+            KEY = sys.argv[1]
+            transport = MemoryTransport()
+            client = surfgeoClient(
+                surfgeoConfig(script_key=KEY, transport=transport, green_pool_size=2)
+            )
+            # Queued without yielding, so workers find a full batch
+            for i in range(50):
+                client.track({"path": f"/{i}"})
+            client.close()
+            print(client._green.runtime, len(transport.payloads),
+                  transport.batches >= 1, client.stats()["dropped"])
+            print(surfgeoClient(surfgeoConfig(script_key=KEY)).transport.name)
+        ''')
+        output = subprocess.check_output([sys.executable, '-c', code, KEY], text=True)
+        assert output.split('\n')[:2] == ['gevent 50 True 0', 'http.client']
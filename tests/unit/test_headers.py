@@ -0,0 +1,134 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.headers import HeaderAllowlist, environ_headers
+from surfgeo.middleware.asgi import surfgeoASGIMiddleware
+from surfgeo.middleware.wsgi import surfgeoWSGIMiddleware
+
+
+KEY = 'sk_test_key_123456789012345'
+RULES = ['Accept-Language', 'X-Forwarded-For', 'Content-Type', 'Sec-Fetch-*']
+
+
+class TestHeaderAllowlist:
+    def test_native_forms(self):
+        """Should normalize names for WSGI, ASGI and mappings"""
+        allowlist = HeaderAllowlist(RULES)
+
+        assert (
+            'sec-fetch-mode' in allowlist.names and 'sec-fetch-site' in allowlist.names
+        )
+        assert allowlist.from_environ(
+            {
+                'HTTP_ACCEPT_LANGUAGE': 'en',
+                'CONTENT_TYPE': 'text/html',
+                'HTTP_SEC_FETCH_MODE': 'navigate',
+                'HTTP_COOKIE': 'secret',
+            }
+        ) == {
+            'accept-language': 'en',
+            'content-type': 'text/html',
+            'sec-fetch-mode': 'navigate',
+        }
+        assert allowlist.from_asgi(
+            [
+                (b'x-forwarded-for', b'1.1.1.1'),
+                (b'x-forwarded-for', b'2.2.2.2'),
+                (b'cookie', b'secret'),
+            ]
+        ) == {'x-forwarded-for': '1.1.1.1, 2.2.2.2'}
+        assert allowlist.from_mapping({'Accept-Language': 'fr'}) == {
+            'accept-language': 'fr'
+        }
+        assert allowlist.from_environ({'HTTP_COOKIE': 'secret'}) is None
+
+    def test_values_capped(self):
+        """Should cut each value to max_bytes"""
+        allowlist = HeaderAllowlist(['Via'], max_bytes=8)
+
+        assert allowlist.from_environ({'HTTP_VIA': 'x' * 100}) == {'via': 'x' * 8}
+        assert allowlist.from_asgi([(b'via', b'y' * 100)]) == {'via': 'y' * 8}
+
+    def test_non_ascii_values_capped_in_bytes(self):
+        """Should cap the UTF-8 size, not the number of characters"""
+        allowlist = HeaderAllowlist(['Accept-Language'], max_bytes=5)
+        captured = allowlist.from_mapping({'accept-language': 'ééééé'})
+
+        assert captured['accept-language'] == 'éé'
+        assert allowlist.from_asgi([(b'accept-language', 'ééé'.encode())]) == {
+            'accept-language': 'Ã©'
+        }
+
+    def test_rejects_unknown_prefix(self):
+        """Should refuse wildcards that match no known header"""
+        with pytest.raises(ValueError, match='capture_headers'):
+            surfgeoClient(surfgeoConfig(script_key=KEY, capture_headers=['X-Custom-*']))
+        with pytest.raises(ValueError, match='capture_headers'):
+            surfgeoClient(surfgeoConfig(script_key=KEY, capture_headers='Accept'))
+
+    def test_environ_headers_skip_copying(self):
+        """Should read only what build_event needs"""
+        assert environ_headers(
+            {'HTTP_USER_AGENT': 'GPTBot', 'HTTP_COOKIE': 'secret'}
+        ) == {'User-Agent': 'GPTBot'}
+
+
+class TestMiddlewareCapture:
+    def test_wsgi_fills_headers_field(self):
+        """Should add allowlisted headers to the payload"""
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return [b'ok']
+
+        middleware = surfgeoWSGIMiddleware(app, script_key=KEY, capture_headers=RULES)
+        environ = {
+            'PATH_INFO': '/',
+            'REQUEST_METHOD': 'GET',
+            'HTTP_ACCEPT_LANGUAGE': 'de',
+            'HTTP_COOKIE': 'x',
+        }
+        with patch.object(middleware.client, 'track') as mock_track:
+            body = middleware(environ, lambda *args: None)
+            list(body)
+            body.close()
+
+        assert mock_track.call_args[0][0].request_fields()['headers'] == {
+            'accept-language': 'de'
+        }
+
+    def test_asgi_fills_headers_field(self):
+        """Should capture from raw scope headers"""
+        async def app(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        async def send(message):
+            pass
+
+        middleware = surfgeoASGIMiddleware(app, script_key=KEY, capture_headers=RULES)
+        scope = {'type': 'http', 'path': '/', 'method': 'GET',
+                 'headers': [(b'user-agent', b'GPTBot'), (b'sec-fetch-site', b'none')]}
+        with patch.object(
+            middleware.client, 'track_async', new_callable=AsyncMock
+        ) as mock_track:
+            asyncio.run(middleware(scope, None, send))
+
+        payload = mock_track.call_args[0][0].request_fields()
+        assert payload['user_agent'] == 'GPTBot'
+        assert payload['headers'] == {'sec-fetch-site': 'none'}
+
+    def test_no_headers_field_by_default(self):
+        """Should leave payloads unchanged without an allowlist"""
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return [b'ok']
+
+        middleware = surfgeoWSGIMiddleware(app, script_key=KEY)
+        with patch.object(middleware.client, 'track') as mock_track:
+            body = middleware(
+                {'PATH_INFO': '/', 'HTTP_ACCEPT_LANGUAGE': 'de'}, lambda *args: None
+            )
+            body.close()
+
+        assert 'headers' not in mock_track.call_args[0][0].request_fields()
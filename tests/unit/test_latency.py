@@ -0,0 +1,78 @@
+import pytest
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.event import Event
+from surfgeo.latency import AdaptiveTimeout, LatencySketch
+from surfgeo.transport import MemoryTransport
+
+
+class TestLatencySketch:
+    def test_quantile_within_relative_error(self):
+        """Should estimate p99 within bucket accuracy"""
+        sketch = LatencySketch()
+        for i in range(1, 1001):
+            sketch.add(i / 1000)
+
+        assert sketch.quantile(0.99) == pytest.approx(0.99, rel=0.1)
+        assert sketch.quantile(0.5) == pytest.approx(0.5, rel=0.1)
+
+    def test_empty_sketch(self):
+        """Should return 0 without samples"""
+        assert LatencySketch().quantile(0.99) == 0.0
+
+
+class TestAdaptiveTimeout:
+    def test_follows_observed_latency(self):
+        """Should settle near p99 plus headroom within bounds"""
+        adaptive = AdaptiveTimeout(initial=0.05, minimum=0.01, maximum=1.0)
+        for _ in range(100):
+            adaptive.observe(0.2)
+
+        assert 0.2 < adaptive.current < 0.3
+
+    def test_grows_when_sends_time_out(self):
+        """Should raise the timeout when sends keep timing out"""
+        adaptive = AdaptiveTimeout(initial=0.05, minimum=0.01, maximum=0.5)
+        for _ in range(200):
+            adaptive.observe_timeout()
+
+        assert adaptive.current == 0.5
+        assert adaptive.stats()['timeouts'] == 200
+
+    def test_clamps_to_minimum(self):
+        """Should not go below the configured minimum"""
+        adaptive = AdaptiveTimeout(initial=0.05, minimum=0.02, maximum=0.1)
+        for _ in range(100):
+            adaptive.observe(0.001)
+
+        assert adaptive.current == 0.02
+
+
+class TestClientAdaptiveTimeout:
+    def test_stats_report_current_timeout(self):
+        """Should expose the per-send timeout in stats"""
+        client = surfgeoClient(surfgeoConfig(
+            script_key='sk_test_key_123456789012345',
+            transport=MemoryTransport(),
+            adaptive_timeout=True,
+            timeout_max=0.5
+        ))
+        for _ in range(30):
+            client._post(Event.from_payload({'path': '/'}))
+
+        stats = client.stats()
+        assert stats['samples'] == 30
+        assert stats['timeout'] == client.send_timeout == 0.01
+
+    def test_fixed_timeout_stats(self):
+        """Should report config.timeout without adaptive mode"""
+        client = surfgeoClient(surfgeoConfig(script_key='sk_test_key_123456789012345'))
+        assert client.stats() == {'timeout': 0.05}
+
+    def test_rejects_inverted_bounds(self):
+        """Should validate timeout_min <= timeout_max"""
+        with pytest.raises(ValueError, match='timeout_min'):
+            surfgeoClient(surfgeoConfig(
+                script_key='sk_test_key_123456789012345',
+                timeout_min=0.2,
+                timeout_max=0.1
+            ))
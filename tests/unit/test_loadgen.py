@@ -0,0 +1,49 @@
+import itertools
+from surfgeo.loadgen import LoadConfig, TrafficModel, run, to_environ, to_scope
+
+
+class TestTrafficModel:
+    def test_seeded_streams_repeat(self):
+        """Should produce the same requests for the same seed"""
+        first = list(itertools.islice(TrafficModel(seed=7).metadata(), 200))
+        second = list(itertools.islice(TrafficModel(seed=7).metadata(), 200))
+        other = list(itertools.islice(TrafficModel(seed=8).metadata(), 200))
+
+        assert first == second
+        assert first != other
+
+    def test_zipf_paths_and_mixed_agents(self):
+        """Should concentrate traffic on hot pages and mix bots with browsers"""
+        requests = list(
+            itertools.islice(TrafficModel(seed=1, static_share=0).metadata(), 5000)
+        )
+        paths = [request['path'] for request in requests]
+        agents = ' '.join(request['headers']['User-Agent'] for request in requests)
+
+        assert paths.count('/blog/post-1') > paths.count('/blog/post-100') * 10
+        assert 'GPTBot' in agents and 'ClaudeBot' in agents and 'Chrome' in agents
+
+    def test_framework_shapes(self):
+        """Should map metadata to WSGI environ and ASGI scope"""
+        request = next(TrafficModel(seed=1).metadata())
+
+        environ = to_environ(request)
+        scope = to_scope(request)
+        assert environ['PATH_INFO'] == scope['path'] == request['path']
+        assert environ['HTTP_USER_AGENT'] == request['headers']['User-Agent']
+        assert (b'user-agent', request['headers']['User-Agent'].encode()) in scope[
+            'headers'
+        ]
+
+
+class TestRun:
+    def test_reports_delivery_against_collector(self):
+        """Should deliver every generated request to the fake collector"""
+        report = run(
+            LoadConfig(rate=400, duration=0.5, target='wsgi', flush_interval=0.1)
+        )
+
+        assert report['requests'] == 200
+        assert report['delivered_requests'] == 200
+        assert report['drop_rate'] == 0
+        assert report['sdk_cpu_seconds'] > 0
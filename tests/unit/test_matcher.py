@@ -0,0 +1,105 @@
+import pytest
+from unittest.mock import patch
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.matcher import PathMatcher, compile_path_filter
+from surfgeo.middleware.wsgi import surfgeoWSGIMiddleware
+
+
+class TestPathMatcher:
+    def test_exact_rule(self):
+        """Should match exact paths only"""
+        matcher = PathMatcher(['/healthz'])
+        assert matcher.matches('/healthz')
+        assert not matcher.matches('/healthz/deep')
+
+    def test_prefix_and_suffix_rules(self):
+        """Should treat trailing/leading '*' as prefix/suffix rules"""
+        matcher = PathMatcher(['/static/*', '*.css'])
+        assert matcher.matches('/static/app.js')
+        assert matcher.matches('/theme/site.css')
+        assert not matcher.matches('/blog/post')
+
+    def test_glob_rule(self):
+        """Should compile other wildcards as globs"""
+        matcher = PathMatcher(['/api/*/raw', '/v?/ping'])
+        assert matcher.matches('/api/users/raw')
+        assert matcher.matches('/v2/ping')
+        assert not matcher.matches('/api/users')
+
+    def test_rejects_empty_rule(self):
+        """Should raise on empty rules"""
+        with pytest.raises(ValueError):
+            PathMatcher([''])
+
+
+class TestPathFilter:
+    def test_no_rules_compiles_to_none(self):
+        """Should skip filtering entirely without rules"""
+        assert compile_path_filter(None, []) is None
+
+    def test_exclude_wins_over_include(self):
+        """Should exclude matches even if included"""
+        path_filter = compile_path_filter(
+            include=['/blog/*'], exclude=['/blog/drafts/*']
+        )
+        assert not path_filter.excluded('/blog/post')
+        assert path_filter.excluded('/blog/drafts/x')
+        assert path_filter.excluded('/about')
+
+    def test_matches_normalized_path(self):
+        """Should match paths the way they are reported"""
+        path_filter = compile_path_filter(exclude=['/healthz', '/static/*'])
+        assert path_filter.excluded('/healthz/')
+        assert path_filter.excluded('/static')
+        assert path_filter.excluded('/static/')
+        assert path_filter.excluded('/static/app.js')
+        assert not path_filter.excluded('/statics')
+
+    def test_client_validates_rules(self):
+        """Should reject a bare string instead of a list"""
+        with pytest.raises(ValueError, match='exclude'):
+            surfgeoClient(
+                surfgeoConfig(
+                    script_key='sk_test_key_123456789012345', exclude='/healthz'
+                )
+            )
+
+
+class TestMiddlewareExclusion:
+    @patch('surfgeo.middleware.wsgi.build_event')
+    def test_wsgi_skips_excluded_path(self, mock_build):
+        """Should pass excluded requests straight through"""
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return [b'ok']
+
+        middleware = surfgeoWSGIMiddleware(
+            app,
+            script_key='sk_test_key_123456789012345',
+            exclude=['/healthz']
+        )
+        body = middleware(
+            {'PATH_INFO': '/healthz', 'REQUEST_METHOD': 'GET'}, lambda *args: None
+        )
+
+        assert list(body) == [b'ok']
+        assert not mock_build.called
+
+    @patch('surfgeo.middleware.wsgi.build_event')
+    def test_wsgi_skips_trailing_slash(self, mock_build):
+        """Should exclude '/healthz/' with a '/healthz' rule"""
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return [b'ok']
+
+        middleware = surfgeoWSGIMiddleware(
+            app,
+            script_key='sk_test_key_123456789012345',
+            exclude=['/healthz']
+        )
+        body = middleware(
+            {'PATH_INFO': '/healthz/', 'REQUEST_METHOD': 'GET'}, lambda *args: None
+        )
+
+        assert list(body) == [b'ok']
+        assert not mock_build.called
@@ -1,5 +1,7 @@
 import pytest
+from surfgeo.event import Event
 from surfgeo.payload import (
+    build_event,
     build_payload,
     normalize_path,
     extract_user_agent,
@@ -39,6 +41,45 @@ class TestPayloadBuilder:
         assert 'request_id' in payload
         assert len(payload['request_id']) > 0
 
+    def test_build_event_shares_repeated_strings(self):
+        """Should intern path, method and user agent across events"""
+        first = build_event(
+            '/page?a=1', 'get', {'User-Agent': ''.join(['GPT', 'Bot'])}
+        )
+        second = build_event(
+            '/page?a=2', 'get', {'User-Agent': ''.join(['GPT', 'Bot'])}
+        )
+
+        assert first.path is second.path
+        assert first.method == 'GET'
+        assert first.user_agent is second.user_agent
+        assert not hasattr(first, '__dict__')
+
+    def test_event_serializes_full_payload(self):
+        """Should produce the API payload only at the send edge"""
+        event = build_event(
+            '/page', 'GET', {'Referer': 'https://chat.openai.com/'}, 404
+        )
+        event.script_key = 'sk_test_key_123456789012345'
+
+        payload = event.to_payload()
+
+        assert payload['status_code'] == 404
+        assert payload['referrer'] == 'https://chat.openai.com/'
+        assert payload['script_key'] == 'sk_test_key_123456789012345'
+        assert payload['source'] == 'server'
+        assert 'request_id' in payload and 'count' not in payload
+
+    def test_event_from_dict_keeps_caller_fields(self):
+        """Should send caller-supplied dicts unchanged"""
+        event = Event.from_payload({'path': '/x', 'custom': 1})
+        event.script_key = 'sk_test_key_123456789012345'
+
+        assert event.to_payload() == {
+            'path': '/x', 'custom': 1,
+            'script_key': 'sk_test_key_123456789012345', 'source': 'server'
+        }
+
     def test_normalize_path_removes_query_string(self):
         """Should strip query parameters"""
         assert normalize_path('/test?page=1') == '/test'
@@ -0,0 +1,87 @@
+import gc
+import time
+from unittest.mock import patch
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.middleware.wsgi import surfgeoWSGIMiddleware
+from surfgeo.registry import ClientRegistry, config_key, registry
+
+
+KEY = 'sk_test_key_123456789012345'
+
+
+def app(environ, start_response):
+    start_response('200 OK', [])
+    return [b'ok']
+
+
+class Owner:
+    pass
+
+
+class TestClientRegistry:
+    def test_same_effective_config_shares_client(self):
+        """Should key on the config after defaults are applied"""
+        explicit = surfgeoConfig(
+            script_key=KEY, endpoint='https://api.surfgeo.com/api/track', exclude=['/a']
+        )
+        implicit = surfgeoConfig(script_key=KEY, exclude=['/a'])
+
+        assert config_key(explicit) == config_key(implicit)
+        assert config_key(implicit) != config_key(
+            surfgeoConfig(script_key=KEY, exclude=['/b'])
+        )
+
+    def test_refcounted_close(self):
+        """Should close the client when the last holder releases it"""
+        clients = ClientRegistry()
+        config = surfgeoConfig(script_key=KEY)
+        first = clients.acquire(config)
+        second = clients.acquire(config)
+
+        assert first is second and clients.refs(first) == 2
+        with patch.object(first, 'close') as mock_close:
+            clients.release(first)
+            assert not mock_close.called
+            clients.release(second)
+            assert mock_close.call_count == 1
+        assert len(clients) == 0
+
+    def test_owner_collection_releases(self):
+        """Should release when the owning middleware is garbage collected"""
+        clients = ClientRegistry()
+        owner = Owner()
+        client = clients.acquire(surfgeoConfig(script_key=KEY), owner=owner)
+
+        with patch.object(surfgeoClient, 'close') as mock_close:
+            del owner
+            gc.collect()
+            deadline = time.monotonic() + 2
+            while not mock_close.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        assert mock_close.called
+        assert clients.refs(client) == 0
+
+    def test_shutdown_closes_everything(self):
+        """Should close all clients still held at exit"""
+        clients = ClientRegistry()
+        clients.acquire(surfgeoConfig(script_key=KEY))
+        clients.acquire(surfgeoConfig(script_key=KEY, debug=True))
+
+        with patch.object(surfgeoClient, 'close') as mock_close:
+            clients.shutdown()
+
+        assert mock_close.call_count == 2
+        assert len(clients) == 0
+
+
+class TestMiddlewareSharing:
+    def test_mounted_apps_share_one_client(self):
+        """Should give every middleware with the same options one client"""
+        first = surfgeoWSGIMiddleware(app, script_key=KEY, include=['/registry*'])
+        second = surfgeoWSGIMiddleware(app, script_key=KEY, include=['/registry*'])
+        other = surfgeoWSGIMiddleware(app, script_key=KEY)
+
+        assert first.client is second.client
+        assert other.client is not first.client
+        assert registry.refs(first.client) == 2
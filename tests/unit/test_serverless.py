@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import pytest
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.serverless import track_invocations
+from surfgeo.testing import FakeCollector
+from surfgeo.transport import MemoryTransport
+
+
+class FakeContext:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def api_gateway_event(path='/items', method='GET'):
+    return {
+        'rawPath': path,
+        'requestContext': {'http': {'method': method}},
+        'headers': {'user-agent': 'PerplexityBot/1.0'}
+    }
+
+
+class TestServerless:
+    def test_flushes_one_batch_per_invocation(self):
+        """Should deliver all invocation events in a single batch request"""
+        with FakeCollector() as collector:
+            tracker = track_invocations(
+                script_key='sk_test_key_123456789012345', endpoint=collector.endpoint
+            )
+
+            @tracker
+            def handler(event, context):
+                tracker.client.track(
+                    {'path': '/extra', 'method': 'GET', 'user_agent': 'x'}
+                )
+                return {'statusCode': 201}
+
+            assert handler(api_gateway_event(), FakeContext(3000)) == {
+                'statusCode': 201
+            }
+            handler(api_gateway_event('/second'), FakeContext(3000))
+
+        assert collector.batches == 2
+        assert collector.connections == 1
+        assert [e['path'] for e in collector.events] == [
+            '/extra',
+            '/items',
+            '/extra',
+            '/second',
+        ]
+        assert collector.events[1]['status_code'] == 201
+        assert collector.events[1]['user_agent'] == 'PerplexityBot/1.0'
+
+    def test_tracks_failed_invocation(self):
+        """Should track a request whose handler raised as a 500"""
+        transport = MemoryTransport()
+        client = surfgeoClient(
+            surfgeoConfig(script_key='sk_test_key_123456789012345', transport=transport)
+        )
+
+        @track_invocations(client)
+        def handler(event, context):
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError):
+            handler(api_gateway_event(), FakeContext(3000))
+
+        assert [(e['path'], e['status_code']) for e in transport.payloads] == [
+            ('/items', 500)
+        ]
+
+    def test_flush_budget_respects_remaining_time(self):
+        """Should cap the flush by the remaining time minus margin"""
+        tracker = track_invocations(
+            script_key='sk_test_key_123456789012345', margin=0.1
+        )
+        assert tracker.flush_budget(FakeContext(300)) == pytest.approx(0.2)
+        assert tracker.flush_budget(FakeContext(50)) == 0.0
+        assert tracker.flush_budget(None) == tracker.client.config.batch_timeout
+
+    def test_out_of_time_drops_events(self):
+        """Should not send when no time is left"""
+        transport = MemoryTransport()
+        client = surfgeoClient(
+            surfgeoConfig(script_key='sk_test_key_123456789012345', transport=transport)
+        )
+        handler = track_invocations(client)(lambda event, context: None)
+
+        handler(api_gateway_event(), FakeContext(10))
+
+        assert transport.payloads == []
+
+    def test_async_handler(self):
+        """Should wrap coroutine handlers"""
+        transport = MemoryTransport()
+        client = surfgeoClient(
+            surfgeoConfig(script_key='sk_test_key_123456789012345', transport=transport)
+        )
+
+        @track_invocations(client)
+        async def handler(event, context):
+            return {'statusCode': 204}
+
+        asyncio.run(handler({'httpMethod': 'POST', 'path': '/hook', 'headers': {}}))
+
+        assert transport.batches == 1
+        assert transport.payloads[0]['method'] == 'POST'
+        assert transport.payloads[0]['status_code'] == 204
+
+    def test_async_handler_flushes_off_the_loop(self):
+        """Should not run the blocking flush on the event loop thread"""
+        transport = MemoryTransport()
+        client = surfgeoClient(
+            surfgeoConfig(script_key='sk_test_key_123456789012345', transport=transport)
+        )
+        threads = []
+        flush = client.flush
+
+        def recording_flush(timeout=None):
+            threads.append(threading.get_ident())
+            return flush(timeout)
+
+        client.flush = recording_flush
+
+        @track_invocations(client)
+        async def handler(event, context):
+            return {'statusCode': 200}
+
+        async def invoke():
+            await handler({'httpMethod': 'GET', 'path': '/', 'headers': {}})
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(invoke())
+
+        assert threads and threads[0] != loop_thread
+        assert transport.batches == 1
@@ -0,0 +1,102 @@
+import pytest
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.middleware.wsgi import surfgeoWSGIMiddleware
+from surfgeo.payload import build_event
+from surfgeo.sites import SiteMap, normalize_host
+from surfgeo.transport import MemoryTransport
+
+
+SHOP = 'sk_shop_key_123456789012345'
+BLOG = 'sk_blog_key_123456789012345'
+TENANT = 'sk_tenant_key_12345678901234'
+SITES = {'shop.example.com': SHOP, '*.blog.example.com': BLOG, '*.example.com': TENANT}
+
+
+class TestSiteMap:
+    def test_exact_and_wildcard_lookup(self):
+        """Should prefer exact hosts, then the most specific wildcard"""
+        sites = SiteMap(SITES)
+
+        assert sites.resolve('shop.example.com') == SHOP
+        assert sites.resolve('a.blog.example.com') == BLOG
+        assert sites.resolve('x.y.example.com') == TENANT
+        assert sites.resolve('example.com') is None
+        assert sites.resolve('other.org') is None
+        assert sites.resolve(None) is None
+
+    def test_host_normalization(self):
+        """Should ignore case, port and trailing dot"""
+        assert SiteMap(SITES).resolve('Shop.Example.COM.:8443') == SHOP
+        assert normalize_host('[::1]:8000') == '[::1]'
+
+    def test_rejects_inner_wildcards(self):
+        """Should only accept a leading '*.' wildcard"""
+        with pytest.raises(ValueError, match='wildcard'):
+            SiteMap({'shop.*.com': SHOP})
+
+
+class TestMultiSiteClient:
+    def client(self, transport, **options):
+        return surfgeoClient(
+            surfgeoConfig(script_key='', sites=SITES, transport=transport, **options)
+        )
+
+    def test_batches_partitioned_by_key(self):
+        """Should route by Host and send one batch per script key"""
+        transport = MemoryTransport()
+        client = self.client(transport)
+        client.start_buffering()
+        for host in (
+            'shop.example.com',
+            'a.example.com',
+            'shop.example.com',
+            'unknown.org',
+        ):
+            client.track(build_event('/', 'GET', {'Host': host}))
+        client.flush()
+
+        assert transport.batches == 2
+        assert [payload['script_key'] for payload in transport.payloads] == [
+            SHOP,
+            SHOP,
+            TENANT,
+        ]
+
+    def test_fallback_script_key(self):
+        """Should use script_key for hosts not in the map"""
+        client = surfgeoClient(
+            surfgeoConfig(script_key=SHOP, sites={'*.example.com': TENANT})
+        )
+
+        assert client.site_key('a.example.com') == TENANT
+        assert client.site_key('unknown.org') == SHOP
+
+    def test_validates_site_keys(self):
+        """Should validate every script key in the map"""
+        with pytest.raises(ValueError, match='sites'):
+            surfgeoClient(surfgeoConfig(script_key='', sites={'example.com': 'bad'}))
+        with pytest.raises(ValueError, match='script_key is required'):
+            surfgeoClient(surfgeoConfig(script_key=''))
+
+    def test_wsgi_routes_by_host_header(self):
+        """Should accept the sites map through middleware options"""
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return [b'ok']
+
+        transport = MemoryTransport()
+        middleware = surfgeoWSGIMiddleware(app, sites=SITES, transport=transport)
+        middleware.client.start_buffering()
+        body = middleware(
+            {
+                'PATH_INFO': '/',
+                'REQUEST_METHOD': 'GET',
+                'HTTP_HOST': 'a.blog.example.com',
+            },
+            lambda *args: None,
+        )
+        list(body)
+        body.close()
+        middleware.client.flush()
+
+        assert transport.payloads[0]['script_key'] == BLOG
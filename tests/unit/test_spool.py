@@ -0,0 +1,75 @@
+import json
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.spool import Spool, segment_paths
+from surfgeo.transport import Transport
+
+
+SHOP = 'sk_shop_key_123456789012345'
+
+
+class FailingTransport(Transport):
+    def __init__(self):
+        super().__init__('http://127.0.0.1:9/api/track')
+
+    def post(self, url, body, timeout, headers=None):
+        raise ConnectionError('down')
+
+
+class TimingOutTransport(FailingTransport):
+    def post(self, url, body, timeout, headers=None):
+        raise TimeoutError('timed out')
+
+
+class TestSpool:
+    def test_client_spools_failed_batches(self, tmp_path):
+        """Should write undeliverable events to the spool"""
+        client = surfgeoClient(surfgeoConfig(
+            script_key=SHOP,
+            transport=FailingTransport(),
+            spool_dir=str(tmp_path)
+        ))
+        client.start_buffering()
+        client.track({'path': '/a'})
+        client.track({'path': '/b'})
+        assert client.flush() == 0
+        client.close()
+
+        [segment] = segment_paths(str(tmp_path))
+        with open(segment, 'rb') as f:
+            assert [json.loads(line)['path'] for line in f] == ['/a', '/b']
+
+    def test_active_segment_sealed_on_close(self, tmp_path):
+        """Should only expose sealed segments by default"""
+        spool = Spool(str(tmp_path))
+        spool.write([{'path': '/'}])
+
+        assert segment_paths(str(tmp_path)) == []
+        assert len(segment_paths(str(tmp_path), include_active=True)) == 1
+        spool.close()
+        assert len(segment_paths(str(tmp_path))) == 1
+
+    def test_max_bytes_drops(self, tmp_path):
+        """Should stop writing at max_bytes"""
+        spool = Spool(str(tmp_path), max_bytes=50)
+
+        assert spool.write([{'path': '/' + 'x' * 100}]) == 0
+        assert spool.dropped == 1
+
+    def test_timed_out_sends_not_spooled(self, tmp_path):
+        """Should not spool a send the endpoint may have received"""
+        client = surfgeoClient(surfgeoConfig(
+            script_key=SHOP,
+            transport=TimingOutTransport(),
+            spool_dir=str(tmp_path),
+            max_batch_size=1
+        ))
+        client._post(client._to_event({'path': '/single'}))
+        client.start_buffering()
+        client.track({'path': '/a'})
+        client.track({'path': '/b'})
+        assert client.flush() == 0
+        client.close()
+
+        [segment] = segment_paths(str(tmp_path))
+        with open(segment, 'rb') as f:
+            assert [json.loads(line)['path'] for line in f] == ['/b']
@@ -0,0 +1,159 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import weakref
+import pytest
+from unittest.mock import patch
+from surfgeo.client import surfgeoClient, surfgeoConfig, _prewarm_after_fork
+from surfgeo.event import Event
+from surfgeo.resolver import DNSCache
+from surfgeo.testing import FakeCollector
+from surfgeo.transport import HTTPClientTransport, MemoryTransport, create_transport
+
+
+class TestTransports:
+    def test_import_is_lazy(self):
+        """Should not import requests or httpx with the package"""
+        code = (
+            'import sys, surfgeo; '
+            'print("requests" in sys.modules, "httpx" in sys.modules)'
+        )
+        output = subprocess.check_output([sys.executable, '-c', code], text=True)
+        assert output.strip() == 'False False'
+
+    def test_create_transport_rejects_unknown_name(self):
+        """Should raise ValueError for unknown names"""
+        with pytest.raises(ValueError, match='transport must be one of'):
+            create_transport('carrier-pigeon', 'https://example.com')
+
+    def test_client_rejects_unknown_transport(self):
+        """Should validate transport at construction"""
+        with pytest.raises(ValueError, match='transport'):
+            surfgeoClient(
+                surfgeoConfig(
+                    script_key='sk_test_key_123456789012345', transport='nope'
+                )
+            )
+
+    def test_http_client_transport_reuses_connection(self):
+        """Should send over one keep-alive connection"""
+        with FakeCollector() as collector:
+            transport = HTTPClientTransport(collector.endpoint)
+            for i in range(3):
+                transport.send({'path': f'/{i}'}, timeout=1.0)
+            transport.close()
+
+        assert [event['path'] for event in collector.events] == ['/0', '/1', '/2']
+        assert collector.connections == 1
+
+    def test_memory_transport_used_for_sync_and_async(self):
+        """Should route both paths through a configured transport"""
+        transport = MemoryTransport()
+        client = surfgeoClient(
+            surfgeoConfig(script_key='sk_test_key_123456789012345', transport=transport)
+        )
+
+        client._post(Event.from_payload({'path': '/sync'}))
+        asyncio.run(client._post_async(Event.from_payload({'path': '/async'})))
+
+        assert [payload['path'] for payload in transport.payloads] == [
+            '/sync',
+            '/async',
+        ]
+
+    def test_httpx_transport_closes_async_clients(self):
+        """Should close the AsyncClient of a previous loop and on close()"""
+        pytest.importorskip('httpx')
+        first_loop, second_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+        with FakeCollector() as collector:
+            transport = create_transport('httpx', collector.endpoint)
+            first_loop.run_until_complete(transport.send_async({'path': '/first'}, 1.0))
+            first = transport._async_client
+            second_loop.run_until_complete(
+                transport.send_async({'path': '/second'}, 1.0)
+            )
+            second = transport._async_client
+            transport.close()
+        first_loop.close()
+        second_loop.close()
+
+        assert first is not second
+        assert first.is_closed and second.is_closed
+        assert collector.received == 2
+
+    def test_memory_transport_accepts_encoded_posts(self):
+        """Should record payloads posted as encoded bodies"""
+        transport = MemoryTransport('https://example.com/api/track')
+        transport.post(transport.endpoint, b'{"path":"/a"}', 1.0)
+        batch = b'{"events":[{"path":"/b"}]}'
+        asyncio.run(transport.post_async(transport.batch_endpoint, batch, 1.0))
+
+        assert [payload['path'] for payload in transport.payloads] == ['/a', '/b']
+        assert transport.batches == 1
+
+
+class TestPrewarm:
+    def test_http_client_transport_prewarm(self):
+        """Should open pooled connections that later sends reuse"""
+        with FakeCollector() as collector:
+            transport = HTTPClientTransport(collector.endpoint)
+            assert transport.prewarm(3, timeout=1.0, dns_ttl=60) == 3
+            assert collector.wait_connections(3)
+            for i in range(3):
+                transport.send({'path': f'/{i}'}, timeout=1.0)
+            transport.close()
+
+        assert collector.received == 3
+        assert collector.connections == 3
+
+    def test_dns_cache_refreshes_in_background(self):
+        """Should keep serving the old address while re-resolving"""
+        release = threading.Event()
+        addresses = iter(['192.0.2.1', '192.0.2.2'])
+
+        def getaddrinfo(host, port, type=0):
+            address = next(addresses)
+            if address == '192.0.2.2':
+                release.wait(1.0)
+            return [(None, None, None, '', (address, port))]
+
+        cache = DNSCache('api.example.com', 443, ttl=60)
+        with patch('socket.getaddrinfo', side_effect=getaddrinfo):
+            assert cache.refresh() == '192.0.2.1'
+            cache.invalidate()
+            assert cache.address() == '192.0.2.1'
+            release.set()
+            cache._thread.join(1.0)
+            assert cache.address() == '192.0.2.2'
+
+        assert DNSCache('127.0.0.1', 80).address() == '127.0.0.1'
+
+    def test_client_prewarm_defaults_to_http_client(self):
+        """Should prewarm through the http.client transport, again after fork"""
+        with FakeCollector() as collector:
+            client = surfgeoClient(surfgeoConfig(
+                script_key='sk_test_key_123456789012345', endpoint=collector.endpoint,
+                timeout=0.1, prewarm_connections=2
+            ))
+            assert collector.wait_connections(2)
+            assert isinstance(client.transport, HTTPClientTransport)
+            # Async sends stay on httpx, without an executor hop
+            assert client.async_transport.name == 'httpx'
+
+            _prewarm_after_fork(weakref.ref(client))
+            assert collector.wait_connections(4)
+            client.close()
+
+    def test_rejects_negative_prewarm(self):
+        """Should validate prewarm options"""
+        with pytest.raises(ValueError, match='prewarm_connections'):
+            surfgeoClient(
+                surfgeoConfig(
+                    script_key='sk_test_key_123456789012345', prewarm_connections=-1
+                )
+            )
+        with pytest.raises(ValueError, match='dns_ttl'):
+            surfgeoClient(
+                surfgeoConfig(script_key='sk_test_key_123456789012345', dns_ttl=0)
+            )
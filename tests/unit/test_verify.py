@@ -0,0 +1,209 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from surfgeo.client import surfgeoClient, surfgeoConfig
+from surfgeo.event import Event
+from surfgeo.middleware.asgi import surfgeoASGIMiddleware
+from surfgeo.middleware.wsgi import surfgeoWSGIMiddleware
+from surfgeo.verify import (
+    BotVerifier,
+    IPRangeIndex,
+    classify_user_agent,
+    load_ranges,
+    parse_address,
+)
+
+KEY = 'sk_test_key_123456789012345'
+RANGES = {
+    'gptbot': ['20.15.240.64/28', '20.15.240.80/28', '2a02:6b8::/32'],
+    'claudebot': ['160.79.104.0/23'],
+}
+GPTBOT_UA = 'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko); compatible; GPTBot/1.2'
+
+
+class TestIPRangeIndex:
+    def test_lookup(self):
+        """Should match IPv4, IPv6 and IPv4-mapped addresses"""
+        from ipaddress import ip_address
+        index = IPRangeIndex(RANGES['gptbot'])
+
+        # Adjacent /28s are merged into one interval
+        assert len(index) == 2
+        assert index.contains(ip_address('20.15.240.64'))
+        assert index.contains(ip_address('20.15.240.95'))
+        assert not index.contains(ip_address('20.15.240.96'))
+        assert not index.contains(ip_address('1.1.1.1'))
+        assert index.contains(ip_address('2a02:6b8:1::1'))
+        assert index.contains(ip_address('::ffff:20.15.240.70'))
+
+    def test_classify_user_agent(self):
+        """Should map User-Agent tokens to families, case-insensitively"""
+        assert classify_user_agent(GPTBOT_UA) == 'gptbot'
+        assert (
+            classify_user_agent('Mozilla/5.0 (compatible; chatgpt-user/1.0)')
+            == 'chatgpt-user'
+        )
+        assert classify_user_agent('Mozilla/5.0 (Windows NT 10.0)') is None
+        assert classify_user_agent('') is None
+
+
+class TestBotVerifier:
+    def test_verify(self):
+        """Should tell verified, spoofed and unknown claims apart"""
+        verifier = BotVerifier(RANGES)
+
+        assert verifier.verify('gptbot', '20.15.240.70') is True
+        assert verifier.verify('gptbot', '203.0.113.9') is False
+        assert verifier.verify('googlebot', '20.15.240.70') is None
+        assert verifier.verify('gptbot', None) is None
+
+    def test_verdicts_memoized(self):
+        """Should parse each IP once per family"""
+        verifier = BotVerifier(RANGES)
+
+        with patch('surfgeo.verify.parse_address', wraps=parse_address) as parse:
+            for _ in range(5):
+                verifier.verify('claudebot', '160.79.105.1')
+
+        assert parse.call_count == 1
+
+    def test_trusted_forwarded_for(self):
+        """Should only honor X-Forwarded-For set by trusted proxies"""
+        verifier = BotVerifier(RANGES, trusted_proxies=['10.0.0.0/8'])
+        forwarded = '198.51.100.1, 20.15.240.70, 10.0.0.7'
+
+        assert verifier.client_ip('10.0.0.2', forwarded) == '20.15.240.70'
+        assert verifier.client_ip('203.0.113.9', forwarded) == '203.0.113.9'
+        assert (
+            verifier.client_ip_from_environ(
+                {'REMOTE_ADDR': '10.1.1.1', 'HTTP_X_FORWARDED_FOR': '20.15.240.70'}
+            )
+            == '20.15.240.70'
+        )
+        assert (
+            verifier.client_ip_from_scope(
+                {
+                    'client': ('10.1.1.1', 5000),
+                    'headers': [(b'x-forwarded-for', b'20.15.240.70')],
+                }
+            )
+            == '20.15.240.70'
+        )
+        assert BotVerifier(RANGES).client_ip('10.0.0.2', forwarded) == '10.0.0.2'
+
+    def test_load_published_documents(self, tmp_path):
+        """Should read CIDR lists, published prefix documents and referenced files"""
+        (tmp_path / 'gptbot.json').write_text(
+            json.dumps(
+                {
+                    'prefixes': [
+                        {'ipv4Prefix': '20.15.240.64/28'},
+                        {'ipv6Prefix': '2a02:6b8::/32'},
+                    ]
+                }
+            )
+        )
+        path = tmp_path / 'bots.json'
+        path.write_text(
+            json.dumps({'GPTBot': 'gptbot.json', 'claudebot': ['160.79.104.0/23']})
+        )
+
+        assert load_ranges(str(path)) == {
+            'gptbot': ['20.15.240.64/28', '2a02:6b8::/32'],
+            'claudebot': ['160.79.104.0/23'],
+        }
+
+    def test_invalid_ranges(self, tmp_path):
+        """Should fail at startup on unreadable files or bad CIDRs"""
+        with pytest.raises(ValueError, match='bot ranges'):
+            surfgeoClient(
+                surfgeoConfig(script_key=KEY, bot_ranges=str(tmp_path / 'missing.json'))
+            )
+        with pytest.raises(ValueError, match='invalid IP range'):
+            surfgeoClient(
+                surfgeoConfig(script_key=KEY, bot_ranges={'gptbot': ['not-an-ip']})
+            )
+        with pytest.raises(ValueError, match='trusted_proxies'):
+            surfgeoClient(
+                surfgeoConfig(
+                    script_key=KEY, bot_ranges=RANGES, trusted_proxies='10.0.0.0/8'
+                )
+            )
+
+
+class TestEventTagging:
+    def test_client_tags_and_drops_ip(self):
+        """Should tag claimed crawlers and never send the client IP"""
+        client = surfgeoClient(surfgeoConfig(script_key=KEY, bot_ranges=RANGES))
+        verified = client._to_event(
+            Event(0, '/', 'GET', 200, GPTBOT_UA, client_ip='20.15.240.70')
+        )
+        spoofed = client._to_event(
+            Event(0, '/', 'GET', 200, GPTBOT_UA, client_ip='203.0.113.9')
+        )
+        browser = client._to_event(
+            Event(0, '/', 'GET', 200, 'Mozilla/5.0', client_ip='20.15.240.70')
+        )
+
+        assert verified.to_payload()['bot_verification'] == 'verified'
+        assert verified.to_payload()['bot_family'] == 'gptbot'
+        assert spoofed.to_payload()['bot_verification'] == 'spoofed'
+        assert 'bot_verification' not in browser.to_payload()
+        assert verified.client_ip is None and browser.client_ip is None
+
+    def test_wsgi_passes_remote_addr(self):
+        """Should read the client IP from the environ"""
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return [b'ok']
+
+        middleware = surfgeoWSGIMiddleware(app, script_key=KEY, bot_ranges=RANGES)
+        environ = {
+            'PATH_INFO': '/',
+            'HTTP_USER_AGENT': GPTBOT_UA,
+            'REMOTE_ADDR': '20.15.240.70',
+        }
+        with patch.object(middleware.client, 'track') as mock_track:
+            body = middleware(environ, lambda *args: None)
+            body.close()
+
+        assert mock_track.call_args[0][0].client_ip == '20.15.240.70'
+
+    def test_asgi_passes_scope_client(self):
+        """Should read the client IP from the scope"""
+        async def app(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+
+        async def send(message):
+            pass
+
+        middleware = surfgeoASGIMiddleware(app, script_key=KEY, bot_ranges=RANGES)
+        scope = {
+            'type': 'http',
+            'path': '/',
+            'method': 'GET',
+            'client': ('160.79.104.10', 443),
+            'headers': [(b'user-agent', b'ClaudeBot/1.0')],
+        }
+        with patch.object(
+            middleware.client, 'track_async', new_callable=AsyncMock
+        ) as mock_track:
+            asyncio.run(middleware(scope, None, send))
+
+        assert mock_track.call_args[0][0].client_ip == '160.79.104.10'
+
+    def test_no_ip_without_ranges(self):
+        """Should skip client IP extraction when bot_ranges is not set"""
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return [b'ok']
+
+        middleware = surfgeoWSGIMiddleware(app, script_key=KEY)
+        with patch.object(middleware.client, 'track') as mock_track:
+            body = middleware(
+                {'PATH_INFO': '/', 'REMOTE_ADDR': '20.15.240.70'}, lambda *args: None
+            )
+            body.close()
+
+        assert mock_track.call_args[0][0].client_ip is None
@@ -0,0 +1,85 @@
+import io
+import time
+from unittest.mock import patch
+from wsgiref.util import FileWrapper
+from surfgeo.middleware.wsgi import surfgeoWSGIMiddleware
+
+
+def make_middleware(app):
+    return surfgeoWSGIMiddleware(app, script_key='sk_test_key_123456789012345')
+
+
+def streaming_app(environ, start_response):
+    # start_response only runs once the server starts iterating
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    yield b'not '
+    yield b'found'
+
+
+class TestWSGIMiddleware:
+    def test_tracks_on_close_with_streamed_status(self):
+        """Should record the status set during iteration"""
+        middleware = make_middleware(streaming_app)
+
+        with patch.object(middleware.client, 'track') as mock_track:
+            result = middleware(
+                {'PATH_INFO': '/missing', 'REQUEST_METHOD': 'GET'}, lambda *args: None
+            )
+            assert not mock_track.called
+
+            body = b''.join(result)
+            result.close()
+
+        payload = mock_track.call_args[0][0].request_fields()
+        assert body == b'not found'
+        assert payload['status_code'] == 404
+        assert payload['response_bytes'] == 9
+        assert payload['duration_ms'] >= 0
+
+    def test_duration_excludes_body_download(self):
+        """Should time the wrapped app, not the client reading the body"""
+        middleware = make_middleware(streaming_app)
+
+        with patch.object(middleware.client, 'track') as mock_track:
+            result = middleware(
+                {'PATH_INFO': '/missing', 'REQUEST_METHOD': 'GET'}, lambda *args: None
+            )
+            for _ in result:
+                # A slow client
+                time.sleep(0.05)
+            result.close()
+
+        assert mock_track.call_args[0][0].request_fields()['duration_ms'] < 50
+
+    def test_close_tracks_once(self):
+        """Should ignore repeated close() calls"""
+        middleware = make_middleware(streaming_app)
+
+        with patch.object(middleware.client, 'track') as mock_track:
+            result = middleware(
+                {'PATH_INFO': '/', 'REQUEST_METHOD': 'GET'}, lambda *args: None
+            )
+            list(result)
+            result.close()
+            result.close()
+
+        assert mock_track.call_count == 1
+
+    def test_file_wrapper_passes_through(self):
+        """Should return file_wrapper responses unwrapped"""
+        def file_app(environ, start_response):
+            start_response('200 OK', [('Content-Length', '5')])
+            return environ['wsgi.file_wrapper'](io.BytesIO(b'hello'))
+
+        middleware = make_middleware(file_app)
+        environ = {
+            'PATH_INFO': '/file',
+            'REQUEST_METHOD': 'GET',
+            'wsgi.file_wrapper': FileWrapper,
+        }
+
+        with patch.object(middleware.client, 'track') as mock_track:
+            result = middleware(environ, lambda *args: None)
+
+        assert isinstance(result, FileWrapper)
+        assert mock_track.call_args[0][0].request_fields()['response_bytes'] == 5